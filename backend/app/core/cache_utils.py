@@ -4,6 +4,18 @@ from loguru import logger
 
 GLOBAL_ANALYTICS_KEY = "analytics:global"
 TOURNAMENT_ANALYTICS_KEY = "analytics:tournament:{}"
+TOURNAMENT_SCHEDULE_KEY = "schedule:tournament:{}"
+TOURNAMENT_SCHEDULE_VERSION_KEY = "schedule:tournament:{}:version"
+
+# Store a body only if no invalidation happened since it was read (KEYS: body, version; ARGV: version, ttl, body)
+_SET_IF_CURRENT_LUA = """
+if (redis.call('GET', KEYS[2]) or '0') ~= ARGV[1] then
+    return 0
+end
+redis.call('SETEX', KEYS[1], ARGV[2], ARGV[3])
+return 1
+"""
+_set_if_current = redis_client.register_script(_SET_IF_CURRENT_LUA)
 
 
 async def invalidate_global_analytics():
@@ -25,3 +37,32 @@ async def invalidate_tournament_analytics(tournament_id: int):
             logger.info(f"Cache invalidated: tournament {tournament_id} analytics")
     except Exception as e:
         logger.warning(f"Failed to invalidate tournament {tournament_id} analytics cache: {e}")
+
+
+async def read_tournament_schedule(tournament_id: int) -> tuple[str | None, str]:
+    """(cached body or None, version to pass to cache_tournament_schedule)."""
+    body, version = await redis_client.mget(
+        TOURNAMENT_SCHEDULE_KEY.format(tournament_id), TOURNAMENT_SCHEDULE_VERSION_KEY.format(tournament_id)
+    )
+    return body, version or "0"
+
+
+async def cache_tournament_schedule(tournament_id: int, version: str, ttl: int, body: str) -> bool:
+    """Cache a schedule built after reading `version`; refused if it was invalidated meanwhile."""
+    return bool(await _set_if_current(
+        keys=[TOURNAMENT_SCHEDULE_KEY.format(tournament_id), TOURNAMENT_SCHEDULE_VERSION_KEY.format(tournament_id)],
+        args=[version, ttl, body],
+    ))
+
+
+async def invalidate_tournament_schedule(tournament_id: int):
+    """Clear the serialized schedule of a tournament, and refuse bodies built before now."""
+    try:
+        pipe = redis_client.pipeline(transaction=True)
+        pipe.incr(TOURNAMENT_SCHEDULE_VERSION_KEY.format(tournament_id))
+        pipe.delete(TOURNAMENT_SCHEDULE_KEY.format(tournament_id))
+        _, deleted = await pipe.execute()
+        if deleted:
+            logger.info(f"Cache invalidated: tournament {tournament_id} schedule")
+    except Exception as e:
+        logger.warning(f"Failed to invalidate tournament {tournament_id} schedule cache: {e}")
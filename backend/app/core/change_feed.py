@@ -0,0 +1,38 @@
+"""
+Keyset cursors over change stamps, shared by delta exports and device sync.
+
+A change stamp is taken when a row is written, not when its transaction
+commits, so a row can become visible after rows with later stamps were
+already handed out. Cursors therefore stay exact while a client pages
+through a backlog, and once it has caught up they are pulled back to
+CHANGE_FEED_OVERLAP_SECONDS before that pass started. Rows in the overlap
+are sent again on the next call (consumers upsert by id), and no write that
+commits within the overlap is ever skipped.
+"""
+
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import tuple_
+from app.core.config import settings
+
+
+def pass_start(stamp: str | None) -> datetime:
+    """When the current pass started: kept in the cursor while paging, else now."""
+    return datetime.fromisoformat(stamp) if stamp else datetime.now(timezone.utc)
+
+
+def after_cursor(query, changed_at, id_column, cursor: list | None):
+    """Rows strictly after a [stamp, id] cursor, in cursor order."""
+    if cursor:
+        query = query.where(tuple_(changed_at, id_column) > tuple_(datetime.fromisoformat(cursor[0]), cursor[1]))
+    return query.order_by(None).order_by(changed_at, id_column)
+
+
+def settle(cursor: list | None, started: datetime) -> list | None:
+    """Pull a caught-up cursor back so writes still committing are picked up next time."""
+    if not cursor:
+        return cursor
+    stamp = datetime.fromisoformat(cursor[0])
+    floor = started - timedelta(seconds=settings.CHANGE_FEED_OVERLAP_SECONDS)
+    if stamp.tzinfo is None:
+        floor = floor.astimezone(timezone.utc).replace(tzinfo=None)  # naive columns hold UTC
+    return cursor if stamp <= floor else [floor.isoformat(), 0]
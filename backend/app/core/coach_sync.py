@@ -0,0 +1,300 @@
+"""
+Delta sync for offline coach devices.
+
+A sync token records, per dataset, the (changed_at, id) of the last row the
+device received plus the last tombstone id, so every call returns only rows
+changed since the previous one, in pages of SYNC_PAGE_SIZE. Once a device has
+caught up its cursors overlap recent history (see app.core.change_feed), so
+rows committed after later-stamped ones are not skipped.
+
+Uploads are idempotent:
+    - sessions, home visits and LSAS created offline carry a device client_id
+      and are upserted on it, so a retried upload never duplicates them;
+    - attendance is upserted on (session_id, participant_id);
+    - edits of existing sessions carry the server updated_at they were based
+      on. If the server row changed since, the server version wins and is
+      returned as a conflict.
+
+Coaches may only write their own sessions and records of their own
+trainees; anything else is rejected as a conflict, never applied.
+"""
+
+import base64
+import json
+from datetime import date, datetime, timezone
+from fastapi import HTTPException, status
+from sqlalchemy import select, func, or_
+from sqlalchemy.orm import Session
+from loguru import logger
+from app.db.bulk import bulk_upsert_returning
+from app.core.change_feed import after_cursor, pass_start, settle
+from app.models.session import Session as CoachingSession
+from app.models.attendance import Attendance
+from app.models.participant import Participant
+from app.models.lsas_assessment import LSASAssessment
+from app.models.home_visit import HomeVisit
+from app.models.deleted_row import DeletedRow
+from app.schemas.session import SessionOut
+from app.schemas.attendance import AttendanceOut
+from app.schemas.participant import ParticipantOut
+from app.schemas.lsas_assessment import LSASAssessmentOut
+from app.schemas.sync import SyncUpload
+
+SYNC_PAGE_SIZE = 2000  # rows per dataset per call
+
+SESSION_FIELDS = ("program_id", "coach_id", "date", "location", "start_time", "end_time", "notes", "is_online")
+
+# dataset -> (model, changed_at expression, tombstone table, response schema)
+SYNC_SOURCES = {
+    "sessions": (CoachingSession, func.coalesce(CoachingSession.updated_at, CoachingSession.created_at), "sessions", SessionOut),
+    "attendance": (Attendance, func.coalesce(Attendance.updated_at, Attendance.created_at), "attendances", AttendanceOut),
+    "participants": (Participant, Participant.updated_at, "participants", ParticipantOut),
+    "lsas_assessments": (LSASAssessment, func.coalesce(LSASAssessment.updated_at, LSASAssessment.created_at), "lsas_assessments", LSASAssessmentOut),
+}
+
+
+def encode_sync_token(cursors: dict, started: datetime | None, tombstone_id: int) -> str:
+    raw = json.dumps({"c": cursors, "s": started.isoformat() if started else None, "d": tombstone_id})
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_sync_token(token: str | None) -> tuple[dict, str | None, int]:
+    """(cursors, start of the pass being paged, tombstone id). Raises ValueError for a malformed token."""
+    if not token:
+        return {}, None, 0
+    data = json.loads(base64.urlsafe_b64decode(token.encode()))
+    cursors = {dataset: [c[0], int(c[1])] for dataset, c in dict(data["c"]).items() if c}
+    for stamp, _ in cursors.values():
+        datetime.fromisoformat(stamp)
+    return cursors, data.get("s"), int(data["d"])
+
+
+def coach_scope(db: Session, user) -> int | None:
+    """Participant id whose trainees a coach syncs; None means everything (managers, admins)."""
+    if getattr(user.role, "value", user.role) != "coach":
+        return None
+    coach_id = db.scalar(select(Participant.id).where(Participant.user_id == user.id))
+    if coach_id is None:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="No coach profile is linked to this account")
+    return coach_id
+
+
+def _scoped(dataset: str, query, coach_id: int | None):
+    if coach_id is None:
+        return query
+    trainees = select(Participant.id).where(Participant.coach_id == coach_id)
+    if dataset == "sessions":
+        return query.where(CoachingSession.coach_id == coach_id)
+    if dataset == "attendance":
+        return query.where(Attendance.session_id.in_(select(CoachingSession.id).where(CoachingSession.coach_id == coach_id)))
+    if dataset == "participants":
+        return query.where(or_(Participant.coach_id == coach_id, Participant.id == coach_id))
+    return query.where(LSASAssessment.participant_id.in_(trainees))
+
+
+def pull_changes(db: Session, token: str | None, coach_id: int | None) -> dict:
+    """Rows changed since the token, ids deleted since the token, and the next token."""
+    cursors, started, since_tombstone = decode_sync_token(token)
+    started = pass_start(started)
+    # Read the tombstone high-water mark first so deletes racing this pull land in the next one
+    last_tombstone = db.scalar(select(func.max(DeletedRow.id))) or 0
+
+    changes, has_more = {}, False
+    for dataset, (model, changed_at, _, schema) in SYNC_SOURCES.items():
+        query = after_cursor(select(model, changed_at.label("changed_at")), changed_at, model.id, cursors.get(dataset))
+        rows = db.execute(_scoped(dataset, query, coach_id).limit(SYNC_PAGE_SIZE)).all()
+
+        changes[dataset] = [schema.model_validate(obj).model_dump(mode="json") for obj, _ in rows]
+        if rows:
+            obj, stamp = rows[-1]
+            cursors[dataset] = [stamp.isoformat(), obj.id]
+        has_more = has_more or len(rows) == SYNC_PAGE_SIZE
+    if not has_more:
+        cursors = {dataset: settle(cursor, started) for dataset, cursor in cursors.items()}
+
+    deleted = {dataset: [] for dataset in SYNC_SOURCES}
+    tables = {table: dataset for dataset, (_, _, table, _) in SYNC_SOURCES.items()}
+    tombstones = db.execute(
+        select(DeletedRow.table_name, DeletedRow.row_id)
+        .where(DeletedRow.table_name.in_(tables), DeletedRow.id > since_tombstone, DeletedRow.id <= last_tombstone)
+        .order_by(DeletedRow.id)
+    )
+    for table_name, row_id in tombstones:
+        deleted[tables[table_name]].append(row_id)
+
+    return {
+        "token": encode_sync_token(cursors, started if has_more else None, last_tombstone),
+        "has_more": has_more,
+        "changes": changes,
+        "deleted": deleted,
+    }
+
+
+def _foreign_client_ids(db: Session, model, client_ids: list[str], owned) -> set[str]:
+    """client_ids already stored on rows the coach does not own (an upsert would overwrite them)."""
+    if not client_ids:
+        return set()
+    return set(db.scalars(select(model.client_id).where(model.client_id.in_(client_ids), ~owned)))
+
+
+def _trainee_ids(db: Session, participant_ids, coach_id: int) -> set[int]:
+    return set(db.scalars(
+        select(Participant.id).where(Participant.id.in_(set(participant_ids)), Participant.coach_id == coach_id)
+    ))
+
+
+def _push_sessions(db: Session, items, applied: dict, conflicts: list, coach_id: int | None):
+    created = [s for s in items if s.id is None]
+    edits = [s for s in items if s.id is not None]
+
+    missing_client_id = [s for s in created if not s.client_id]
+    for s in missing_client_id:
+        conflicts.append({"kind": "sessions", "reason": "client_id is required for new sessions"})
+    created = [s for s in created if s.client_id]
+    if coach_id is not None:
+        foreign = _foreign_client_ids(
+            db, CoachingSession, [s.client_id for s in created], CoachingSession.coach_id.is_not_distinct_from(coach_id)
+        )
+        for s in created:
+            if s.client_id in foreign:
+                conflicts.append({"kind": "sessions", "client_id": s.client_id, "reason": "not one of your sessions"})
+        created = [s for s in created if s.client_id not in foreign]
+    rows = [
+        {"client_id": s.client_id, **s.model_dump(include=set(SESSION_FIELDS)), **({"coach_id": coach_id} if coach_id is not None else {})}
+        for s in created
+    ]
+    for obj in bulk_upsert_returning(db, CoachingSession, rows, ("client_id",), SESSION_FIELDS, changed_stamp="updated_at"):
+        applied["sessions"][obj.client_id] = obj.id
+
+    if not edits:
+        return
+    current = {s.id: s for s in db.scalars(select(CoachingSession).where(CoachingSession.id.in_([e.id for e in edits])))}
+    for edit in edits:
+        session = current.get(edit.id)
+        if session is None:
+            conflicts.append({"kind": "sessions", "id": edit.id, "client_id": edit.client_id, "reason": "deleted on server"})
+            continue
+        if coach_id is not None and session.coach_id != coach_id:
+            conflicts.append({"kind": "sessions", "id": edit.id, "client_id": edit.client_id, "reason": "not one of your sessions"})
+            continue
+        server_version = session.updated_at or session.created_at
+        base = edit.base_updated_at
+        if base is not None and base.tzinfo is None:
+            base = base.replace(tzinfo=timezone.utc)
+        if base is None or (server_version and server_version > base):
+            conflicts.append({
+                "kind": "sessions", "id": edit.id, "client_id": edit.client_id,
+                "reason": "changed on server since the device last synced",
+                "server": SessionOut.model_validate(session).model_dump(mode="json"),
+            })
+            continue
+        for field in SESSION_FIELDS:
+            if field == "coach_id" and coach_id is not None:
+                continue  # coaches cannot hand a session to someone else
+            setattr(session, field, getattr(edit, field))
+        if edit.client_id:
+            applied["sessions"][edit.client_id] = session.id # type: ignore
+    db.flush()
+
+
+def _push_attendance(db: Session, items, applied: dict, conflicts: list, user, coach_id: int | None):
+    resolved = []
+    for record in items:
+        session_id = record.session_id
+        if session_id is None and record.session_client_id:
+            session_id = applied["sessions"].get(record.session_client_id) or db.scalar(
+                select(CoachingSession.id).where(CoachingSession.client_id == record.session_client_id)
+            )
+        if session_id is None:
+            conflicts.append({"kind": "attendance", "client_id": record.session_client_id, "reason": "unknown session"})
+            continue
+        resolved.append((session_id, record))
+
+    if coach_id is not None and resolved:
+        own_sessions = set(db.scalars(
+            select(CoachingSession.id).where(
+                CoachingSession.id.in_({session_id for session_id, _ in resolved}), CoachingSession.coach_id == coach_id
+            )
+        ))
+        trainees = _trainee_ids(db, (record.participant_id for _, record in resolved), coach_id)
+        allowed = []
+        for session_id, record in resolved:
+            if session_id not in own_sessions:
+                conflicts.append({"kind": "attendance", "id": session_id, "client_id": record.session_client_id, "reason": "not one of your sessions"})
+            elif record.participant_id not in trainees:
+                conflicts.append({"kind": "attendance", "id": session_id, "client_id": record.session_client_id, "reason": "not one of your trainees"})
+            else:
+                allowed.append((session_id, record))
+        resolved = allowed
+
+    rows = [{
+        "participant_id": record.participant_id,
+        "session_id": session_id,
+        "tournament_id": record.tournament_id,
+        "date": record.date or date.today(),
+        "present": record.present,
+        "marked_by": user.id,
+        "notes": record.notes,
+    } for session_id, record in resolved]
+    stored = bulk_upsert_returning(
+        db, Attendance, rows,
+        key_columns=("session_id", "participant_id"),
+        update_columns=("tournament_id", "date", "present", "marked_by", "notes"),
+        changed_stamp="updated_at",
+    )
+    applied["attendance"]["count"] = len(stored)
+
+
+def _for_trainees(db: Session, kind: str, items, conflicts: list, coach_id: int | None, model, owned):
+    """Drop uploads about someone else's trainees, or that would overwrite another coach's row."""
+    if coach_id is None or not items:
+        return items
+    trainees = _trainee_ids(db, (item.participant_id for item in items), coach_id)
+    foreign = _foreign_client_ids(db, model, [item.client_id for item in items], owned)
+    allowed = []
+    for item in items:
+        if item.participant_id not in trainees:
+            conflicts.append({"kind": kind, "client_id": item.client_id, "reason": "not one of your trainees"})
+        elif item.client_id in foreign:
+            conflicts.append({"kind": kind, "client_id": item.client_id, "reason": "not one of your records"})
+        else:
+            allowed.append(item)
+    return allowed
+
+
+def push_changes(db: Session, upload: SyncUpload, user, coach_id: int | None) -> tuple[dict, list]:
+    """Apply queued device writes in one transaction (the caller commits). Returns (applied, conflicts)."""
+    applied: dict = {"sessions": {}, "attendance": {}, "home_visits": {}, "lsas_assessments": {}}
+    conflicts: list = []
+
+    _push_sessions(db, upload.sessions, applied, conflicts, coach_id)
+    if upload.attendance:
+        _push_attendance(db, upload.attendance, applied, conflicts, user, coach_id)
+
+    trainees = select(Participant.id).where(Participant.coach_id == coach_id)
+    home_visits = _for_trainees(
+        db, "home_visits", upload.home_visits, conflicts, coach_id, HomeVisit,
+        HomeVisit.coach_id.is_not_distinct_from(coach_id) & HomeVisit.participant_id.in_(trainees),
+    )
+    visits = [{**v.model_dump(), **({"coach_id": coach_id} if coach_id is not None else {})} for v in home_visits]
+    for obj in bulk_upsert_returning(db, HomeVisit, visits, ("client_id",), ("participant_id", "coach_id", "visit_date", "notes", "photos_json")):
+        applied["home_visits"][obj.client_id] = obj.id
+
+    lsas = _for_trainees(
+        db, "lsas_assessments", upload.lsas_assessments, conflicts, coach_id, LSASAssessment,
+        LSASAssessment.participant_id.in_(trainees),
+    )
+    assessments = [
+        {**a.model_dump(), "assessor_id": user.id, "total_score": sum(a.scores_json.values()) if a.scores_json else 0.0}
+        for a in lsas
+    ]
+    for obj in bulk_upsert_returning(
+        db, LSASAssessment, assessments, ("client_id",), ("participant_id", "assessor_id", "date", "scores_json", "total_score", "notes"),
+        changed_stamp="updated_at",
+    ):
+        applied["lsas_assessments"][obj.client_id] = obj.id
+
+    uploaded = sum(len(v) for v in (upload.sessions, upload.attendance, upload.home_visits, upload.lsas_assessments))
+    if uploaded:
+        logger.info(f"Sync from user {user.id}: {uploaded} uploaded rows, {len(conflicts)} conflicts")
+    return applied, conflicts
@@ -10,5 +10,32 @@ class Settings:
     JWT_SECRET = os.getenv("JWT_SECRET", "your-default-secret")
     JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
     ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "1440"))
+    # Trust the signed uid/role claims instead of looking the user up (role changes apply at token expiry)
+    AUTH_TRUST_TOKEN_CLAIMS = os.getenv("AUTH_TRUST_TOKEN_CLAIMS", "false").lower() == "true"
+    USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+    USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL", "300"))  # seconds
+    REVOCATION_BLOOM_CAPACITY = int(os.getenv("REVOCATION_BLOOM_CAPACITY", "100000"))
+    REVOCATION_BLOOM_ERROR_RATE = float(os.getenv("REVOCATION_BLOOM_ERROR_RATE", "0.001"))
+    REVOCATION_REBUILD_SECONDS = int(os.getenv("REVOCATION_REBUILD_SECONDS", "3600"))
+    RATE_LIMIT_SYNC_SECONDS = float(os.getenv("RATE_LIMIT_SYNC_SECONDS", "0.5"))
+    # Adaptive limits tighten once the average statement takes longer than this
+    RATE_LIMIT_DB_LATENCY_TARGET_MS = float(os.getenv("RATE_LIMIT_DB_LATENCY_TARGET_MS", "25"))
+    RATE_LIMIT_MIN_LOAD_FACTOR = float(os.getenv("RATE_LIMIT_MIN_LOAD_FACTOR", "0.25"))
+    BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+    # Worker processes for bcrypt, and how many hash requests may wait before login answers 503
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+    PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))
+    # What to do when the sync engine runs on the event loop thread: warn | raise | off
+    SYNC_DB_ON_LOOP = os.getenv("SYNC_DB_ON_LOOP", "warn")
+    # Per-request query budgets (see app.core.query_stats): warn | raise | off
+    QUERY_BUDGET_MODE = os.getenv("QUERY_BUDGET_MODE", "warn")
+    QUERY_REPEAT_THRESHOLD = int(os.getenv("QUERY_REPEAT_THRESHOLD", "10"))
+    # Background export artifacts (app.core.export_jobs)
+    EXPORT_DIR = os.getenv("EXPORT_DIR", "./exports")
+    EXPORT_WORKERS = int(os.getenv("EXPORT_WORKERS", "2"))
+    EXPORT_MAX_AGE_SECONDS = int(os.getenv("EXPORT_MAX_AGE_SECONDS", str(7 * 24 * 3600)))
+    EXPORT_MAX_BYTES = int(os.getenv("EXPORT_MAX_BYTES", str(2 * 1024 ** 3)))
+    # Delta exports and device sync resend this much history, covering writes that commit late
+    CHANGE_FEED_OVERLAP_SECONDS = int(os.getenv("CHANGE_FEED_OVERLAP_SECONDS", "300"))
 
 settings = Settings()
\ No newline at end of file
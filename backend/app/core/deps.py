@@ -1,11 +1,13 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from sqlalchemy.orm import Session
+from sqlalchemy import select
 
 from app.core.config import settings
-from app.db.session import SessionLocal
-from app.models.user import User
+from app.core.user_cache import CurrentUser, user_cache
+from app.core.revocation import revocations
+from app.db.session import SessionLocal, AsyncSessionLocal
+from app.models.user import User, RoleEnum
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
@@ -19,25 +21,66 @@ def get_db():
         db.close()
 
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def get_async_db():
+    """Session for `async def` handlers; queries never block the event loop."""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def decode_token(token: str) -> dict:
     try:
         payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
-        username: str | None = payload.get("sub")  # type: ignore[assignment]
-        if not username:
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
     except JWTError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+    if not payload.get("sub"):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+    return payload
+
+
+def _user_from_claims(payload: dict) -> CurrentUser | None:
+    """The user as signed into the token by login, or None for tokens without uid/role claims."""
+    try:
+        return CurrentUser(id=int(payload["uid"]), username=payload["sub"], role=RoleEnum(payload["role"]))
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+async def get_current_user(request: Request, token: str = Depends(oauth2_scheme)) -> CurrentUser:
+    """
+    Resolve the token once per request. Hot paths do no DB lookups: the user
+    comes from the signed claims (AUTH_TRUST_TOKEN_CLAIMS) or the in-process
+    user cache, and the database is only read on a cache miss.
+    """
+    memoized = getattr(request.state, "current_user", None)
+    if memoized is not None:
+        return memoized
+
+    payload = decode_token(token)
+    username: str = payload["sub"]
+    if payload.get("jti") and await revocations.is_revoked(payload["jti"]):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token revoked")
+
+    user = _user_from_claims(payload) if settings.AUTH_TRUST_TOKEN_CLAIMS else None
+    if user is None:
+        user = user_cache.get(username)
+    if user is None:
+        async with AsyncSessionLocal() as db:
+            db_user = await db.scalar(select(User).where(User.username == username))
+            if not db_user:
+                raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+            user = CurrentUser.from_orm(db_user)
+        user_cache.put(user)
 
-    user = db.query(User).filter(User.username == username).first()
-    if not user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+    if not user.is_active:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="User is inactive")
+    request.state.current_user = user
     return user
 
 
 def require_roles(*allowed_roles):
     allowed = {getattr(role, "value", role) for role in allowed_roles}
 
-    def wrapper(current_user: User = Depends(get_current_user)):
+    async def wrapper(current_user: CurrentUser = Depends(get_current_user)):
         current_role = getattr(current_user.role, "value", current_user.role)
         if current_role not in allowed:
             raise HTTPException(
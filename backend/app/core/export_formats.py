@@ -0,0 +1,405 @@
+"""
+Streaming exporters for tournament and coaching data.
+
+CSV covers matches only and keeps the historical column layout. Columnar
+exports (Parquet / Arrow IPC) cover every dataset in DATASETS and are written
+as typed record batches, one row group per batch. Both read rows through a
+server-side cursor so memory stays bounded. Columnar output is deterministic:
+rows are ordered by id, JSON is key-sorted and no write timestamps are
+embedded, so the same data always yields the same bytes.
+
+Delta exports (export_delta) return rows changed after a watermark in pages
+of DELTA_PAGE_SIZE, plus tombstones from deleted_rows, and hand back the next
+watermark. Watermarks are (change stamp, id) keysets with an overlap, see
+app.core.change_feed.
+"""
+
+import io
+import csv
+import json
+import base64
+from datetime import datetime
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import select, func
+from sqlalchemy.orm import aliased
+from app.db.session import SessionLocal
+from app.core.change_feed import after_cursor, pass_start, settle
+from app.models.tournament import Tournament
+from app.models.match import Match
+from app.models.team import Team
+from app.models.team_member import TeamMember
+from app.models.spirit_score import SpiritScore
+from app.models.attendance import Attendance
+from app.models.lsas_assessment import LSASAssessment
+from app.models.participant import Participant
+from app.models.deleted_row import DeletedRow
+
+COLUMNAR_BATCH_ROWS = 50_000
+COLUMNAR_FORMATS = {
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.file", "arrow"),
+}
+
+EXPORT_HEADER = [
+    "Tournament",
+    "Team A",
+    "Team B",
+    "Score A",
+    "Score B",
+    "Spirit A→B",
+    "Spirit B→A",
+    "Status",
+    "Field",
+    "Start Time"
+]
+EXPORT_BATCH_ROWS = 1000       # rows fetched per server-side cursor round trip
+EXPORT_CHUNK_BYTES = 64 * 1024  # CSV bytes buffered before a chunk is sent
+
+
+def _spirit_given(from_team_column):
+    """First spirit total a team gave in the current match (scalar subquery)."""
+    return (
+        select(SpiritScore.total)
+        .where(SpiritScore.match_id == Match.id, SpiritScore.from_team_id == from_team_column)
+        .order_by(SpiritScore.id)
+        .limit(1)
+        .scalar_subquery()
+    )
+
+
+def _export_query(tournament_id: int | None = None):
+    """Flat export rows with team names and spirit totals joined in SQL."""
+    team_a = aliased(Team)
+    team_b = aliased(Team)
+    query = (
+        select(
+            Tournament.title,
+            team_a.name,
+            team_b.name,
+            Match.score_a,
+            Match.score_b,
+            _spirit_given(Match.team_a_id),
+            _spirit_given(Match.team_b_id),
+            Match.status,
+            Match.field_id,
+            Match.start_time,
+        )
+        .join(Tournament, Tournament.id == Match.tournament_id)
+        .outerjoin(team_a, team_a.id == Match.team_a_id)
+        .outerjoin(team_b, team_b.id == Match.team_b_id)
+        .order_by(Match.tournament_id, Match.id)
+    )
+    if tournament_id is not None:
+        query = query.where(Match.tournament_id == tournament_id)
+    return query
+
+
+def stream_export_csv(tournament_id: int | None = None):
+    """
+    Yield the export as CSV chunks. Rows come from a server-side cursor in
+    batches of EXPORT_BATCH_ROWS, so memory stays flat however large the export.
+    Uses its own session because it runs after the request handler returns.
+    """
+    db = SessionLocal()
+    try:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_HEADER)
+
+        result = db.execute(
+            _export_query(tournament_id).execution_options(stream_results=True, yield_per=EXPORT_BATCH_ROWS)
+        )
+        for title, team_a, team_b, score_a, score_b, spirit_a_to_b, spirit_b_to_a, status, field_id, start_time in result:
+            writer.writerow([
+                title,
+                team_a if team_a is not None else "-",
+                team_b if team_b is not None else "-",
+                score_a,
+                score_b,
+                spirit_a_to_b or "-",
+                spirit_b_to_a or "-",
+                status,
+                field_id or "-",
+                start_time.strftime("%Y-%m-%d %H:%M") if start_time else "-"
+            ])
+            if buffer.tell() >= EXPORT_CHUNK_BYTES:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+
+        yield buffer.getvalue()
+    finally:
+        db.close()
+
+
+_ts = pa.timestamp("us")
+_ts_tz = pa.timestamp("us", tz="UTC")
+
+
+def _matches(tournament_id: int | None):
+    team_a = aliased(Team)
+    team_b = aliased(Team)
+    query = (
+        select(
+            Match.id, Match.tournament_id, Tournament.title, Match.field_id,
+            Match.start_time, Match.end_time,
+            Match.team_a_id, team_a.name, Match.team_b_id, team_b.name,
+            Match.score_a, Match.score_b, Match.status, Match.created_at, Match.updated_at,
+        )
+        .join(Tournament, Tournament.id == Match.tournament_id)
+        .outerjoin(team_a, team_a.id == Match.team_a_id)
+        .outerjoin(team_b, team_b.id == Match.team_b_id)
+        .order_by(Match.id)
+    )
+    if tournament_id is not None:
+        query = query.where(Match.tournament_id == tournament_id)
+    return query
+
+
+def _spirit_scores(tournament_id: int | None):
+    query = (
+        select(
+            SpiritScore.id, SpiritScore.match_id, Match.tournament_id,
+            SpiritScore.from_team_id, SpiritScore.to_team_id,
+            SpiritScore.rules_knowledge, SpiritScore.fouls_body_contact, SpiritScore.fair_mindedness,
+            SpiritScore.positive_attitude, SpiritScore.communication, SpiritScore.total,
+            SpiritScore.comments, SpiritScore.submitted_by, SpiritScore.created_at,
+        )
+        .join(Match, Match.id == SpiritScore.match_id)
+        .order_by(SpiritScore.id)
+    )
+    if tournament_id is not None:
+        query = query.where(Match.tournament_id == tournament_id)
+    return query
+
+
+# Rows created before attendance had updated_at fall back to created_at
+ATTENDANCE_CHANGED_AT = func.coalesce(Attendance.updated_at, Attendance.created_at)
+# LSAS rows only get updated_at once edited
+LSAS_CHANGED_AT = func.coalesce(LSASAssessment.updated_at, LSASAssessment.created_at)
+
+
+def _attendance(tournament_id: int | None):
+    query = select(
+        Attendance.id, Attendance.participant_id, Attendance.session_id, Attendance.tournament_id,
+        Attendance.date, Attendance.present, Attendance.marked_by, Attendance.notes, Attendance.created_at,
+        ATTENDANCE_CHANGED_AT.label("updated_at"),
+    ).order_by(Attendance.id)
+    if tournament_id is not None:
+        query = query.where(Attendance.tournament_id == tournament_id)
+    return query
+
+
+def _tournament_participant_ids(tournament_id: int):
+    return (
+        select(TeamMember.participant_id)
+        .join(Team, Team.id == TeamMember.team_id)
+        .where(Team.tournament_id == tournament_id)
+    )
+
+
+def _lsas_assessments(tournament_id: int | None):
+    query = select(
+        LSASAssessment.id, LSASAssessment.participant_id, LSASAssessment.assessor_id, LSASAssessment.date,
+        LSASAssessment.scores_json, LSASAssessment.total_score, LSASAssessment.notes, LSASAssessment.created_at,
+        LSAS_CHANGED_AT.label("updated_at"),
+    ).order_by(LSASAssessment.id)
+    if tournament_id is not None:
+        query = query.where(LSASAssessment.participant_id.in_(_tournament_participant_ids(tournament_id)))
+    return query
+
+
+def _participants(tournament_id: int | None):
+    # Contact details and free-text notes are deliberately left out of bulk exports
+    query = select(
+        Participant.id, Participant.first_name, Participant.last_name, Participant.gender, Participant.dob,
+        Participant.school, Participant.community, Participant.current_status, Participant.participant_type,
+        Participant.coach_id, Participant.user_id, Participant.is_active, Participant.created_at, Participant.updated_at,
+    ).order_by(Participant.id)
+    if tournament_id is not None:
+        query = query.where(Participant.id.in_(_tournament_participant_ids(tournament_id)))
+    return query
+
+
+DATASETS = {
+    "matches": (pa.schema([
+        ("id", pa.int64()), ("tournament_id", pa.int64()), ("tournament", pa.string()), ("field_id", pa.string()),
+        ("start_time", _ts), ("end_time", _ts),
+        ("team_a_id", pa.int64()), ("team_a", pa.string()), ("team_b_id", pa.int64()), ("team_b", pa.string()),
+        ("score_a", pa.int32()), ("score_b", pa.int32()), ("status", pa.string()),
+        ("created_at", _ts), ("updated_at", _ts),
+    ]), _matches),
+    "spirit_scores": (pa.schema([
+        ("id", pa.int64()), ("match_id", pa.int64()), ("tournament_id", pa.int64()),
+        ("from_team_id", pa.int64()), ("to_team_id", pa.int64()),
+        ("rules_knowledge", pa.int8()), ("fouls_body_contact", pa.int8()), ("fair_mindedness", pa.int8()),
+        ("positive_attitude", pa.int8()), ("communication", pa.int8()), ("total", pa.int16()),
+        ("comments", pa.string()), ("submitted_by", pa.int64()), ("created_at", _ts),
+    ]), _spirit_scores),
+    "attendance": (pa.schema([
+        ("id", pa.int64()), ("participant_id", pa.int64()), ("session_id", pa.int64()), ("tournament_id", pa.int64()),
+        ("date", pa.date32()), ("present", pa.bool_()), ("marked_by", pa.int64()), ("notes", pa.string()),
+        ("created_at", _ts_tz), ("updated_at", _ts_tz),
+    ]), _attendance),
+    "lsas_assessments": (pa.schema([
+        ("id", pa.int64()), ("participant_id", pa.int64()), ("assessor_id", pa.int64()), ("date", pa.date32()),
+        ("scores_json", pa.string()), ("total_score", pa.float64()), ("notes", pa.string()),
+        ("created_at", _ts_tz), ("updated_at", _ts_tz),
+    ]), _lsas_assessments),
+    "participants": (pa.schema([
+        ("id", pa.int64()), ("first_name", pa.string()), ("last_name", pa.string()), ("gender", pa.string()),
+        ("dob", pa.date32()), ("school", pa.string()), ("community", pa.string()),
+        ("current_status", pa.string()), ("participant_type", pa.string()),
+        ("coach_id", pa.int64()), ("user_id", pa.int64()), ("is_active", pa.bool_()),
+        ("created_at", _ts_tz), ("updated_at", _ts_tz),
+    ]), _participants),
+}
+
+
+class _ChunkSink:
+    """Write-only file object whose written bytes can be drained between batches."""
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _cell(value):
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, sort_keys=True, separators=(",", ":"))
+    return getattr(value, "value", value)  # enums -> plain strings
+
+
+def _record_batch(schema: pa.Schema, rows) -> pa.RecordBatch:
+    columns = list(zip(*rows))
+    # Only string columns can hold enums or JSON; the rest convert natively
+    arrays = [
+        pa.array([v if v is None or type(v) is str else _cell(v) for v in column], type=field.type)
+        if pa.types.is_string(field.type) else pa.array(column, type=field.type)
+        for column, field in zip(columns, schema)
+    ]
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def stream_columnar(dataset: str, export_format: str, tournament_id: int | None = None):
+    """
+    Yield a Parquet or Arrow IPC file for one dataset, flushing after each
+    row group. Uses its own session because it runs after the request handler returns.
+    """
+    schema, build_query = DATASETS[dataset]
+    sink = _ChunkSink()
+    if export_format == "parquet":
+        writer = pq.ParquetWriter(
+            pa.PythonFile(sink, mode="w"), schema,
+            compression="zstd", compression_level=3, use_dictionary=True,
+        )
+    else:
+        writer = pa.ipc.new_file(
+            pa.PythonFile(sink, mode="w"), schema,
+            options=pa.ipc.IpcWriteOptions(compression="zstd"),
+        )
+
+    db = SessionLocal()
+    try:
+        # Plain column tuples: run on the connection and skip ORM row processing
+        result = db.connection().execute(
+            build_query(tournament_id).execution_options(stream_results=True, yield_per=COLUMNAR_BATCH_ROWS)
+        )
+        for rows in result.partitions():
+            writer.write_batch(_record_batch(schema, rows))
+            yield sink.drain()
+        writer.close()
+        yield sink.drain()
+    finally:
+        db.close()
+
+
+DELTA_PAGE_SIZE = 5000  # rows per delta call; repeat with the returned watermark while has_more
+
+# dataset -> (table whose tombstones apply, indexed change column, id column, name of the change column in the dataset)
+DELTA_SOURCES = {
+    "matches": ("matches", Match.updated_at, Match.id, "updated_at"),
+    "spirit_scores": ("spirit_scores", SpiritScore.created_at, SpiritScore.id, "created_at"),
+    "attendance": ("attendances", ATTENDANCE_CHANGED_AT, Attendance.id, "updated_at"),
+    "lsas_assessments": ("lsas_assessments", LSAS_CHANGED_AT, LSASAssessment.id, "updated_at"),
+    "participants": ("participants", Participant.updated_at, Participant.id, "updated_at"),
+}
+
+
+def encode_watermark(cursor: list | None, started: datetime | None, tombstone_id: int) -> str:
+    raw = json.dumps({"c": cursor, "s": started.isoformat() if started else None, "d": tombstone_id})
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_watermark(watermark: str | None) -> tuple[list | None, str | None, int]:
+    """(cursor, start of the pass being paged, tombstone id). Raises ValueError for a malformed watermark."""
+    if not watermark:
+        return None, None, 0
+    data = json.loads(base64.urlsafe_b64decode(watermark.encode()))
+    if "t" in data:  # stamp-only watermark from before keyset paging
+        return ([data["t"], 0] if data["t"] else None), None, int(data["d"])
+    cursor = data["c"]
+    if cursor is not None:
+        datetime.fromisoformat(cursor[0])
+        cursor = [cursor[0], int(cursor[1])]
+    return cursor, data["s"], int(data["d"])
+
+
+def export_delta(db, dataset: str, tournament_id: int | None, watermark: str | None) -> dict:
+    """One page of rows changed after the watermark, tombstones for deleted rows and the next watermark."""
+    schema, build_query = DATASETS[dataset]
+    table_name, stamp_column, id_column, stamp_field = DELTA_SOURCES[dataset]
+    cursor, started, since_tombstone = decode_watermark(watermark)
+    started = pass_start(started)
+
+    # Read the tombstone high-water mark first so deletes racing this export land in the next delta
+    last_tombstone = db.scalar(select(func.max(DeletedRow.id))) or 0
+
+    query = after_cursor(build_query(tournament_id), stamp_column, id_column, cursor).limit(DELTA_PAGE_SIZE)
+    names = schema.names
+    rows = [dict(zip(names, (_cell(v) for v in row))) for row in db.execute(query)]
+
+    if rows:
+        cursor = [rows[-1][stamp_field].isoformat(), rows[-1]["id"]]
+    has_more = len(rows) == DELTA_PAGE_SIZE
+    if not has_more:
+        cursor = settle(cursor, started)
+
+    tombstones_query = select(DeletedRow.row_id, DeletedRow.deleted_at).where(
+        DeletedRow.table_name == table_name,
+        DeletedRow.id > since_tombstone,
+        DeletedRow.id <= last_tombstone,
+    ).order_by(DeletedRow.id)
+    if tournament_id is not None and dataset in ("matches", "spirit_scores", "attendance"):
+        tombstones_query = tombstones_query.where(DeletedRow.tournament_id == tournament_id)
+    tombstones = [{"id": row_id, "deleted_at": deleted_at} for row_id, deleted_at in db.execute(tombstones_query)]
+
+    return {
+        "dataset": dataset,
+        "rows": rows,
+        "tombstones": tombstones,
+        "has_more": has_more,
+        "watermark": encode_watermark(cursor, started if has_more else None, max(last_tombstone, since_tombstone)),
+    }
@@ -0,0 +1,205 @@
+"""
+Background export jobs with cached, versioned artifacts.
+
+A job is identified by what it exports (scope, dataset, format) plus a
+fingerprint of the underlying data (row counts, max ids and max timestamps
+of every table the export reads). Submitting the same export against
+unchanged data therefore resolves to the same job id and the artifact already
+on disk is served immediately. Job state lives next to the artifact in
+settings.EXPORT_DIR, so every worker process sees the same jobs.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import cache
+from pathlib import Path
+from sqlalchemy import select, func
+from loguru import logger
+from app.core.config import settings
+from app.models.tournament import Tournament
+from app.models.match import Match
+from app.models.team import Team
+from app.models.team_member import TeamMember
+from app.models.spirit_score import SpiritScore
+from app.models.attendance import Attendance
+from app.models.lsas_assessment import LSASAssessment
+from app.models.participant import Participant
+from app.core.export_formats import ATTENDANCE_CHANGED_AT, LSAS_CHANGED_AT, COLUMNAR_FORMATS, stream_columnar, stream_export_csv
+
+EXPORT_JOB_TIMEOUT_SECONDS = 3600  # a queued/running job older than this is presumed dead
+
+_running: set[str] = set()  # job ids rendering in this process
+_submit_lock = threading.Lock()
+
+
+@cache
+def _export_dir() -> Path:
+    path = Path(settings.EXPORT_DIR)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+@cache
+def _executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=settings.EXPORT_WORKERS, thread_name_prefix="export")
+
+
+def _table_state(db, model, stamp_column, *criteria, join=None) -> list:
+    query = select(func.count(model.id), func.max(model.id), func.max(stamp_column))
+    if join is not None:
+        query = query.select_from(model).join(*join)
+    count, max_id, max_stamp = db.execute(query.where(*criteria)).one()
+    return [count, max_id, max_stamp.isoformat() if max_stamp else None]
+
+
+def data_fingerprint(db, dataset: str, tournament_id: int | None) -> str:
+    """Hash the version markers of every table an export reads."""
+    def in_tournament(column) -> tuple:
+        return (column == tournament_id,) if tournament_id is not None else ()
+
+    spirit_join = (Match, Match.id == SpiritScore.match_id)
+    roster_join = (Team, Team.id == TeamMember.team_id)
+
+    if dataset in ("matches", "spirit_scores"):
+        state = [
+            _table_state(db, Tournament, Tournament.updated_at, *in_tournament(Tournament.id)),
+            _table_state(db, Team, func.coalesce(Team.updated_at, Team.created_at), *in_tournament(Team.tournament_id)),
+            _table_state(db, Match, Match.updated_at, *in_tournament(Match.tournament_id)),
+            _table_state(db, SpiritScore, SpiritScore.created_at, *in_tournament(Match.tournament_id), join=spirit_join),
+        ]
+    elif dataset == "attendance":
+        state = [_table_state(db, Attendance, ATTENDANCE_CHANGED_AT, *in_tournament(Attendance.tournament_id))]
+    else:
+        model, stamp = (LSASAssessment, LSAS_CHANGED_AT) if dataset == "lsas_assessments" else (Participant, Participant.updated_at)
+        state = [
+            _table_state(db, model, stamp),
+            _table_state(db, TeamMember, TeamMember.updated_at, *in_tournament(Team.tournament_id), join=roster_join),
+        ]
+    return hashlib.sha256(json.dumps(state, default=str).encode()).hexdigest()
+
+
+def _paths(job_id: str) -> tuple[Path, Path]:
+    return _export_dir() / f"{job_id}.json", _export_dir() / f"{job_id}.part"
+
+
+def _write_meta(job_id: str, meta: dict):
+    meta_path, _ = _paths(job_id)
+    tmp = meta_path.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(meta))
+    tmp.replace(meta_path)
+
+
+def get_job(job_id: str) -> dict | None:
+    if not job_id or not all(c in "0123456789abcdef" for c in job_id):
+        return None
+    meta_path, _ = _paths(job_id)
+    if not meta_path.exists():
+        return None
+    try:
+        return json.loads(meta_path.read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def artifact_path(job: dict) -> Path:
+    return _export_dir() / job["artifact"]
+
+
+def _render(job_id: str, meta: dict):
+    _, part_path = _paths(job_id)
+    meta.update(status="running", started_at=time.time())
+    _write_meta(job_id, meta)
+    try:
+        if meta["format"] == "csv":
+            chunks = (chunk.encode("utf-8") for chunk in stream_export_csv(meta["tournament_id"]))
+        else:
+            chunks = stream_columnar(meta["dataset"], meta["format"], meta["tournament_id"])
+        with part_path.open("wb") as f:
+            for chunk in chunks:
+                f.write(chunk)
+        part_path.replace(artifact_path(meta))
+        meta.update(status="completed", finished_at=time.time(), size=artifact_path(meta).stat().st_size)
+        logger.success(f"Export job {job_id} completed ({meta['size']} bytes)")
+    except Exception as e:
+        part_path.unlink(missing_ok=True)
+        meta.update(status="failed", finished_at=time.time(), error=str(e))
+        logger.error(f"Export job {job_id} failed: {e}")
+    finally:
+        _write_meta(job_id, meta)
+        _running.discard(job_id)
+        evict_artifacts()
+
+
+def submit_job(db, export_format: str, dataset: str, tournament_id: int | None) -> dict:
+    """Return the job for this export at the current data version, starting it if needed."""
+    fingerprint = data_fingerprint(db, dataset, tournament_id)
+    scope = f"tournament_{tournament_id}" if tournament_id is not None else "all_tournaments"
+    job_id = hashlib.sha256(f"{scope}|{dataset}|{export_format}|{fingerprint}".encode()).hexdigest()[:32]
+
+    with _submit_lock:
+        job = get_job(job_id)
+        if job and (job["status"] == "completed" and artifact_path(job).exists() or job_id in _running):
+            return job
+        if job and job["status"] in ("queued", "running") and time.time() - job["submitted_at"] < EXPORT_JOB_TIMEOUT_SECONDS:
+            return job  # owned by another worker process
+        return _enqueue(job_id, fingerprint, scope, export_format, dataset, tournament_id)
+
+
+def _enqueue(job_id: str, fingerprint: str, scope: str, export_format: str, dataset: str, tournament_id: int | None) -> dict:
+    extension = "csv" if export_format == "csv" else COLUMNAR_FORMATS[export_format][1]
+    suffix = "" if dataset == "matches" else f"_{dataset}"
+    meta = {
+        "job_id": job_id,
+        "status": "queued",
+        "scope": scope,
+        "tournament_id": tournament_id,
+        "dataset": dataset,
+        "format": export_format,
+        "fingerprint": fingerprint,
+        "artifact": f"{job_id}.{extension}",
+        "filename": f"{scope}_export{suffix}.{extension}",
+        "submitted_at": time.time(),
+    }
+    _write_meta(job_id, meta)
+    # Registered before submitting (we hold _submit_lock), so a fast render cannot finish first and leave it behind
+    _running.add(job_id)
+    _executor().submit(_render, job_id, dict(meta))
+    logger.info(f"Export job {job_id} queued ({scope}, {dataset}, {export_format})")
+    return meta
+
+
+def touch_artifact(job: dict):
+    """Mark an artifact as recently used so size-based eviction keeps it."""
+    now = time.time()
+    for path in (artifact_path(job), _paths(job["job_id"])[0]):
+        try:
+            os.utime(path, (now, now))
+        except OSError:
+            pass
+
+
+def evict_artifacts():
+    """Drop artifacts older than EXPORT_MAX_AGE_SECONDS, then least recently used ones above EXPORT_MAX_BYTES (see settings)."""
+    now = time.time()
+    jobs = []
+    for meta_path in _export_dir().glob("*.json"):
+        job = get_job(meta_path.stem)
+        if not job or job["status"] in ("queued", "running") or meta_path.stem in _running:
+            continue
+        path = artifact_path(job)
+        size = path.stat().st_size if path.exists() else 0
+        jobs.append((meta_path.stat().st_mtime, size, meta_path, path))
+
+    jobs.sort()
+    total = sum(size for _, size, _, _ in jobs)
+    for mtime, size, meta_path, path in jobs:
+        if now - mtime <= settings.EXPORT_MAX_AGE_SECONDS and total <= settings.EXPORT_MAX_BYTES:
+            break
+        path.unlink(missing_ok=True)
+        meta_path.unlink(missing_ok=True)
+        total -= size
+        logger.info(f"Evicted export artifact {meta_path.stem}")
@@ -0,0 +1,124 @@
+from sqlalchemy import func, case, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.team import Team
+from app.models.match import Match, MatchStatus
+from app.models.spirit_score import SpiritScore
+
+
+def _team_results(tournament_id: int):
+    """One row per (team, completed match) with goals from that team's point of view."""
+    completed = (Match.tournament_id == tournament_id, Match.status == MatchStatus.completed)
+    sides = union_all(
+        select(
+            Match.team_a_id.label("team_id"),
+            func.coalesce(Match.score_a, 0).label("gf"),
+            func.coalesce(Match.score_b, 0).label("ga"),
+        ).where(*completed),
+        select(
+            Match.team_b_id.label("team_id"),
+            func.coalesce(Match.score_b, 0).label("gf"),
+            func.coalesce(Match.score_a, 0).label("ga"),
+        ).where(*completed),
+    ).subquery("sides")
+
+    return (
+        select(
+            sides.c.team_id,
+            func.count().label("matches_played"),
+            func.sum(case((sides.c.gf > sides.c.ga, 1), else_=0)).label("wins"),
+            func.sum(case((sides.c.gf < sides.c.ga, 1), else_=0)).label("losses"),
+            func.sum(case((sides.c.gf == sides.c.ga, 1), else_=0)).label("draws"),
+            func.sum(sides.c.gf).label("goals_for"),
+            func.sum(sides.c.ga).label("goals_against"),
+        )
+        .group_by(sides.c.team_id)
+        .subquery("results")
+    )
+
+
+def _team_spirit(tournament_id: int):
+    """Spirit totals received by each team of the tournament."""
+    return (
+        select(
+            SpiritScore.to_team_id.label("team_id"),
+            func.sum(SpiritScore.total).label("spirit_sum"),
+            func.count(SpiritScore.total).label("spirit_count")  # like avg(), rows without a total do not count,
+        )
+        .join(Team, Team.id == SpiritScore.to_team_id)
+        .where(Team.tournament_id == tournament_id)
+        .group_by(SpiritScore.to_team_id)
+        .subquery("spirit")
+    )
+
+
+def build_standing(stats: dict) -> dict:
+    """Turn raw per-team counters into a leaderboard entry (without rank)."""
+    wins, draws = int(stats["wins"]), int(stats["draws"])
+    goals_for, goals_against = int(stats["goals_for"]), int(stats["goals_against"])
+    spirit_count = int(stats["spirit_count"])
+    spirit_avg = int(stats["spirit_sum"]) / spirit_count if spirit_count else 0.0
+    return {
+        "team_id": int(stats["team_id"]),
+        "team_name": stats["team_name"],
+        "matches_played": int(stats["matches_played"]),
+        "wins": wins,
+        "losses": int(stats["losses"]),
+        "draws": draws,
+        "points": wins * 3 + draws,
+        "goals_for": goals_for,
+        "goals_against": goals_against,
+        "goal_diff": goals_for - goals_against,
+        "spirit_avg": round(float(spirit_avg), 2),
+    }
+
+
+def rank_leaderboard(leaderboard: list[dict]) -> list[dict]:
+    """Sort teams by points, goal difference, then spirit average and assign ranks."""
+    leaderboard.sort(key=lambda x: (x["points"], x["goal_diff"], x["spirit_avg"]), reverse=True)
+    for i, team in enumerate(leaderboard, start=1):
+        team["rank"] = i
+    return leaderboard
+
+
+def team_stats_query(tournament_id: int):
+    """
+    Aggregate raw counters for every team of a tournament in a single query.
+    Match results and spirit totals are grouped in SQL and joined onto the
+    team list, so the number of round trips does not grow with the team count.
+    Teams are returned in id order.
+    """
+    results = _team_results(tournament_id)
+    spirit = _team_spirit(tournament_id)
+
+    return (
+        select(
+            Team.id.label("team_id"),
+            Team.name.label("team_name"),
+            func.coalesce(results.c.matches_played, 0).label("matches_played"),
+            func.coalesce(results.c.wins, 0).label("wins"),
+            func.coalesce(results.c.losses, 0).label("losses"),
+            func.coalesce(results.c.draws, 0).label("draws"),
+            func.coalesce(results.c.goals_for, 0).label("goals_for"),
+            func.coalesce(results.c.goals_against, 0).label("goals_against"),
+            func.coalesce(spirit.c.spirit_sum, 0).label("spirit_sum"),
+            func.coalesce(spirit.c.spirit_count, 0).label("spirit_count"),
+        )
+        .outerjoin(results, results.c.team_id == Team.id)
+        .outerjoin(spirit, spirit.c.team_id == Team.id)
+        .where(Team.tournament_id == tournament_id)
+        .order_by(Team.id)
+    )
+
+
+async def fetch_team_stats(db: AsyncSession, tournament_id: int) -> list[dict]:
+    result = await db.execute(team_stats_query(tournament_id))
+    return [dict(row) for row in result.mappings().all()]
+
+
+async def compute_leaderboard(db: AsyncSession, tournament_id: int) -> list[dict]:
+    """
+    Compute ranked standings for a tournament straight from the database.
+    Returns an empty list when the tournament has no teams.
+    """
+    stats = await fetch_team_stats(db, tournament_id)
+    return rank_leaderboard([build_standing(s) for s in stats])
@@ -0,0 +1,435 @@
+"""
+Incrementally maintained tournament leaderboards in Redis.
+
+Layout per tournament:
+    leaderboard:{tid}:ranking       sorted set, member = zero-padded team id
+    leaderboard:{tid}:team:{team}   hash of raw counters (wins, goals_for, spirit_sum, ...)
+    leaderboard:{tid}:matches       match id -> snapshot of what that match currently contributes
+    leaderboard:{tid}:spirit        ids of the spirit scores included in the counters
+    leaderboard:{tid}:built         marker set by a full rebuild, expires after LEADERBOARD_TTL
+    leaderboard:{tid}:version       bumped by every write, whether or not it was applied
+
+Writes go through Lua scripts and are idempotent: a match change carries the
+match's score_version and only applies against an older stored snapshot, and
+a spirit score is counted once per id. So a late or duplicated write can
+never be counted twice, whatever order concurrent requests reach Redis in.
+
+Writes are ignored while the built marker is missing; the next read then
+rebuilds the tournament from one REPEATABLE READ snapshot of the database.
+The rebuild only marks the result as built if the version did not move while
+it was reading, otherwise a write it could not see would be lost.
+Recovery and verification are available from the command line:
+
+    python -m app.core.leaderboard_cache rebuild [tournament_id ...]
+    python -m app.core.leaderboard_cache check [tournament_id ...]
+"""
+
+import asyncio
+import math
+import sys
+from redis.exceptions import WatchError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from loguru import logger
+from app.core.redis import redis_client
+from app.core.metrics import record_cache
+from app.core.leaderboard import build_standing, rank_leaderboard, compute_leaderboard, fetch_team_stats
+from app.db.session import AsyncSessionLocal
+from app.models.match import Match
+from app.models.spirit_score import SpiritScore
+from app.models.team import Team
+
+LEADERBOARD_RANKING_KEY = "leaderboard:{}:ranking"
+LEADERBOARD_TEAM_KEY = "leaderboard:{}:team:{}"
+LEADERBOARD_MATCHES_KEY = "leaderboard:{}:matches"
+LEADERBOARD_SPIRIT_KEY = "leaderboard:{}:spirit"
+LEADERBOARD_READY_KEY = "leaderboard:{}:built"
+LEADERBOARD_VERSION_KEY = "leaderboard:{}:version"
+LEADERBOARD_TTL = 3600  # full rebuild at least hourly
+DELETED_VERSION = 2 ** 53 - 1  # a deleted match's snapshot outranks every score_version
+
+STAT_FIELDS = (
+    "matches_played", "wins", "losses", "draws",
+    "goals_for", "goals_against", "spirit_sum", "spirit_count",
+)
+
+# Shared by the scripts below: recompute a team's ranking score from its hash
+_RANK_LUA = """
+local function rank(ranking, team_key, member)
+    local s = redis.call('HMGET', team_key, 'wins', 'draws', 'goals_for', 'goals_against', 'spirit_sum', 'spirit_count')
+    local wins, draws = tonumber(s[1]) or 0, tonumber(s[2]) or 0
+    local goal_diff = (tonumber(s[3]) or 0) - (tonumber(s[4]) or 0)
+    local spirit_sum, spirit_count = tonumber(s[5]) or 0, tonumber(s[6]) or 0
+    local spirit = 0
+    if spirit_count > 0 then
+        spirit = math.floor(spirit_sum / spirit_count * 100 + 0.5)
+    end
+    local score = -((wins * 3 + draws) * 1e10 + (goal_diff + 500000) * 1e4 + spirit)
+    redis.call('ZADD', ranking, score, member)
+end
+"""
+
+# KEYS: built marker, version, matches hash, ranking
+# ARGV: team key prefix, match id, snapshot "version,status,team_a,team_b,score_a,score_b"
+# Team keys are derived from the prefix (the deployment uses a single Redis, not a cluster).
+_APPLY_MATCH_LUA = _RANK_LUA + """
+redis.call('INCR', KEYS[2])
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+local function parse(snapshot)
+    local v = {}
+    if not snapshot then
+        return v
+    end
+    for part in string.gmatch(snapshot .. ',', '([^,]*),') do
+        v[#v + 1] = part
+    end
+    return v
+end
+local old = parse(redis.call('HGET', KEYS[3], ARGV[2]))
+local new = parse(ARGV[3])
+if old[1] and tonumber(old[1]) >= tonumber(new[1]) then
+    return 0
+end
+local touched = {}
+local function side(sign, team, gf, ga)
+    if team == nil or team == '' then
+        return
+    end
+    local key = ARGV[1] .. team
+    if redis.call('EXISTS', key) == 0 then
+        return
+    end
+    redis.call('HINCRBY', key, 'matches_played', sign)
+    redis.call('HINCRBY', key, 'goals_for', sign * gf)
+    redis.call('HINCRBY', key, 'goals_against', sign * ga)
+    local result = 'draws'
+    if gf > ga then
+        result = 'wins'
+    elseif gf < ga then
+        result = 'losses'
+    end
+    redis.call('HINCRBY', key, result, sign)
+    touched[team] = key
+end
+local function contribute(sign, v)
+    if v[2] ~= 'completed' then
+        return
+    end
+    local a, b = tonumber(v[5]) or 0, tonumber(v[6]) or 0
+    side(sign, v[3], a, b)
+    side(sign, v[4], b, a)
+end
+contribute(-1, old)
+contribute(1, new)
+redis.call('HSET', KEYS[3], ARGV[2], ARGV[3])
+for team, key in pairs(touched) do
+    rank(KEYS[4], key, string.format('%010d', tonumber(team)))
+end
+return 1
+"""
+
+# KEYS: built marker, version, team hash, ranking, spirit id set
+# ARGV: member, spirit score id, sign (1 = received, -1 = deleted), total ('' when missing: not averaged)
+_APPLY_SPIRIT_LUA = _RANK_LUA + """
+redis.call('INCR', KEYS[2])
+if redis.call('EXISTS', KEYS[1]) == 0 or redis.call('EXISTS', KEYS[3]) == 0 then
+    return 0
+end
+local sign = tonumber(ARGV[3])
+if sign > 0 then
+    if redis.call('SADD', KEYS[5], ARGV[2]) == 0 then
+        return 0
+    end
+elseif redis.call('SREM', KEYS[5], ARGV[2]) == 0 then
+    return 0
+end
+if ARGV[4] ~= '' then
+    redis.call('HINCRBY', KEYS[3], 'spirit_sum', sign * tonumber(ARGV[4]))
+    redis.call('HINCRBY', KEYS[3], 'spirit_count', sign)
+end
+rank(KEYS[4], KEYS[3], ARGV[1])
+return 1
+"""
+
+# KEYS: built marker, version, team hash, ranking
+# ARGV: member, team name
+_ADD_TEAM_LUA = _RANK_LUA + """
+redis.call('INCR', KEYS[2])
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+redis.call('HSET', KEYS[3], 'team_name', ARGV[2])
+rank(KEYS[4], KEYS[3], ARGV[1])
+return 1
+"""
+
+_apply_match = redis_client.register_script(_APPLY_MATCH_LUA)
+_apply_spirit = redis_client.register_script(_APPLY_SPIRIT_LUA)
+_add_team = redis_client.register_script(_ADD_TEAM_LUA)
+
+
+def _member(team_id: int) -> str:
+    # Zero padding keeps ties in ascending team id order, like the DB ranking
+    return f"{team_id:010d}"
+
+
+def _ranking_score(stats: dict) -> float:
+    """Python twin of the Lua score: ascending order == best team first."""
+    standing = build_standing(stats)
+    spirit_count = int(stats["spirit_count"])
+    spirit = math.floor(int(stats["spirit_sum"]) / spirit_count * 100 + 0.5) if spirit_count else 0
+    return -(standing["points"] * 1e10 + (standing["goal_diff"] + 500000) * 1e4 + spirit)
+
+
+def _encode_snapshot(version, status, team_a_id, team_b_id, score_a, score_b) -> str:
+    status = getattr(status, "value", status)
+    return ",".join(str(v) for v in (version or 0, status, team_a_id or "", team_b_id or "", score_a or 0, score_b or 0))
+
+
+def match_snapshot(match) -> str:
+    """What a match contributes to standings, tagged with its score_version."""
+    return _encode_snapshot(match.score_version, match.status, match.team_a_id, match.team_b_id, match.score_a, match.score_b)
+
+
+def _common_keys(tournament_id: int) -> list[str]:
+    return [LEADERBOARD_READY_KEY.format(tournament_id), LEADERBOARD_VERSION_KEY.format(tournament_id)]
+
+
+async def _run_or_drop(tournament_id: int, script, keys: list[str], args: list):
+    try:
+        await script(keys=keys, args=args)
+    except Exception as e:
+        logger.warning(f"Failed to update leaderboard {tournament_id} in Redis: {e}")
+        await drop_leaderboard(tournament_id)
+
+
+async def apply_match_change(tournament_id: int, match_id: int, snapshot: str | None):
+    """Replace what a match contributes with a new snapshot (None = the match was deleted)."""
+    if snapshot is None:
+        snapshot = _encode_snapshot(DELETED_VERSION, "deleted", None, None, 0, 0)
+    await _run_or_drop(
+        tournament_id,
+        _apply_match,
+        _common_keys(tournament_id) + [LEADERBOARD_MATCHES_KEY.format(tournament_id), LEADERBOARD_RANKING_KEY.format(tournament_id)],
+        [LEADERBOARD_TEAM_KEY.format(tournament_id, ""), match_id, snapshot],
+    )
+
+
+async def apply_spirit_score(tournament_id: int, spirit_id: int, to_team_id: int, total: int | None, sign: int = 1):
+    """Count a received spirit score once (sign=-1 removes it). Teams outside the tournament are ignored."""
+    await _run_or_drop(
+        tournament_id,
+        _apply_spirit,
+        _common_keys(tournament_id) + [
+            LEADERBOARD_TEAM_KEY.format(tournament_id, to_team_id),
+            LEADERBOARD_RANKING_KEY.format(tournament_id),
+            LEADERBOARD_SPIRIT_KEY.format(tournament_id),
+        ],
+        [_member(to_team_id), spirit_id, sign, "" if total is None else total],
+    )
+
+
+async def add_team(tournament_id: int, team_id: int, team_name: str):
+    """Insert a newly registered team with empty counters."""
+    await _run_or_drop(
+        tournament_id,
+        _add_team,
+        _common_keys(tournament_id) + [LEADERBOARD_TEAM_KEY.format(tournament_id, team_id), LEADERBOARD_RANKING_KEY.format(tournament_id)],
+        [_member(team_id), team_name],
+    )
+
+
+async def drop_leaderboard(tournament_id: int):
+    """Forget the cached standings so the next read rebuilds them from the database."""
+    try:
+        ranking_key = LEADERBOARD_RANKING_KEY.format(tournament_id)
+        members = await redis_client.zrange(ranking_key, 0, -1)
+        keys = [LEADERBOARD_TEAM_KEY.format(tournament_id, int(m)) for m in members]
+        pipe = redis_client.pipeline(transaction=True)
+        pipe.incr(LEADERBOARD_VERSION_KEY.format(tournament_id))  # a rebuild in flight must not store what it read
+        pipe.delete(
+            LEADERBOARD_READY_KEY.format(tournament_id),
+            ranking_key,
+            LEADERBOARD_MATCHES_KEY.format(tournament_id),
+            LEADERBOARD_SPIRIT_KEY.format(tournament_id),
+            *keys,
+        )
+        await pipe.execute()
+        logger.info(f"Cache invalidated: tournament {tournament_id} leaderboard")
+    except Exception as e:
+        logger.warning(f"Failed to drop leaderboard {tournament_id} from Redis: {e}")
+
+
+async def _read_snapshot(tournament_id: int) -> tuple[list[dict], dict[str, str], list[int]]:
+    """Team counters, match snapshots and counted spirit ids, all from one consistent snapshot."""
+    async with AsyncSessionLocal() as db:
+        await db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+        stats = await fetch_team_stats(db, tournament_id)
+        matches = (await db.execute(
+            select(Match.id, Match.score_version, Match.status, Match.team_a_id, Match.team_b_id, Match.score_a, Match.score_b)
+            .where(Match.tournament_id == tournament_id)
+        )).all()
+        spirit_ids = (await db.scalars(
+            select(SpiritScore.id).join(Team, Team.id == SpiritScore.to_team_id).where(Team.tournament_id == tournament_id)
+        )).all()
+    return stats, {str(m.id): _encode_snapshot(*m[1:]) for m in matches}, list(spirit_ids)
+
+
+async def store_leaderboard(tournament_id: int, stats: list[dict], matches: dict[str, str], spirit_ids: list[int], version: str) -> bool:
+    """
+    Replace the cached standings with a rebuild read after `version` was
+    observed. Returns False (and leaves the board unbuilt) if any write
+    happened since, because the rebuild may not include it.
+    """
+    ranking_key = LEADERBOARD_RANKING_KEY.format(tournament_id)
+    version_key = LEADERBOARD_VERSION_KEY.format(tournament_id)
+    try:
+        async with redis_client.pipeline(transaction=True) as pipe:
+            await pipe.watch(version_key)
+            if (await pipe.get(version_key) or "0") != version:
+                return False
+            old_members = await pipe.zrange(ranking_key, 0, -1)
+
+            pipe.multi()
+            pipe.delete(
+                ranking_key,
+                LEADERBOARD_MATCHES_KEY.format(tournament_id),
+                LEADERBOARD_SPIRIT_KEY.format(tournament_id),
+                *[LEADERBOARD_TEAM_KEY.format(tournament_id, int(m)) for m in old_members],
+            )
+            for team in stats:
+                pipe.hset(
+                    LEADERBOARD_TEAM_KEY.format(tournament_id, team["team_id"]),
+                    mapping={"team_name": team["team_name"], **{f: int(team[f]) for f in STAT_FIELDS}},
+                )
+                pipe.zadd(ranking_key, {_member(team["team_id"]): _ranking_score(team)})
+            if matches:
+                pipe.hset(LEADERBOARD_MATCHES_KEY.format(tournament_id), mapping=matches)
+                pipe.expire(LEADERBOARD_MATCHES_KEY.format(tournament_id), LEADERBOARD_TTL)
+            if spirit_ids:
+                pipe.sadd(LEADERBOARD_SPIRIT_KEY.format(tournament_id), *spirit_ids)
+                pipe.expire(LEADERBOARD_SPIRIT_KEY.format(tournament_id), LEADERBOARD_TTL)
+            pipe.set(LEADERBOARD_READY_KEY.format(tournament_id), 1, ex=LEADERBOARD_TTL)
+            await pipe.execute()
+        return True
+    except WatchError:
+        return False
+    except Exception as e:
+        logger.warning(f"Failed to store leaderboard {tournament_id} in Redis: {e}")
+        return False
+
+
+async def read_leaderboard(tournament_id: int) -> list[dict] | None:
+    """Return ranked standings from Redis, or None when they are not cached."""
+    try:
+        pipe = redis_client.pipeline(transaction=True)
+        pipe.exists(LEADERBOARD_READY_KEY.format(tournament_id))
+        pipe.zrange(LEADERBOARD_RANKING_KEY.format(tournament_id), 0, -1)
+        ready, members = await pipe.execute()
+        if not ready:
+            return None
+
+        pipe = redis_client.pipeline(transaction=False)
+        for m in members:
+            pipe.hgetall(LEADERBOARD_TEAM_KEY.format(tournament_id, int(m)))
+        hashes = await pipe.execute()
+    except Exception as e:
+        logger.warning(f"Failed to read leaderboard {tournament_id} from Redis: {e}")
+        return None
+
+    leaderboard = []
+    for member, counters in zip(members, hashes):
+        stats = {f: 0 for f in STAT_FIELDS}
+        stats.update(counters)
+        stats.setdefault("team_name", "")
+        stats["team_id"] = int(member)
+        leaderboard.append(build_standing(stats))
+
+    # Already in ranking order; the stable sort only settles rounding ties exactly as the DB path does
+    return rank_leaderboard(leaderboard)
+
+
+async def rebuild_leaderboard(tournament_id: int) -> tuple[list[dict], bool]:
+    """Recompute a tournament from the database and try to store it. Returns (team stats, stored)."""
+    try:
+        version = await redis_client.get(LEADERBOARD_VERSION_KEY.format(tournament_id)) or "0"
+    except Exception as e:
+        logger.warning(f"Failed to read leaderboard {tournament_id} version: {e}")
+        version = None
+    stats, matches, spirit_ids = await _read_snapshot(tournament_id)
+    stored = version is not None and await store_leaderboard(tournament_id, stats, matches, spirit_ids, version)
+    return stats, stored
+
+
+async def get_leaderboard(tournament_id: int) -> list[dict]:
+    """Serve standings from Redis, rebuilding them from the database on a miss."""
+    leaderboard = await read_leaderboard(tournament_id)
+    record_cache("leaderboard", leaderboard is not None)
+    if leaderboard is not None:
+        return leaderboard
+
+    stats, _ = await rebuild_leaderboard(tournament_id)
+    return rank_leaderboard([build_standing(s) for s in stats])
+
+
+async def check_leaderboard(db: AsyncSession, tournament_id: int) -> list[str]:
+    """Compare cached standings against a full recompute and describe every difference."""
+    actual = await read_leaderboard(tournament_id)
+    expected = await compute_leaderboard(db, tournament_id)
+    if actual is None:
+        return [f"tournament {tournament_id}: not cached"]
+
+    problems = []
+    expected_by_team = {t["team_id"]: t for t in expected}
+    actual_by_team = {t["team_id"]: t for t in actual}
+    for team_id in sorted(expected_by_team.keys() | actual_by_team.keys()):
+        want, got = expected_by_team.get(team_id), actual_by_team.get(team_id)
+        if want is None or got is None:
+            problems.append(f"tournament {tournament_id}: team {team_id} {'missing' if got is None else 'unexpected'} in Redis")
+            continue
+        for field, value in want.items():
+            if got.get(field) != value:
+                problems.append(f"tournament {tournament_id}: team {team_id} {field} is {got.get(field)}, expected {value}")
+    return problems
+
+
+async def _run(command: str, tournament_ids: list[int]):
+    from app.db.session import async_engine
+    from app.models.tournament import Tournament
+
+    db = AsyncSessionLocal()
+    try:
+        if not tournament_ids:
+            tournament_ids = list((await db.scalars(select(Tournament.id).order_by(Tournament.id))).all())
+
+        failed = False
+        for tournament_id in tournament_ids:
+            if command == "rebuild":
+                stats, stored = await rebuild_leaderboard(tournament_id)
+                if stored:
+                    print(f"✅ Rebuilt leaderboard for tournament {tournament_id} ({len(stats)} teams)")
+                else:
+                    print(f"❌ Leaderboard for tournament {tournament_id} changed during the rebuild, run it again")
+                    failed = True
+            else:
+                problems = await check_leaderboard(db, tournament_id)
+                for problem in problems:
+                    print(f"❌ {problem}")
+                if problems:
+                    failed = True
+                else:
+                    print(f"✅ Leaderboard for tournament {tournament_id} is consistent")
+        return 1 if failed else 0
+    finally:
+        await db.close()
+        await async_engine.dispose()
+        await redis_client.aclose()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in ("rebuild", "check"):
+        print("Usage: python -m app.core.leaderboard_cache {rebuild|check} [tournament_id ...]")
+        sys.exit(2)
+    sys.exit(asyncio.run(_run(sys.argv[1], [int(a) for a in sys.argv[2:]])))
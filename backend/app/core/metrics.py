@@ -0,0 +1,59 @@
+"""
+Prometheus metrics, exposed at /metrics.
+
+Each hot-path update is one labelled observe/inc (about a microsecond). Pool
+gauges are read only when the endpoint is scraped. Route labels use the route
+template (/matches/{match_id}), never the raw path, so their number stays bounded.
+"""
+
+from prometheus_client import Counter, Gauge, Histogram
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ("method", "route", "status"),
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+DB_QUERY_SECONDS = Histogram(
+    "db_query_duration_seconds",
+    "SQL statement execution time",
+    ("engine",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1),
+)
+DB_POOL_CHECKED_OUT = Gauge("db_pool_checked_out", "Connections currently checked out of the pool", ("engine",))
+DB_POOL_SIZE = Gauge("db_pool_size", "Configured pool size", ("engine",))
+DB_POOL_OVERFLOW = Gauge("db_pool_overflow", "Connections open beyond the pool size", ("engine",))
+REDIS_COMMAND_SECONDS = Histogram(
+    "redis_command_duration_seconds",
+    "Redis round-trip time by command (pipelines as PIPELINE)",
+    ("command",),
+    buckets=(0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5),
+)
+CACHE_REQUESTS = Counter("cache_requests_total", "Cache lookups by cache and result", ("cache", "result"))
+RATE_LIMIT_DECISIONS = Counter("rate_limit_decisions_total", "Rate limiter decisions", ("limiter", "result"))
+RATE_LIMIT_LOAD_FACTOR = Gauge("rate_limit_load_factor", "Share of adaptive rate limit budgets currently granted (1 = DB healthy)")
+RATE_LIMIT_SYNC_ERRORS = Counter("rate_limit_sync_errors_total", "Failed reconciliations of local rate limit buckets with Redis")
+PASSWORD_HASH_PENDING = Gauge("password_hash_pending", "Password hash/verify calls queued or running in the worker pool")
+PASSWORD_HASH_SECONDS = Histogram(
+    "password_hash_duration_seconds",
+    "Password hash/verify time including queueing",
+    ("operation",),
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+WEBSOCKET_CONNECTIONS = Gauge("websocket_connections", "Open WebSocket connections by channel kind", ("kind",))
+
+
+def route_label(scope: dict) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+def record_cache(cache: str, hit: bool):
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def instrument_pool(name: str, pool):
+    """Expose a SQLAlchemy QueuePool's occupancy; evaluated at scrape time."""
+    for gauge, attribute in ((DB_POOL_CHECKED_OUT, "checkedout"), (DB_POOL_SIZE, "size"), (DB_POOL_OVERFLOW, "overflow")):
+        if hasattr(pool, attribute):
+            gauge.labels(name).set_function(getattr(pool, attribute))
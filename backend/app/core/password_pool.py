@@ -0,0 +1,68 @@
+"""
+Password hashing off the event loop and off the request threadpool.
+
+bcrypt runs in a small process pool (PASSWORD_HASH_WORKERS), so a burst of
+logins neither holds the GIL nor starves the threadpool that serves every
+sync endpoint. At most PASSWORD_HASH_MAX_PENDING calls may be queued or
+running; beyond that callers get a 503 instead of waiting indefinitely.
+"""
+
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from fastapi import HTTPException, status
+from loguru import logger
+from app.core.config import settings
+from app.core.metrics import PASSWORD_HASH_PENDING, PASSWORD_HASH_SECONDS
+from app.core.security import hash_password, verify_and_update_password
+
+_executor: ProcessPoolExecutor | None = None
+_pending = 0
+
+
+def _pool() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        # spawn: workers import only app.core.security, never a copy of the running server
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.PASSWORD_HASH_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        logger.info(f"Password hashing pool started with {settings.PASSWORD_HASH_WORKERS} workers")
+    return _executor
+
+
+async def _run(operation: str, fn, *args):
+    global _pending
+    if _pending >= settings.PASSWORD_HASH_MAX_PENDING:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many sign-ins in progress, please retry",
+            headers={"Retry-After": "1"},
+        )
+    _pending += 1
+    PASSWORD_HASH_PENDING.inc()
+    started = time.perf_counter()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_pool(), fn, *args)
+    finally:
+        _pending -= 1
+        PASSWORD_HASH_PENDING.dec()
+        PASSWORD_HASH_SECONDS.labels(operation).observe(time.perf_counter() - started)
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run("hash", hash_password, password)
+
+
+async def verify_password_async(password: str, hashed_password: str) -> tuple[bool, str | None]:
+    """(valid, new hash if the stored one should be upgraded)."""
+    return await _run("verify", verify_and_update_password, password, hashed_password)
+
+
+def shutdown_pool():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
@@ -0,0 +1,139 @@
+"""
+Per-process Redis pub/sub fan-out for WebSocket endpoints.
+
+A single pubsub connection pattern-subscribes to every live channel and
+dispatches each message to the in-memory queues of the sockets listening on
+that channel, so spectators cost no Redis connections and messages are pushed
+as soon as they arrive.
+
+In-process listeners (cache invalidation) register a callback with listen().
+They are also called with None after every (re)connect, since messages
+published while the hub was disconnected are lost.
+"""
+
+import asyncio
+from collections import defaultdict
+from typing import Callable
+from fastapi import WebSocket
+from loguru import logger
+from app.core.redis import redis_client
+from app.core.metrics import WEBSOCKET_CONNECTIONS
+
+HUB_PATTERNS = ("live:*", "notify:*", "auth:*")
+SUBSCRIBER_QUEUE_SIZE = 64  # per socket; oldest messages are dropped for slow consumers
+RECONNECT_MAX_DELAY = 30
+
+
+class PubSubHub:
+    def __init__(self, patterns: tuple[str, ...] = HUB_PATTERNS):
+        self.patterns = patterns
+        self._subscribers: dict[str, set[asyncio.Queue]] = defaultdict(set)
+        self._listeners: dict[str, list[Callable[[str | None], None]]] = defaultdict(list)
+        self._task: asyncio.Task | None = None
+
+    @property
+    def connection_count(self) -> int:
+        return sum(len(queues) for queues in self._subscribers.values())
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def subscribe(self, channel: str) -> asyncio.Queue:
+        self.start()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self._subscribers[channel].add(queue)
+        return queue
+
+    def unsubscribe(self, channel: str, queue: asyncio.Queue):
+        queues = self._subscribers.get(channel)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self._subscribers[channel]
+
+    def listen(self, channel: str, callback: Callable[[str | None], None]):
+        """Call callback(data) for every message on channel, and callback(None) after reconnects."""
+        self._listeners[channel].append(callback)
+
+    def _notify(self, channel: str, data: str | None):
+        for callback in self._listeners.get(channel, ()):
+            try:
+                callback(data)
+            except Exception as e:
+                logger.warning(f"Pub/sub listener for {channel} failed: {e}")
+
+    def dispatch(self, channel: str, data: str):
+        self._notify(channel, data)
+        for queue in self._subscribers.get(channel, ()):
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(data)
+
+    async def _listen(self):
+        delay = 1
+        while True:
+            pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.psubscribe(*self.patterns)
+                logger.info(f"Pub/sub hub listening on {', '.join(self.patterns)}")
+                for channel in list(self._listeners):
+                    self._notify(channel, None)
+                delay = 1
+                async for message in pubsub.listen():
+                    if message["type"] == "pmessage":
+                        self.dispatch(message["channel"], message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Pub/sub hub lost Redis connection: {e}; retrying in {delay}s")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, RECONNECT_MAX_DELAY)
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+
+hub = PubSubHub()
+
+
+async def relay(websocket: WebSocket, channel: str):
+    """Forward hub messages for a channel to an accepted socket until it disconnects."""
+    queue = hub.subscribe(channel)
+    connections = WEBSOCKET_CONNECTIONS.labels(channel.split(":", 1)[0])
+    connections.inc()
+
+    async def pump():
+        while True:
+            await websocket.send_text(await queue.get())
+
+    async def drain():
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+
+    # Whichever side ends first (client gone, or a failed send) ends the relay
+    sender = asyncio.create_task(pump())
+    receiver = asyncio.create_task(drain())
+    try:
+        done, _ = await asyncio.wait((sender, receiver), return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            if not task.cancelled() and task.exception() is not None:
+                logger.info(f"Stopped relaying {channel}: {task.exception()!r}")
+    finally:
+        sender.cancel()
+        receiver.cancel()
+        await asyncio.gather(sender, receiver, return_exceptions=True)
+        hub.unsubscribe(channel, queue)
+        connections.dec()
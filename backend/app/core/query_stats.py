@@ -0,0 +1,139 @@
+"""
+Per-request SQL statement counting.
+
+Engine events add every statement (sync and async engines) to the stats of
+the request that issued it: count, total DB time and how often each
+statement shape (the SQL text, parameters excluded) repeated. The same shape
+running many times in one request is the signature of an N+1 lazy load.
+Every statement, in a request or not, also feeds db_query_duration_seconds
+and the db_latency average that adaptive rate limits react to.
+
+Routes can declare a budget:
+
+    @router.get("/", dependencies=[Depends(query_budget(5))])
+
+Going over it is logged, or turned into a 500 when QUERY_BUDGET_MODE=raise
+(meant for CI). Tests can also measure directly:
+
+    with track_queries() as stats:
+        client.get("/matches/")
+    assert stats.count <= 5
+"""
+
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from sqlalchemy import event
+from loguru import logger
+from app.core.config import settings
+from app.core.metrics import DB_QUERY_SECONDS, instrument_pool
+from app.db.session import engine, async_engine
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    seconds: float = 0.0
+    shapes: Counter = field(default_factory=Counter)
+    budget: int | None = None
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        """Statement shapes that ran at least `threshold` times."""
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= threshold]
+
+    @property
+    def over_budget(self) -> bool:
+        return self.budget is not None and self.count > self.budget
+
+
+class LatencyTracker:
+    """
+    Exponentially weighted moving average of statement latency, in seconds.
+    It also decays towards zero with wall-clock time (halving every
+    `half_life` seconds), so one slow burst does not keep reporting an
+    overloaded database after traffic has stopped.
+    """
+
+    def __init__(self, alpha: float = 0.05, half_life: float = 5.0):
+        self.alpha = alpha
+        self.half_life = half_life
+        self._value = 0.0
+        self._updated = time.monotonic()
+
+    def _decayed(self, now: float) -> float:
+        return self._value * 0.5 ** ((now - self._updated) / self.half_life)
+
+    @property
+    def value(self) -> float:
+        return self._decayed(time.monotonic())
+
+    def observe(self, seconds: float):
+        now = time.monotonic()
+        value = self._decayed(now)
+        self._value = value + self.alpha * (seconds - value)
+        self._updated = now
+
+
+db_latency = LatencyTracker()
+_current: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+@contextmanager
+def track_queries():
+    """Collect the statements issued in this context (threadpool handlers included)."""
+    stats = QueryStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+def query_budget(max_queries: int):
+    """Route dependency declaring how many statements a request may issue."""
+    def declare():
+        stats = _current.get()
+        if stats is not None:
+            stats.budget = max_queries
+    return declare
+
+
+def report(stats: QueryStats, label: str) -> str | None:
+    """Log repeated shapes and budget overruns; returns an error message in raise mode."""
+    for shape, n in stats.repeated(settings.QUERY_REPEAT_THRESHOLD):
+        logger.warning(f"Possible N+1 in {label}: {n}x {' '.join(shape.split())[:160]}")
+    if stats.over_budget:
+        message = f"{label} issued {stats.count} queries, budget is {stats.budget}"
+        if settings.QUERY_BUDGET_MODE == "raise":
+            return message
+        if settings.QUERY_BUDGET_MODE == "warn":
+            logger.warning(message)
+    return None
+
+
+def _instrument(target, name: str):
+    """Time every statement on an engine; attribute it to the current request, if any."""
+    histogram = DB_QUERY_SECONDS.labels(name)
+    instrument_pool(name, target.pool)
+
+    def before(conn, cursor, statement, parameters, context, executemany):
+        context._query_started = time.perf_counter()
+
+    def after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context._query_started
+        histogram.observe(elapsed)
+        db_latency.observe(elapsed)
+        stats = _current.get()
+        if stats is not None:
+            stats.count += 1
+            stats.seconds += elapsed
+            stats.shapes[statement] += 1
+
+    event.listen(target, "before_cursor_execute", before)
+    event.listen(target, "after_cursor_execute", after)
+
+
+_instrument(engine, "sync")
+_instrument(async_engine.sync_engine, "async")
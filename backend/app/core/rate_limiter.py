@@ -0,0 +1,228 @@
+"""
+Hybrid token-bucket rate limiting.
+
+Decisions are made in-process against a local token bucket, so a limited
+request costs no Redis round trip. A background task reconciles every active
+bucket with Redis every RATE_LIMIT_SYNC_SECONDS: one Lua script per bucket
+refills the shared bucket by Redis time, subtracts what this process spent
+since the last sync and returns the global balance, which becomes the new
+local balance. Processes can overshoot a limit by at most one sync interval
+of traffic; the overshoot is carried as debt and paid back by refill.
+
+When Redis is unreachable the buckets keep working locally (per process),
+and reconciliation resumes on its own once Redis answers again.
+
+AdaptiveRateLimiter adds a policy on top: budgets per signed-in user sized by
+role (anonymous callers by IP), route cost weights spent from one shared
+budget, and costs that grow when the average DB latency rises above
+RATE_LIMIT_DB_LATENCY_TARGET_MS, so limits tighten before Postgres saturates.
+"""
+
+import asyncio
+import math
+import time
+from dataclasses import dataclass, field
+from fastapi import HTTPException, Request, status
+from loguru import logger
+from app.core.config import settings
+from app.core.deps import decode_token
+from app.core.metrics import RATE_LIMIT_DECISIONS, RATE_LIMIT_SYNC_ERRORS, RATE_LIMIT_LOAD_FACTOR
+from app.core.query_stats import db_latency
+from app.core.redis import redis_client
+from app.core.revocation import revocations
+
+RATE_LIMIT_KEY = "ratelimit:{}"
+
+_SYNC_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local spent = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate) - spent
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 60)
+return tostring(tokens)
+"""
+_sync_script = redis_client.register_script(_SYNC_LUA)
+
+
+class TokenBucket:
+    __slots__ = ("capacity", "rate", "tokens", "updated", "spent")
+
+    def __init__(self, capacity: float, rate: float):
+        self.capacity = capacity
+        self.rate = rate  # tokens per second
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.spent = 0.0  # consumed locally since the last sync
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, cost: float) -> float:
+        """Spend cost tokens. Returns 0 when allowed, else the seconds until it would be."""
+        self._refill(time.monotonic())
+        if self.tokens >= cost:
+            self.tokens -= cost
+            self.spent += cost
+            return 0.0
+        return (cost - self.tokens) / self.rate
+
+    @property
+    def idle(self) -> bool:
+        self._refill(time.monotonic())
+        return self.spent == 0 and self.tokens >= self.capacity
+
+
+_buckets: dict[str, TokenBucket] = {}
+_redis_ok = True
+
+
+def bucket_for(key: str, capacity: float, rate: float) -> TokenBucket:
+    bucket = _buckets.get(key)
+    if bucket is None or bucket.capacity != capacity or bucket.rate != rate:
+        bucket = _buckets[key] = TokenBucket(capacity, rate)
+    return bucket
+
+
+async def sync_buckets():
+    """Reconcile every active bucket with Redis in one pipeline; forget idle ones."""
+    global _redis_ok
+    active = []
+    for key, bucket in list(_buckets.items()):
+        if bucket.idle:
+            del _buckets[key]
+        else:
+            active.append((key, bucket, bucket.spent))
+            bucket.spent = 0.0
+    if not active:
+        return
+
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        for key, bucket, spent in active:
+            await _sync_script(keys=[RATE_LIMIT_KEY.format(key)], args=[bucket.capacity, bucket.rate, spent], client=pipe)
+        balances = await pipe.execute()
+    except Exception as e:
+        RATE_LIMIT_SYNC_ERRORS.inc()
+        if _redis_ok:
+            logger.warning(f"Rate limit sync failed, enforcing limits per process: {e}")
+        _redis_ok = False
+        return
+
+    if not _redis_ok:
+        logger.info("Rate limit sync with Redis restored")
+    _redis_ok = True
+    now = time.monotonic()
+    for (key, bucket, _), balance in zip(active, balances):
+        # Requests that arrived while the pipeline was in flight are still in bucket.spent
+        bucket.tokens = float(balance) - bucket.spent
+        bucket.updated = now
+
+
+async def run_sync():
+    while True:
+        await asyncio.sleep(settings.RATE_LIMIT_SYNC_SECONDS)
+        try:
+            await sync_buckets()
+        except Exception as e:
+            logger.error(f"Rate limit sync loop error: {e}")
+
+
+def client_identity(request: Request) -> str:
+    forwarded = request.headers.get("X-Forwarded-For")
+    if forwarded:
+        return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+def load_factor() -> float:
+    """1.0 while the DB is healthy, shrinking towards RATE_LIMIT_MIN_LOAD_FACTOR as latency rises."""
+    target = settings.RATE_LIMIT_DB_LATENCY_TARGET_MS / 1000
+    if db_latency.value <= target:
+        return 1.0
+    return max(settings.RATE_LIMIT_MIN_LOAD_FACTOR, target / db_latency.value)
+
+
+RATE_LIMIT_LOAD_FACTOR.set_function(load_factor)
+
+
+async def _token_identity(request: Request) -> tuple[str, str] | None:
+    """(user key, role) from a valid, unrevoked bearer token, without touching the database."""
+    current = getattr(request.state, "current_user", None)  # already resolved by get_current_user
+    if current is not None:
+        return str(current.id), str(getattr(current.role, "value", current.role))
+    authorization = request.headers.get("Authorization", "")
+    if not authorization.lower().startswith("bearer "):
+        return None
+    try:
+        payload = decode_token(authorization[7:])
+    except HTTPException:
+        return None
+    if payload.get("jti") and await revocations.is_revoked(payload["jti"]):
+        return None
+    user = payload.get("uid") or payload.get("sub")
+    return (str(user), str(payload.get("role", ""))) if user else None
+
+
+def _limit(limiter: str, key: str, times: float, seconds: float, cost: float):
+    wait = bucket_for(key, times, times / seconds).take(min(cost, times))
+    if wait:
+        RATE_LIMIT_DECISIONS.labels(limiter, "denied").inc()
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Rate limit exceeded",
+            headers={"Retry-After": str(math.ceil(wait))},
+        )
+    RATE_LIMIT_DECISIONS.labels(limiter, "allowed").inc()
+
+
+class RateLimiter:
+    """Route dependency allowing `times` requests per `seconds` per client and route."""
+
+    def __init__(self, name: str, times: int, seconds: int):
+        self.name = name
+        self.times = times
+        self.seconds = seconds
+
+    async def __call__(self, request: Request):
+        route = getattr(request.scope.get("route"), "path", request.url.path)
+        _limit(self.name, f"{self.name}:{client_identity(request)}:{route}", self.times, self.seconds, 1)
+
+
+@dataclass(frozen=True)
+class RatePolicy:
+    """Budgets as (points, seconds): per role for signed-in users, otherwise per IP."""
+    anonymous: tuple[int, int]
+    authenticated: tuple[int, int]
+    roles: dict[str, tuple[int, int]] = field(default_factory=dict)
+
+
+class AdaptiveRateLimiter:
+    """
+    One budget per identity shared by every route using this limiter; each
+    route spends its weight from `costs` (route template -> points, default 1),
+    scaled up by 1 / load_factor() while the database is slow.
+    """
+
+    def __init__(self, name: str, policy: RatePolicy, costs: dict[str, float] | None = None):
+        self.name = name
+        self.policy = policy
+        self.costs = costs or {}
+
+    async def __call__(self, request: Request):
+        identity = await _token_identity(request)
+        if identity is None:
+            key = f"{self.name}:ip:{client_identity(request)}"
+            times, seconds = self.policy.anonymous
+        else:
+            user, role = identity
+            key = f"{self.name}:user:{user}"
+            times, seconds = self.policy.roles.get(role, self.policy.authenticated)
+        route = getattr(request.scope.get("route"), "path", request.url.path)
+        _limit(self.name, key, times, seconds, self.costs.get(route, 1) / load_factor())
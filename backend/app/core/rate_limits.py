@@ -13,7 +13,7 @@ Usage Example in router:
         ...
 """
 
-from fastapi_limiter.depends import RateLimiter
+from app.core.rate_limiter import RateLimiter, AdaptiveRateLimiter, RatePolicy
 
 
 # ============================================================================
@@ -22,26 +22,40 @@ from fastapi_limiter.depends import RateLimiter
 
 # Auth & Login endpoints - Strict limit to prevent brute force
 # 5 requests per minute
-auth_limiter = RateLimiter(times=5, seconds=60)
+auth_limiter = RateLimiter("auth", times=5, seconds=60)
 
 # Public/Anonymous endpoints - Light limit for general access
 # Examples: /health, /leaderboard, /analytics/overview, /media/gallery
 # 30 requests per minute
-public_limiter = RateLimiter(times=30, seconds=60)
+public_limiter = RateLimiter("public", times=30, seconds=60)
 
 # Frequent user actions - Moderate limit for authenticated users
-# Examples: /matches/{id}/score, /spirit/, /tournaments/{id}/teams/
+# Examples: /matches (create, delete), /tournaments/{id}/teams/
 # 20 requests per minute
-frequent_action_limiter = RateLimiter(times=20, seconds=60)
+frequent_action_limiter = RateLimiter("frequent_action", times=20, seconds=60)
 
 # Heavy/Resource-intensive queries - Strict limit
 # Examples: /export, /analytics/tournaments/{id}, large data exports
 # 3 requests per minute
-heavy_query_limiter = RateLimiter(times=3, seconds=60)
+heavy_query_limiter = RateLimiter("heavy_query", times=3, seconds=60)
 
 # Media upload - Moderate limit to prevent abuse
 # 10 requests per minute
-media_upload_limiter = RateLimiter(times=10, seconds=60)
+media_upload_limiter = RateLimiter("media_upload", times=10, seconds=60)
+
+# Live scoring hot path - Adaptive, per identity
+# Points per minute by role from the JWT (anonymous callers per IP); routes
+# spend their weight from one budget, and weights grow while the DB is slow.
+# A busy scorekeeper gets 180 score updates/min, an anonymous IP 10 spirit submissions/min
+scoring_limiter = AdaptiveRateLimiter(
+    "scoring",
+    RatePolicy(
+        anonymous=(30, 60),
+        authenticated=(60, 60),
+        roles={"scoring": (180, 60), "volunteer": (120, 60), "manager": (120, 60), "admin": (120, 60)},
+    ),
+    costs={"/matches/{match_id}/score": 1, "/spirit/": 3},
+)
 
 
 # ============================================================================
@@ -66,6 +80,7 @@ HOW TO APPLY RATE LIMITS TO YOUR ENDPOINTS:
    │ Frequent Actions      │ frequent_action_limiter │ 20 req/min     │
    │ Heavy Queries         │ heavy_query_limiter     │ 3 req/min      │
    │ Media Uploads         │ media_upload_limiter    │ 10 req/min     │
+   │ Live Scoring / Spirit │ scoring_limiter         │ adaptive       │
    │ Admin-only/Internal   │ NO LIMITER              │ Unlimited      │
    │ WebSockets            │ NO LIMITER              │ Unlimited      │
    └─────────────────────────────────────────────────────────────────┘
@@ -98,12 +113,12 @@ HOW TO APPLY RATE LIMITS TO YOUR ENDPOINTS:
 
    MATCH ROUTER (app/routers/match.py):
    ────────────────────────────────────────────────────────────────
-   from app.core.rate_limits import frequent_action_limiter
+   from app.core.rate_limits import scoring_limiter
    from fastapi import Depends
    
    @router.patch("/{match_id}/score", 
                  response_model=MatchOut,
-                 dependencies=[Depends(frequent_action_limiter)])
+                 dependencies=[Depends(scoring_limiter)])
    async def update_score(match_id: int, score_data: MatchScoreUpdate):
        # Live scoring logic...
 
@@ -139,12 +154,12 @@ HOW TO APPLY RATE LIMITS TO YOUR ENDPOINTS:
 
    SPIRIT SCORE ROUTER (app/routers/spirit_score.py):
    ────────────────────────────────────────────────────────────────
-   from app.core.rate_limits import frequent_action_limiter
+   from app.core.rate_limits import scoring_limiter
    from fastapi import Depends
    
    @router.post("/", 
                 response_model=SpiritScoreOut,
-                dependencies=[Depends(frequent_action_limiter)])
+                dependencies=[Depends(scoring_limiter)])
    async def submit_spirit_score(payload: SpiritScoreCreate):
        # Spirit scoring logic...
 
@@ -196,18 +211,20 @@ HOW TO APPLY RATE LIMITS TO YOUR ENDPOINTS:
 6. TESTING RATE LIMITS:
    - Hit an endpoint repeatedly within the time window
    - After exceeding the limit, you'll get: HTTP 429 Too Many Requests
-   - Response body: {"detail": "Rate limit exceeded"}
+   - Response body: {"detail": "Rate limit exceeded"}, with a Retry-After header
 
 7. MONITORING:
    Check the logs for rate limit hits:
    - Loguru will log every request with status code
    - 429 status codes indicate rate limit violations
    - Use: grep "429" logs/app.log
+   - /metrics exposes rate_limit_decisions_total{limiter, result} and
+     rate_limit_sync_errors_total (Redis unreachable: limits are per process)
 
 8. CUSTOMIZING LIMITS:
    To create custom limits for specific endpoints:
    
-   custom_limiter = RateLimiter(times=10, seconds=30)  # 10 req per 30 seconds
+   custom_limiter = RateLimiter("custom", times=10, seconds=30)  # 10 req per 30 seconds
    
    @router.get("/custom", dependencies=[Depends(custom_limiter)])
    async def custom_endpoint():
@@ -1,8 +1,36 @@
 import redis.asyncio as redis
+from redis.asyncio.client import Pipeline
 import json
+import time
 from typing import Any
+from app.core.config import settings
+from app.core.metrics import REDIS_COMMAND_SECONDS
 
-redis_client = redis.from_url("redis://localhost:6379", decode_responses=True)
+
+class TimedPipeline(Pipeline):
+    async def execute(self, raise_on_error: bool = True):
+        started = time.perf_counter()
+        try:
+            return await super().execute(raise_on_error)
+        finally:
+            REDIS_COMMAND_SECONDS.labels("PIPELINE").observe(time.perf_counter() - started)
+
+
+class TimedRedis(redis.Redis):
+    """Redis client recording every round trip in redis_command_duration_seconds."""
+
+    async def execute_command(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            return await super().execute_command(*args, **options)
+        finally:
+            REDIS_COMMAND_SECONDS.labels(str(args[0]).upper()).observe(time.perf_counter() - started)
+
+    def pipeline(self, transaction: bool = True, shard_hint: Any = None) -> TimedPipeline:
+        return TimedPipeline(self.connection_pool, self.response_callbacks, transaction, shard_hint)
+
+
+redis_client = TimedRedis.from_url(settings.REDIS_URL, decode_responses=True)
 
 async def publish(channel: str, message: dict[str, Any]):
     await redis_client.publish(channel, json.dumps(message))
@@ -10,4 +38,4 @@ async def publish(channel: str, message: dict[str, Any]):
 async def subscribe(channel: str):
     pubsub = redis_client.pubsub()
     await pubsub.subscribe(channel)
-    return pubsub
\ No newline at end of file
+    return pubsub
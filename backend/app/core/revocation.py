@@ -0,0 +1,155 @@
+"""
+Access token revocation keyed on the jti claim.
+
+Redis holds the truth: auth:revoked is a sorted set of revoked jtis scored by
+token expiry, and auth:sessions:{user_id} lists the jtis issued to a user so
+all of them can be revoked at once. Every process mirrors auth:revoked into
+an in-process Bloom filter, so checking an unrevoked token (the common case)
+costs no network I/O; only Bloom hits are confirmed against Redis.
+
+Revocations are broadcast on auth:token-revoked and added to every filter as
+they arrive. The filter is rebuilt from Redis at startup, after every hub
+reconnect (messages may have been missed) and every REVOCATION_REBUILD_SECONDS
+(Bloom filters cannot forget, so expired jtis are only dropped by a rebuild).
+"""
+
+import asyncio
+import hashlib
+import math
+import time
+from fastapi import HTTPException, status
+from loguru import logger
+from app.core.config import settings
+from app.core.pubsub_hub import hub
+from app.core.redis import redis_client
+
+REVOKED_KEY = "auth:revoked"
+SESSIONS_KEY = "auth:sessions:{}"
+TOKEN_REVOKED_CHANNEL = "auth:token-revoked"
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float):
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, item: str):
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class RevocationRegistry:
+    def __init__(self):
+        self._filter = self._new_filter()
+        self._building: BloomFilter | None = None
+
+    @staticmethod
+    def _new_filter() -> BloomFilter:
+        return BloomFilter(settings.REVOCATION_BLOOM_CAPACITY, settings.REVOCATION_BLOOM_ERROR_RATE)
+
+    def _add(self, jti: str):
+        self._filter.add(jti)
+        if self._building is not None:
+            self._building.add(jti)  # a rebuild in flight may have read Redis before this revocation
+
+    def _remember(self, jti: str | None):
+        """Pub/sub listener: add a revoked jti, or rebuild after a hub reconnect (None)."""
+        if jti is None:
+            asyncio.create_task(self.rebuild())
+        else:
+            self._add(jti)
+
+    async def rebuild(self):
+        """Reload the filter from Redis, dropping jtis whose tokens have expired anyway."""
+        if self._building is not None:
+            return
+        self._building = self._new_filter()
+        try:
+            await redis_client.zremrangebyscore(REVOKED_KEY, "-inf", time.time())
+            for jti in await redis_client.zrange(REVOKED_KEY, 0, -1):
+                self._building.add(jti)
+            self._filter = self._building
+            logger.info("Token revocation filter rebuilt")
+        except Exception as e:
+            logger.warning(f"Failed to rebuild token revocation filter: {e}")
+        finally:
+            self._building = None
+
+    async def refresh_periodically(self):
+        while True:
+            await asyncio.sleep(settings.REVOCATION_REBUILD_SECONDS)
+            await self.rebuild()
+
+    async def is_revoked(self, jti: str) -> bool:
+        if jti not in self._filter:
+            return False
+        try:
+            return await redis_client.zscore(REVOKED_KEY, jti) is not None
+        except Exception as e:
+            # The filter said "maybe" and Redis cannot tell: refuse rather than risk a revoked token
+            logger.warning(f"Revocation check for {jti} could not reach Redis, rejecting the token: {e}")
+            return True
+
+    async def register(self, user_id: int, jti: str, expires_at: float):
+        """Record a newly issued token so revoke_user() can find it."""
+        key = SESSIONS_KEY.format(user_id)
+        try:
+            pipe = redis_client.pipeline(transaction=True)
+            pipe.zremrangebyscore(key, "-inf", time.time())
+            pipe.zadd(key, {jti: expires_at})
+            pipe.expireat(key, int(expires_at) + 1)  # tokens share one lifetime, so the newest expires last
+            await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Failed to register session for user {user_id}: {e}")
+
+    @staticmethod
+    def _unavailable(action: str, e: Exception) -> HTTPException:
+        logger.error(f"Failed to {action}, Redis is unreachable: {e}")
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Token revocation is temporarily unavailable, please retry",
+            headers={"Retry-After": "5"},
+        )
+
+    async def revoke(self, jtis: dict[str, float]):
+        """Revoke tokens given as {jti: expiry timestamp}. Raises 503 if Redis cannot record it."""
+        if not jtis:
+            return
+        for jti in jtis:
+            self._add(jti)
+        try:
+            pipe = redis_client.pipeline(transaction=True)
+            pipe.zadd(REVOKED_KEY, jtis)
+            for jti in jtis:
+                pipe.publish(TOKEN_REVOKED_CHANNEL, jti)
+            await pipe.execute()
+        except Exception as e:
+            raise self._unavailable(f"revoke {len(jtis)} tokens", e)
+
+    async def revoke_user(self, user_id: int) -> int:
+        """Revoke every live token issued to a user. Returns how many were revoked; raises 503 without Redis."""
+        key = SESSIONS_KEY.format(user_id)
+        try:
+            sessions = dict(await redis_client.zrangebyscore(key, time.time(), "+inf", withscores=True))
+        except Exception as e:
+            raise self._unavailable(f"list the sessions of user {user_id}", e)
+        await self.revoke(sessions)
+        try:
+            await redis_client.delete(key)
+        except Exception as e:
+            logger.warning(f"Failed to clear the session list of user {user_id}: {e}")
+        return len(sessions)
+
+
+revocations = RevocationRegistry()
+hub.listen(TOKEN_REVOKED_CHANNEL, revocations._remember)
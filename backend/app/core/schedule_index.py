@@ -0,0 +1,183 @@
+"""
+In-memory interval index over a tournament's match times.
+
+Every match is filed under each resource it occupies: both teams and its
+field. Per resource the intervals are kept sorted by start time, together
+with the longest duration seen, so any interval overlapping [start, end)
+must start in [start - longest, end) and is found with two bisections:
+O(log n + k) per query.
+
+Indexes are cached per tournament and process, and revalidated on every use
+against a cheap aggregate (match count and latest updated_at).
+"""
+
+import heapq
+import threading
+from bisect import bisect_left, insort
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from sqlalchemy import select, func
+from sqlalchemy.orm import Session
+from app.models.match import Match
+
+DEFAULT_MATCH_LENGTH = timedelta(minutes=60)  # for matches stored without an end_time
+
+
+@dataclass
+class Slot:
+    match_id: int
+    start: datetime
+    end: datetime
+    resources: tuple
+
+
+class _Lane:
+    """Intervals of one resource, sorted by (start, match_id)."""
+
+    def __init__(self):
+        self.items: list[tuple[datetime, int]] = []
+        self.longest = timedelta(0)
+
+    def add(self, slot: Slot):
+        insort(self.items, (slot.start, slot.match_id))
+        self.longest = max(self.longest, slot.end - slot.start)
+
+    def remove(self, slot: Slot):
+        i = bisect_left(self.items, (slot.start, slot.match_id))
+        if i < len(self.items) and self.items[i] == (slot.start, slot.match_id):
+            del self.items[i]
+
+    def candidates(self, start: datetime, end: datetime) -> list[int]:
+        lo = bisect_left(self.items, (start - self.longest, -1))
+        hi = bisect_left(self.items, (end, -1))
+        return [match_id for _, match_id in self.items[lo:hi]]
+
+
+class ScheduleIndex:
+    def __init__(self, rows=()):
+        self.slots: dict[int, Slot] = {}
+        self.lanes: dict[tuple, _Lane] = {}
+        self.lock = threading.RLock()  # cached indexes are shared by request threads
+        for row in rows:
+            self.add(row.id, row.team_a_id, row.team_b_id, row.field_id, row.start_time, row.end_time)
+
+    def add(self, match_id: int, team_a_id, team_b_id, field_id, start: datetime | None, end: datetime | None):
+        if start is None:
+            return  # unscheduled matches cannot conflict
+        resources = tuple(
+            key for key in (("team", team_a_id), ("team", team_b_id), ("field", field_id)) if key[1] is not None
+        )
+        slot = Slot(match_id, start, end or start + DEFAULT_MATCH_LENGTH, resources)
+        self.slots[match_id] = slot
+        for key in resources:
+            self.lanes.setdefault(key, _Lane()).add(slot)
+
+    def overlapping(self, key: tuple, start: datetime, end: datetime, exclude: int | None = None) -> list[Slot]:
+        """Matches on one resource whose interval intersects [start, end)."""
+        lane = self.lanes.get(key)
+        if not lane:
+            return []
+        found = []
+        for match_id in lane.candidates(start, end):
+            slot = self.slots[match_id]
+            if match_id != exclude and slot.end > start:
+                found.append(slot)
+        return found
+
+    def conflicts_for(self, match_id: int) -> list[dict]:
+        slot = self.slots.get(match_id)
+        if not slot:
+            return []
+        return [
+            {"kind": key[0], "resource": str(key[1]), "match_ids": sorted((match_id, other.match_id))}
+            for key in slot.resources
+            for other in self.overlapping(key, slot.start, slot.end, exclude=match_id)
+        ]
+
+    def conflicts(self) -> list[dict]:
+        """Every double-booked team and overlapping field, one entry per clashing pair."""
+        found = []
+        for key, lane in self.lanes.items():
+            # Sweep: keep the intervals still running at each start time
+            running: list[Slot] = []
+            for _, match_id in lane.items:
+                slot = self.slots[match_id]
+                running = [r for r in running if r.end > slot.start]
+                for other in running:
+                    found.append({"kind": key[0], "resource": str(key[1]), "match_ids": [other.match_id, match_id]})
+                running.append(slot)
+        return found
+
+    def shift(self, match_id: int, delay: timedelta, gap: timedelta = timedelta(0)) -> dict[int, tuple[datetime, datetime]]:
+        """
+        Move a match by `delay` and push back only the later matches that now
+        collide with it (sharing a team or the field), transitively. Returns
+        {match_id: (start, end)} for every match that moved. Matches starting
+        before the moved one are never touched.
+        """
+        slot = self.slots[match_id]
+        floor = slot.start
+        moved: dict[int, tuple[datetime, datetime]] = {}
+        pending = [(slot.start + delay, 0, slot)]
+        pushes = 0
+
+        while pending:
+            new_start, _, current = heapq.heappop(pending)
+            if current.match_id in moved and moved[current.match_id][0] >= new_start:
+                continue
+            self._move(current, new_start, new_start + (current.end - current.start))
+            moved[current.match_id] = (current.start, current.end)
+
+            for key in current.resources:
+                for other in self.overlapping(key, current.start, current.end + gap, exclude=current.match_id):
+                    if other.start >= floor:
+                        pushes += 1
+                        heapq.heappush(pending, (current.end + gap, pushes, other))
+        return moved
+
+    def _move(self, slot: Slot, start: datetime, end: datetime):
+        for key in slot.resources:
+            self.lanes[key].remove(slot)
+        slot.start, slot.end = start, end
+        for key in slot.resources:
+            self.lanes[key].add(slot)
+
+
+_cache: dict[int, tuple[tuple, ScheduleIndex]] = {}
+_cache_lock = threading.Lock()
+
+
+def _version(db: Session, tournament_id: int) -> tuple:
+    return tuple(db.execute(
+        select(func.count(Match.id), func.max(Match.updated_at)).where(Match.tournament_id == tournament_id)
+    ).one())
+
+
+def load_index(db: Session, tournament_id: int) -> ScheduleIndex:
+    """Return the tournament's interval index, rebuilding it only when its matches changed."""
+    version = _version(db, tournament_id)
+    with _cache_lock:
+        cached = _cache.get(tournament_id)
+        if cached and cached[0] == version:
+            return cached[1]
+
+    rows = db.execute(
+        select(Match.id, Match.team_a_id, Match.team_b_id, Match.field_id, Match.start_time, Match.end_time)
+        .where(Match.tournament_id == tournament_id)
+    ).all()
+    index = ScheduleIndex(rows)
+    with _cache_lock:
+        _cache[tournament_id] = (version, index)
+    return index
+
+
+def remember_index(db: Session, tournament_id: int, index: ScheduleIndex):
+    """Keep an index that was updated in step with a commit."""
+    version = _version(db, tournament_id)
+    with _cache_lock:
+        _cache[tournament_id] = (version, index)
+
+
+def forget_index(tournament_id: int):
+    with _cache_lock:
+        _cache.pop(tournament_id, None)
@@ -0,0 +1,165 @@
+"""
+Match scheduling engine.
+
+Pairings come from the circle method, so every round is a perfect matching
+(plus a bye for odd team counts). Matches are then packed, round by round,
+into the earliest time slot that still has a free field and respects each
+team's rest gap. Slots only exist inside the daily playing window, so play
+rolls over to the next day instead of running through the night.
+
+Matches whose teams are not known yet (bracket games) list the matches
+feeding them instead, and wait out the rest gap after those.
+"""
+
+import json
+import math
+from datetime import date, datetime, time, timedelta
+
+
+def tournament_fields(tournament) -> list[str]:
+    """Field names from Tournament.fields_json (list or JSON-encoded list)."""
+    fields = tournament.fields_json
+    if isinstance(fields, str):
+        try:
+            fields = json.loads(fields)
+        except ValueError:
+            fields = [fields]
+    if isinstance(fields, str) or not isinstance(fields, list):
+        fields = [fields] if fields else []
+    return [str(f) for f in fields if f] or ["Field A", "Field B"]
+
+
+def round_robin_rounds(team_ids: list[int]) -> list[list[tuple[int, int]]]:
+    """Circle method: n-1 rounds (n rounded up to even), every team plays once per round."""
+    teams: list[int | None] = list(team_ids)
+    if len(teams) % 2:
+        teams.append(None)  # bye
+    n = len(teams)
+    rounds = []
+    for r in range(n - 1):
+        pairs = []
+        for i in range(n // 2):
+            a, b = teams[i], teams[n - 1 - i]
+            if a is None or b is None:
+                continue
+            # Alternate the fixed team's side so nobody is always team A
+            pairs.append((b, a) if i == 0 and r % 2 else (a, b))
+        rounds.append(pairs)
+        teams = [teams[0], teams[-1]] + teams[1:-1]
+    return rounds
+
+
+class _SlotAllocator:
+    """First slot >= k with a free field, in near-constant time (union-find over full slots)."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.used: list[int] = []
+        self.next_free: list[int] = []
+
+    def _ensure(self, slot: int):
+        while len(self.used) <= slot:
+            self.next_free.append(len(self.used))
+            self.used.append(0)
+
+    def find(self, slot: int) -> int:
+        self._ensure(slot)
+        root = slot
+        while self.next_free[root] != root:
+            root = self.next_free[root]
+            self._ensure(root)
+        while self.next_free[slot] != root:
+            self.next_free[slot], slot = root, self.next_free[slot]
+        return root
+
+    def take(self, slot: int) -> int:
+        """Occupy a field in the slot and return the field index."""
+        field = self.used[slot]
+        self.used[slot] += 1
+        if self.used[slot] == self.capacity:
+            self._ensure(slot + 1)
+            self.next_free[slot] = slot + 1
+        return field
+
+
+def schedule_matches(
+    matches: list[dict],
+    fields: list[str],
+    start_date: date,
+    match_minutes: int = 60,
+    rest_minutes: int = 60,
+    day_start: time = time(9, 0),
+    day_end: time = time(18, 0),
+) -> list[dict]:
+    """
+    Give every match a field_id, start_time and end_time, returned in input order.
+
+    Each match may name team_a_id/team_b_id and an "after" list of indexes of
+    earlier matches it depends on (e.g. the bracket games feeding it). All
+    fields are used in parallel; a match never starts less than rest_minutes
+    after one of its teams or dependencies ended. Raises ValueError when a
+    match does not fit in the daily window.
+    """
+    window = datetime.combine(start_date, day_end) - datetime.combine(start_date, day_start)
+    slots_per_day = int(window.total_seconds() // 60) // match_minutes
+    if slots_per_day < 1:
+        raise ValueError(f"A {match_minutes} minute match does not fit between {day_start:%H:%M} and {day_end:%H:%M}")
+    rest_slots = math.ceil(rest_minutes / match_minutes) if rest_minutes > 0 else 0
+    slot_length = timedelta(minutes=match_minutes)
+
+    allocator = _SlotAllocator(len(fields))
+    last_slot: dict[int, int] = {}
+    placed: list[int] = []
+    times: dict[int, tuple[datetime, datetime]] = {}  # slot -> (start, end), shared by the matches in it
+    scheduled = []
+
+    for match in matches:
+        team_a, team_b = match.get("team_a_id"), match.get("team_b_id")
+        earliest = -1
+        if team_a in last_slot:
+            earliest = last_slot[team_a]
+        if team_b in last_slot and last_slot[team_b] > earliest:
+            earliest = last_slot[team_b]
+        for i in match.get("after", ()):
+            if placed[i] > earliest:
+                earliest = placed[i]
+        slot = allocator.find(earliest + rest_slots + 1 if earliest >= 0 else 0)
+        field = allocator.take(slot)
+        placed.append(slot)
+        if team_a is not None:
+            last_slot[team_a] = slot
+        if team_b is not None:
+            last_slot[team_b] = slot
+
+        span = times.get(slot)
+        if span is None:
+            day, offset = divmod(slot, slots_per_day)
+            start = datetime.combine(start_date + timedelta(days=day), day_start) + offset * slot_length
+            span = times[slot] = (start, start + slot_length)
+        row = dict(match)
+        row.pop("after", None)
+        row["field_id"] = fields[field]
+        row["start_time"], row["end_time"] = span
+        scheduled.append(row)
+    return scheduled
+
+
+def schedule_round_robin(
+    team_ids: list[int],
+    fields: list[str],
+    start_date: date,
+    **options,
+) -> list[dict]:
+    """
+    Full round robin, one dict per match with team_a_id, team_b_id, field_id,
+    start_time and end_time, in playing order. Options are those of schedule_matches.
+    """
+    pairings = [
+        {"team_a_id": team_a, "team_b_id": team_b}
+        for pairs in round_robin_rounds(team_ids)
+        for team_a, team_b in pairs
+    ]
+    scheduled = schedule_matches(pairings, fields, start_date, **options)
+    field_order = {field: i for i, field in enumerate(fields)}
+    scheduled.sort(key=lambda m: (m["start_time"], field_order[m["field_id"]]))
+    return scheduled
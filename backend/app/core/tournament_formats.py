@@ -0,0 +1,279 @@
+"""
+Pool play and elimination bracket generation.
+
+A format is built up front as a list of match specs. Slots whose team is not
+known yet carry a source instead of a team id:
+
+    pool:{label}:{rank}   finishing position in a pool
+    winner:{match_id}     winner of an earlier match
+    loser:{match_id}      loser of an earlier match (double elimination)
+
+Byes are resolved while building, so no match is ever created against an
+empty slot. When a match completes, advance_bracket() fills every slot fed by
+it (and, once a pool is finished, every slot fed by that pool's standings).
+
+A double elimination bracket ends in a final between the winners bracket
+champion (side a) and the losers bracket champion (side b), plus a bracket
+reset: a second final, round 2, that is only played if the losers bracket
+champion wins the first, since until then they have one loss fewer.
+
+Pools hold n/p teams each, so pool play is O(n) matches for a fixed pool
+size and the bracket adds O(n) more over O(log n) rounds.
+"""
+
+from collections import defaultdict
+from sqlalchemy import select, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from loguru import logger
+from app.models.match import Match, MatchStatus
+from app.core.leaderboard import build_standing, rank_leaderboard
+from app.core.scheduling import round_robin_rounds
+
+
+def pool_label(index: int) -> str:
+    return chr(ord("A") + index) if index < 26 else f"P{index + 1}"
+
+
+def snake_pools(team_ids: list[int], pool_count: int) -> list[list[int]]:
+    """Distribute seeded teams A, B, C, C, B, A, ... so pools are balanced."""
+    pools: list[list[int]] = [[] for _ in range(pool_count)]
+    for i, team_id in enumerate(team_ids):
+        lap, offset = divmod(i, pool_count)
+        pools[offset if lap % 2 == 0 else pool_count - 1 - offset].append(team_id)
+    return pools
+
+
+def bracket_order(size: int) -> list[int]:
+    """Seed numbers in bracket position order (1 v 8, 4 v 5, 2 v 7, 3 v 6 for 8)."""
+    order = [1]
+    while len(order) < size:
+        n = len(order) * 2
+        order = [s for seed in order for s in (seed, n + 1 - seed)]
+    return order
+
+
+class _FormatBuilder:
+    def __init__(self):
+        self.matches: list[dict] = []
+
+    def add(self, stage: str, round_number: int, a, b, pool: str | None = None) -> int:
+        spec = {"stage": stage, "pool": pool, "round_number": round_number, "after": []}
+        for side, source in (("a", a), ("b", b)):
+            kind = source[0]
+            spec[f"team_{side}_id"] = source[1] if kind == "team" else None
+            spec[f"source_{side}"] = None if kind == "team" else source
+            if kind in ("winner", "loser"):
+                spec["after"].append(source[1])
+            elif kind == "pool":
+                spec["after"].extend(source[3])
+        self.matches.append(spec)
+        return len(self.matches) - 1
+
+    def play(self, a, b, stage: str, round_number: int) -> tuple:
+        """Return (winner source, loser source); a bye (None) passes the other side through."""
+        if a is None or b is None:
+            return (b if a is None else a), None
+        index = self.add(stage, round_number, a, b)
+        return ("winner", index), ("loser", index)
+
+
+def _pairs(items: list) -> list[tuple]:
+    return list(zip(items[0::2], items[1::2]))
+
+
+def _single_elimination(builder: _FormatBuilder, entrants: list) -> tuple:
+    """Play a seeded bracket; returns the champion source and the losers of every round."""
+    size = 1
+    while size < len(entrants):
+        size *= 2
+    slots = [entrants[seed - 1] if seed <= len(entrants) else None for seed in bracket_order(size)]
+    losers_by_round = []
+    round_number = 1
+    while len(slots) > 1:
+        results = [builder.play(a, b, "bracket", round_number) for a, b in _pairs(slots)]
+        slots = [winner for winner, _ in results]
+        losers_by_round.append([loser for _, loser in results])
+        round_number += 1
+    return slots[0], losers_by_round
+
+
+def _losers_bracket(builder: _FormatBuilder, losers_by_round: list[list]) -> tuple:
+    """Classic losers bracket: first-round losers pair off, later losers drop in one round at a time."""
+    survivors = losers_by_round[0]
+    round_number = 1
+    if len(survivors) > 1:
+        survivors = [builder.play(a, b, "losers", round_number)[0] for a, b in _pairs(survivors)]
+    for dropped in losers_by_round[1:]:
+        round_number += 1
+        # Reversed so teams do not meet the opponent that just sent them down
+        survivors = [builder.play(a, b, "losers", round_number)[0] for a, b in zip(survivors, reversed(dropped))]
+        if len(survivors) > 1:
+            round_number += 1
+            survivors = [builder.play(a, b, "losers", round_number)[0] for a, b in _pairs(survivors)]
+    return survivors[0]
+
+
+def build_format(
+    team_ids: list[int],
+    pool_count: int = 0,
+    advance_per_pool: int = 2,
+    crossovers: bool = False,
+    elimination: str = "single",
+) -> list[dict]:
+    """
+    Match specs for pools (optional), crossovers (optional) and a single or
+    double elimination bracket, in dependency order. team_ids are in seed order.
+    Raises ValueError when the options do not fit the number of teams.
+    """
+    if len(team_ids) < 2:
+        raise ValueError("At least two teams are required")
+    if elimination not in ("single", "double"):
+        raise ValueError("elimination must be 'single' or 'double'")
+
+    builder = _FormatBuilder()
+    entrants: list = []
+
+    if pool_count:
+        if pool_count < 1 or len(team_ids) < pool_count * 2:
+            raise ValueError("Every pool needs at least two teams")
+        pools = snake_pools(team_ids, pool_count)
+        smallest = min(len(p) for p in pools)
+        needed = advance_per_pool + 1 if crossovers else advance_per_pool
+        if advance_per_pool < 1 or needed > smallest:
+            raise ValueError(f"Pools of {smallest} teams cannot send {advance_per_pool} teams forward" + (" with crossovers" if crossovers else ""))
+        if pool_count * advance_per_pool < 2:
+            raise ValueError("The bracket needs at least two teams")
+
+        labels = [pool_label(i) for i in range(pool_count)]
+        pool_matches: dict[str, list[int]] = defaultdict(list)
+        rounds = [round_robin_rounds(p) for p in pools]
+        # Interleave pools round by round so every pool progresses in parallel
+        for r in range(max(len(pr) for pr in rounds)):
+            for label, pool_rounds in zip(labels, rounds):
+                for team_a, team_b in (pool_rounds[r] if r < len(pool_rounds) else []):
+                    index = builder.add("pool", r + 1, ("team", team_a), ("team", team_b), pool=label)
+                    pool_matches[label].append(index)
+
+        def finisher(label: str, rank: int) -> tuple:
+            return ("pool", label, rank, pool_matches[label])
+
+        direct = advance_per_pool - 1 if crossovers else advance_per_pool
+        entrants = [finisher(label, rank) for rank in range(1, direct + 1) for label in labels]
+        if crossovers:
+            # Pool i's last qualifier plays the next team down in the neighbouring pool
+            for i, label in enumerate(labels):
+                neighbour = labels[(i + 1) % pool_count]
+                index = builder.add("crossover", 1, finisher(label, advance_per_pool), finisher(neighbour, advance_per_pool + 1))
+                entrants.append(("winner", index))
+    else:
+        entrants = [("team", team_id) for team_id in team_ids]
+
+    champion, losers_by_round = _single_elimination(builder, entrants)
+    if elimination == "double":
+        winner, loser = builder.play(champion, _losers_bracket(builder, losers_by_round), "final", 1)
+        # The bracket reset, if necessary: advance_bracket() drops it when side a wins the first final
+        builder.add("final", 2, loser, winner)
+    return builder.matches
+
+
+def render_source(source, match_ids: list[int]) -> str | None:
+    """Turn a builder source into its stored form once match ids are known."""
+    if source is None:
+        return None
+    if source[0] == "pool":
+        return f"pool:{source[1]}:{source[2]}"
+    return f"{source[0]}:{match_ids[source[1]]}"
+
+
+def pool_standings(matches: list) -> list[int]:
+    """Team ids of a finished pool in finishing order (points, goal difference, team id)."""
+    counters: dict = defaultdict(lambda: defaultdict(int))
+    for m in matches:
+        for team_id, gf, ga in ((m.team_a_id, m.score_a or 0, m.score_b or 0), (m.team_b_id, m.score_b or 0, m.score_a or 0)):
+            c = counters[team_id]
+            c["matches_played"] += 1
+            c["goals_for"] += gf
+            c["goals_against"] += ga
+            c["wins" if gf > ga else "losses" if gf < ga else "draws"] += 1
+    standings = [
+        build_standing({"team_id": team_id, "team_name": "", "spirit_sum": 0, "spirit_count": 0, **{
+            f: c[f] for f in ("matches_played", "wins", "losses", "draws", "goals_for", "goals_against")
+        }})
+        for team_id, c in sorted(counters.items())
+    ]
+    return [s["team_id"] for s in rank_leaderboard(standings)]
+
+
+async def _bracket_reset(db: AsyncSession, final: Match, reset: list, winner: int) -> list:
+    """
+    The matches a completed first final should fill. Its reset is deleted if
+    the winners bracket champion (side a) won, or created again if a corrected
+    score now needs one.
+    """
+    if winner != final.team_a_id:
+        if reset:
+            return reset
+        reset = Match(
+            tournament_id=final.tournament_id, stage="final", round_number=2, status=MatchStatus.scheduled,
+            source_a=f"loser:{final.id}", source_b=f"winner:{final.id}",
+        )
+        db.add(reset)
+        await db.flush()
+        logger.info(f"Final {final.id} was won from the losers bracket; added bracket reset {reset.id}")
+        return [reset]
+    for m in reset:
+        if m.status == MatchStatus.scheduled:
+            await db.delete(m)
+            logger.info(f"Final {final.id} was won from the winners bracket; dropped bracket reset {m.id}")
+        else:
+            logger.warning(f"Final {final.id} was won from the winners bracket but reset {m.id} is already {m.status.value}")
+    await db.commit()
+    return []
+
+
+async def advance_bracket(db: AsyncSession, match: Match) -> list[int]:
+    """
+    Place the teams decided by a completed match into the matches it feeds.
+    Returns the ids of the matches that were filled (already committed).
+    """
+    if match.status != MatchStatus.completed or not match.stage:
+        return []
+
+    decided: dict[str, int] = {}
+    if match.score_a != match.score_b:
+        winner, loser = (match.team_a_id, match.team_b_id) if match.score_a > match.score_b else (match.team_b_id, match.team_a_id) # type: ignore
+        decided[f"winner:{match.id}"] = winner # type: ignore
+        decided[f"loser:{match.id}"] = loser # type: ignore
+    elif match.stage != "pool":
+        logger.warning(f"Match {match.id} ended in a draw; its bracket slot stays open until the score is corrected")
+
+    if match.stage == "pool":
+        pool_matches = (await db.scalars(
+            select(Match).where(Match.tournament_id == match.tournament_id, Match.stage == "pool", Match.pool == match.pool)
+        )).all()
+        if all(m.status == MatchStatus.completed for m in pool_matches):
+            for rank, team_id in enumerate(pool_standings(pool_matches), start=1):
+                decided[f"pool:{match.pool}:{rank}"] = team_id
+
+    if not decided:
+        return []
+
+    fed = (await db.scalars(
+        select(Match).where(
+            Match.tournament_id == match.tournament_id,
+            or_(Match.source_a.in_(decided), Match.source_b.in_(decided)),
+        )
+    )).all()
+    if match.stage == "final" and match.round_number == 1 and f"winner:{match.id}" in decided:
+        fed = await _bracket_reset(db, match, fed, decided[f"winner:{match.id}"])
+    filled = []
+    for m in fed:
+        if m.source_a in decided:
+            m.team_a_id = decided[m.source_a] # type: ignore
+        if m.source_b in decided:
+            m.team_b_id = decided[m.source_b] # type: ignore
+        filled.append(m.id)
+    if filled:
+        await db.commit()
+        logger.info(f"Match {match.id} advanced teams into matches {filled}")
+    return filled
@@ -0,0 +1,157 @@
+"""
+In-process cache of authenticated users.
+
+get_current_user resolves a token's username through a small LRU with a TTL
+instead of querying users on every request. Entries are immutable snapshots
+(CurrentUser), never ORM objects, so they are safe to share between requests
+and threads.
+
+Changes are propagated with publish_user_change(), which every process
+receives through the pub/sub hub. It runs automatically once a session
+commits an update or delete of a User row that changes its username, role
+or is_active, so no code path has to remember it (Core UPDATE statements on
+users bypass this and must call it themselves). Deactivated and deleted
+users also lose their live tokens, and with AUTH_TRUST_TOKEN_CLAIMS so does
+a user whose role or username changed: the signed claims would otherwise
+keep the old values until the token expires. The TTL bounds staleness if a message is lost, and
+the cache is cleared whenever the hub reconnects.
+"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+import anyio.from_thread
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from loguru import logger
+from app.core.config import settings
+from app.core.pubsub_hub import hub
+from app.core.redis import redis_client
+from app.core.revocation import revocations
+from app.models.user import User, RoleEnum
+
+USER_CHANGED_CHANNEL = "auth:user-changed"
+
+
+@dataclass(frozen=True, slots=True)
+class CurrentUser:
+    """What request handlers need from the authenticated user."""
+    id: int
+    username: str
+    role: RoleEnum
+    is_active: bool = True
+
+    @classmethod
+    def from_orm(cls, user: User) -> "CurrentUser":
+        return cls(id=user.id, username=user.username, role=user.role, is_active=bool(user.is_active)) # type: ignore
+
+
+class UserCache:
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, CurrentUser]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, username: str) -> CurrentUser | None:
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry is None:
+                return None
+            expires, user = entry
+            if expires < time.monotonic():
+                del self._entries[username]
+                return None
+            self._entries.move_to_end(username)
+            return user
+
+    def put(self, user: CurrentUser):
+        with self._lock:
+            self._entries[user.username] = (time.monotonic() + self.ttl, user)
+            self._entries.move_to_end(user.username)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, username: str | None):
+        """Drop one user, or everything when username is None."""
+        with self._lock:
+            if username is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(username, None)
+
+
+user_cache = UserCache(settings.USER_CACHE_SIZE, settings.USER_CACHE_TTL)
+hub.listen(USER_CHANGED_CHANNEL, user_cache.invalidate)
+
+
+async def publish_user_change(username: str, revoke_user_id: int | None = None):
+    """Tell every process to forget a user whose role, status or existence changed."""
+    user_cache.invalidate(username)
+    try:
+        await redis_client.publish(USER_CHANGED_CHANNEL, username)
+    except Exception as e:
+        logger.warning(f"Failed to publish user change for {username}: {e}")
+    if revoke_user_id is not None:
+        try:
+            await revocations.revoke_user(revoke_user_id)
+        except Exception as e:
+            logger.error(f"Failed to revoke the sessions of user {revoke_user_id}: {e}")
+
+
+_pending_tasks: set[asyncio.Task] = set()
+_TRACKED = ("username", "role", "is_active")
+
+
+def _changes(session: Session) -> dict:
+    return session.info.setdefault("user_changes", {})
+
+
+@event.listens_for(User, "after_update")
+def _track_update(mapper, connection, target):
+    state = inspect(target)
+    if not any(state.attrs[name].history.has_changes() for name in _TRACKED):
+        return
+    session = state.session
+    deactivated = target.is_active is False and state.attrs.is_active.history.has_changes()
+    revoke = deactivated or settings.AUTH_TRUST_TOKEN_CLAIMS
+    for username in (target.username, *state.attrs.username.history.deleted):
+        user_cache.invalidate(username)
+        if session is not None:
+            _changes(session)[username] = target.id if revoke else None
+
+
+@event.listens_for(User, "after_delete")
+def _track_delete(mapper, connection, target):
+    user_cache.invalidate(target.username)
+    session = inspect(target).session
+    if session is not None:
+        _changes(session)[target.username] = target.id
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_committed(session):
+    changes = session.info.pop("user_changes", None)
+    if not changes:
+        return
+    try:
+        loop = asyncio.get_running_loop()  # AsyncSession: the commit runs on the event loop
+    except RuntimeError:
+        loop = None
+    for username, revoke_user_id in changes.items():
+        if loop is not None:
+            task = loop.create_task(publish_user_change(username, revoke_user_id))
+            _pending_tasks.add(task)
+            task.add_done_callback(_pending_tasks.discard)
+            continue
+        try:
+            anyio.from_thread.run(publish_user_change, username, revoke_user_id)  # sync handler in the threadpool
+        except RuntimeError:
+            logger.warning(f"User {username} changed outside the server; other processes forget it within {settings.USER_CACHE_TTL}s")
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back(session):
+    session.info.pop("user_changes", None)
@@ -0,0 +1,63 @@
+from sqlalchemy import JSON, insert, case, cast, or_, func
+from sqlalchemy.dialects.postgresql import JSONB, insert as pg_insert
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+BULK_CHUNK_SIZE = 5000  # rows per statement batch; bounds memory for very large writes
+
+
+def bulk_insert_returning(db: Session, model, rows: list[dict], empty_collections: tuple[str, ...] = ()) -> list:
+    """
+    Insert rows with multi-row INSERT ... RETURNING and return the new ORM
+    objects in input order, fully populated (ids and server defaults included).
+
+    Collections named in empty_collections are marked as loaded and empty, so
+    serializing the objects does not lazy-load them one row at a time. Build
+    response models before committing: a commit expires the returned objects.
+    """
+    created = []
+    for start in range(0, len(rows), BULK_CHUNK_SIZE):
+        batch = rows[start:start + BULK_CHUNK_SIZE]
+        created.extend(db.scalars(insert(model).returning(model, sort_by_parameter_order=True), batch).all())
+    for obj in created:
+        for name in empty_collections:
+            set_committed_value(obj, name, [])
+    return created
+
+
+def _comparable(column):
+    """json has no equality operator in PostgreSQL; compare such columns as jsonb."""
+    return cast(column, JSONB) if isinstance(column.type, JSON) and not isinstance(column.type, JSONB) else column
+
+
+def bulk_upsert_returning(
+    db: Session,
+    model,
+    rows: list[dict],
+    key_columns: tuple[str, ...],
+    update_columns: tuple[str, ...],
+    changed_stamp: str | None = None,
+) -> list:
+    """
+    INSERT ... ON CONFLICT (key_columns) DO UPDATE, one statement per
+    BULK_CHUNK_SIZE rows, returning the stored ORM objects in input order.
+
+    Later rows win over earlier rows with the same key. When changed_stamp is
+    given, that column is set to now() only for rows whose values actually
+    changed, so an identical retry keeps the old stamp.
+    """
+    latest = {tuple(row[k] for k in key_columns): row for row in rows}
+    unique_rows = list(latest.values())
+    table = model.__table__
+
+    stored = {}
+    for start in range(0, len(unique_rows), BULK_CHUNK_SIZE):
+        stmt = pg_insert(model).values(unique_rows[start:start + BULK_CHUNK_SIZE])
+        updates = {c: stmt.excluded[c] for c in update_columns}
+        if changed_stamp:
+            changed = or_(*[_comparable(table.c[c]).is_distinct_from(_comparable(stmt.excluded[c])) for c in update_columns])
+            updates[changed_stamp] = case((changed, func.now()), else_=table.c[changed_stamp])
+        stmt = stmt.on_conflict_do_update(index_elements=list(key_columns), set_=updates).returning(model)
+        for obj in db.scalars(stmt, execution_options={"populate_existing": True}):
+            stored[tuple(getattr(obj, k) for k in key_columns)] = obj
+    return [stored[key] for key in latest]
@@ -0,0 +1,174 @@
+"""
+Schema upkeep for databases created before a model change (there are no
+migrations). Missing nullable columns are added on startup; declared indexes
+are not, because building them locks writes and every worker would race to
+do it. Indexes are built by an explicit command, one CREATE INDEX CONCURRENTLY
+at a time, so the tables stay writable:
+
+    python -m app.db.indexes build
+
+A unique index is skipped while its table still has duplicate keys. Removing
+them deletes data, so it is a separate one-off that only reports what it
+would delete unless confirmed:
+
+    python -m app.db.indexes dedupe <index_name> [--yes]
+
+Declared indexes the live database still lacks are listed by:
+
+    python -m app.db.indexes check
+
+Whether the busiest endpoints actually use them is covered by
+tests/test_query_plans.py, which EXPLAINs the statements the real handlers
+send against seeded data.
+"""
+
+import sys
+from sqlalchemy import inspect, text, delete, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.schema import CreateIndex
+from loguru import logger
+from app.db.session import Base
+
+
+def ensure_columns(engine):
+    """
+    Add nullable columns declared on the models that existing tables lack.
+    Like indexes, new columns never reach an existing table through `create_all`.
+    """
+    inspector = inspect(engine)
+    tables = set(inspector.get_table_names())
+    for table in Base.metadata.sorted_tables:
+        if table.name not in tables:
+            continue
+        present = {c["name"] for c in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in present:
+                continue
+            if not column.nullable:
+                logger.warning(f"Column {table.name}.{column.name} is missing and NOT NULL; add it manually")
+                continue
+            ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(dialect=engine.dialect)}"
+            try:
+                with engine.begin() as conn:
+                    conn.execute(text(ddl))
+                logger.info(f"Added column {table.name}.{column.name}")
+            except SQLAlchemyError as e:
+                logger.warning(f"Could not add column {table.name}.{column.name}: {e}")
+
+
+def _invalid_indexes(conn) -> set[str]:
+    """Indexes left INVALID by an interrupted or failed CREATE INDEX CONCURRENTLY."""
+    return set(conn.exec_driver_sql(
+        "SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid WHERE NOT i.indisvalid"
+    ).scalars())
+
+
+def missing_indexes(engine) -> list:
+    """Declared indexes the database lacks (or only has as INVALID leftovers)."""
+    inspector = inspect(engine)
+    with engine.connect() as conn:
+        invalid = _invalid_indexes(conn)
+    missing = []
+    for table in Base.metadata.sorted_tables:
+        present = {i["name"] for i in inspector.get_indexes(table.name)} if inspector.has_table(table.name) else set()
+        missing.extend(index for index in table.indexes if index.name not in present or index.name in invalid)
+    return missing
+
+
+def _duplicate_rows(conn, index) -> list:
+    """Rows a unique index would reject: every row but the newest (highest id) per key."""
+    table = index.table
+    newer = table.alias("newer")
+    return conn.execute(
+        select(table.c.id).distinct()
+        .where(*[col == newer.c[col.name] for col in index.columns], table.c.id < newer.c.id)
+        .order_by(table.c.id)
+    ).all()
+
+
+def deduplicate(engine, index, confirmed: bool) -> int:
+    """
+    Delete the rows that block a unique index, keeping the newest per key
+    (the tombstone triggers record the deletions for delta exports). Without
+    `confirmed` only reports what would be deleted. Returns the row count.
+    """
+    table = index.table
+    with engine.begin() as conn:
+        rows = _duplicate_rows(conn, index)
+        if not rows or not confirmed:
+            logger.info(f"{index.name}: {len(rows)} duplicate rows in {table.name}: {[row[0] for row in rows][:50]}")
+            return len(rows)
+        conn.execute(delete(table).where(table.c.id.in_([row[0] for row in rows])))
+    logger.warning(f"Deleted {len(rows)} duplicate rows from {table.name} for {index.name}: ids {[row[0] for row in rows]}")
+    return len(rows)
+
+
+def build_indexes(engine) -> list[str]:
+    """
+    Create every missing index with CREATE INDEX CONCURRENTLY. Returns the
+    indexes that could not be built (duplicates, errors); a failed build's
+    INVALID leftover is dropped so the next run retries it.
+    """
+    skipped = []
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        invalid = _invalid_indexes(conn)
+        for index in missing_indexes(engine):
+            if index.unique and _duplicate_rows(conn, index):
+                logger.warning(f"Skipping {index.name}: {index.table.name} has duplicate keys, see `python -m app.db.indexes dedupe {index.name}`")
+                skipped.append(index.name)
+                continue
+            index.dialect_options["postgresql"]["concurrently"] = True
+            try:
+                if index.name in invalid:
+                    conn.exec_driver_sql(f"DROP INDEX CONCURRENTLY IF EXISTS {index.name}")
+                logger.info(f"Building index {index.name}")
+                conn.execute(CreateIndex(index))
+                logger.success(f"Built index {index.name}")
+            except SQLAlchemyError as e:
+                logger.error(f"Could not create index {index.name}: {e}")
+                conn.exec_driver_sql(f"DROP INDEX CONCURRENTLY IF EXISTS {index.name}")
+                skipped.append(index.name)
+    return skipped
+
+
+def _index_named(name: str):
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            if index.name == name:
+                return index
+    return None
+
+
+USAGE = "Usage: python -m app.db.indexes {build | check | dedupe <index_name> [--yes]}"
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else None
+    if command not in ("build", "check", "dedupe") or (command == "dedupe") != (len(sys.argv) > 2):
+        print(USAGE)
+        sys.exit(2)
+    from app.db.session import engine
+    import app.models  # noqa: F401  (register every table)
+
+    if command == "build":
+        skipped = build_indexes(engine)
+        for name in skipped:
+            print(f"❌ {name} was not built")
+        sys.exit(1 if skipped else 0)
+
+    if command == "dedupe":
+        index = _index_named(sys.argv[2])
+        if index is None or not index.unique:
+            print(f"❌ {sys.argv[2]} is not a unique index declared on the models")
+            sys.exit(2)
+        confirmed = "--yes" in sys.argv[3:]
+        count = deduplicate(engine, index, confirmed)
+        if count and not confirmed:
+            print(f"{count} rows of {index.table.name} would be deleted (newest row per key is kept). Re-run with --yes to delete them.")
+            sys.exit(1)
+        print(f"✅ {index.table.name} has no duplicates for {index.name}" if not count else f"✅ Deleted {count} rows from {index.table.name}")
+        sys.exit(0)
+
+    missing = missing_indexes(engine)
+    for index in missing:
+        print(f"❌ {index.name} on {index.table.name} is missing, see `python -m app.db.indexes build`")
+    sys.exit(1 if missing else 0)
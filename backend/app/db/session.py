@@ -1,6 +1,10 @@
-from sqlalchemy import create_engine
+import asyncio
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from loguru import logger
 from app.core.config import settings
 
 SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
@@ -10,4 +14,24 @@ if not SQLALCHEMY_DATABASE_URL:
 engine = create_engine(SQLALCHEMY_DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-Base = declarative_base()
\ No newline at end of file
+# Async engine for `async def` handlers: same database, asyncpg driver
+ASYNC_DATABASE_URL = make_url(SQLALCHEMY_DATABASE_URL).set(drivername="postgresql+asyncpg")
+async_engine = create_async_engine(ASYNC_DATABASE_URL)
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+Base = declarative_base()
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def _guard_event_loop(conn, cursor, statement, parameters, context, executemany):
+    """Flag synchronous queries issued from the event loop thread (they block every socket)."""
+    if settings.SYNC_DB_ON_LOOP == "off":
+        return
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return  # threadpool worker or plain script: fine
+    message = f"Synchronous DB query on the event loop thread: {statement.splitlines()[0][:120]}"
+    if settings.SYNC_DB_ON_LOOP == "raise":
+        raise RuntimeError(message)
+    logger.warning(message)
@@ -4,68 +4,87 @@ from pathlib import Path
 from app.routers import (
     auth, health, tournament_routes, team, participant, 
     team_member, match, ws, spirit_score, leaderboard, 
-    analytics, coaching, export, notification, media
+    analytics, coaching, export, notification, media, metrics
 )
 from app.db.session import engine, Base
+from app.db.indexes import ensure_columns, missing_indexes
 from app.core.config import settings
 from fastapi.middleware.cors import CORSMiddleware
 from app.middleware.logging_middleware import LoggingMiddleware
+from app.core.pubsub_hub import hub
+from app.core.password_pool import shutdown_pool
+from app.core.revocation import revocations
+from app.core.pagination import NEXT_CURSOR_HEADER
 from contextlib import asynccontextmanager
-import redis.asyncio as redis
-from fastapi_limiter import FastAPILimiter
+from app.core.redis import redis_client
+from app.core.rate_limiter import run_sync as run_rate_limit_sync
 from loguru import logger
+import asyncio
 import sys
 import time
 
-# Logging configuration
+# Logging configuration. Sinks are enqueued: requests only put the record on a
+# queue, and formatting, file writes, rotation and compression happen on loguru's worker thread.
 logger.remove()
 logger.add(
     sys.stdout,
     format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan> - <level>{message}</level>",
     level="INFO",
     colorize=True,
+    enqueue=True,
 )
 
 LOG_DIR = Path("./logs")
 LOG_DIR.mkdir(parents=True, exist_ok=True)
 logger.add(
     LOG_DIR / "app.log",
-    format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function} - {message}",
+    serialize=True,  # one JSON object per line; request fields bound by LoggingMiddleware land in "extra"
     level="INFO",
     rotation="1 MB",
     retention="10 days",
     compression="zip",
+    enqueue=True,
 )
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Initialize Redis for rate limiting on startup, close on shutdown."""
+    """Start background sync tasks on startup, stop them on shutdown."""
     logger.info("Starting Y-Ultimate Management Platform Backend")
     
     try:
-        redis_connection = redis.from_url(
-            settings.REDIS_URL, 
-            encoding="utf-8", 
-            decode_responses=True
-        )
-        await FastAPILimiter.init(redis_connection)
+        await redis_client.ping()
         logger.success(f"Redis connected at {settings.REDIS_URL}")
-        logger.success("Rate limiter initialized")
         logger.success("Cache invalidation active")
     except Exception as e:
         logger.error(f"Failed to connect to Redis: {e}")
-        logger.warning("Rate limiting will be disabled")
+        logger.warning("Rate limits will be enforced per process until Redis is reachable")
+    rate_limit_sync = asyncio.create_task(run_rate_limit_sync())
+
+    # Indexes are built by `python -m app.db.indexes build`, never by the app itself
+    try:
+        missing = [index.name for index in await asyncio.to_thread(missing_indexes, engine)]
+        if missing:
+            logger.warning(f"Missing indexes {missing}; run `python -m app.db.indexes build`")
+    except Exception as e:
+        logger.warning(f"Could not check indexes: {e}")
+
+    # Revoked tokens must be known before the first request is served
+    await revocations.rebuild()
+    revocation_refresh = asyncio.create_task(revocations.refresh_periodically())
+
+    # Shared pub/sub fan-out for WebSocket spectators (reconnects on its own)
+    hub.start()
     
     logger.info("Application startup complete")
     yield
     
     logger.info("Shutting down application")
-    try:
-        await FastAPILimiter.close()
-        logger.info("Rate limiter closed")
-    except Exception as e:
-        logger.error(f"Error closing rate limiter: {e}")
+    revocation_refresh.cancel()
+    rate_limit_sync.cancel()
+    await hub.stop()
+    shutdown_pool()
     logger.info("Application shutdown complete")
+    await logger.complete()
 
 app = FastAPI(
     title="Y-Ultimate Management Platform Backend",
@@ -80,11 +99,13 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 app.add_middleware(LoggingMiddleware)
 
 Base.metadata.create_all(bind=engine)
+ensure_columns(engine)
 
 MEDIA_DIR = Path("./media")
 MEDIA_DIR.mkdir(parents=True, exist_ok=True)
@@ -92,6 +113,9 @@ app.mount("/media/files", StaticFiles(directory=str(MEDIA_DIR)), name="media")
 
 app.include_router(auth.router)
 app.include_router(health.router)
+app.include_router(metrics.router)
+# Before tournament_routes so /tournaments/export-all is not captured by /tournaments/{tournament_id}
+app.include_router(export.router)
 app.include_router(tournament_routes.router)
 app.include_router(team.router)
 app.include_router(participant.router)
@@ -102,7 +126,6 @@ app.include_router(spirit_score.router)
 app.include_router(leaderboard.router)
 app.include_router(analytics.router)
 app.include_router(coaching.router)
-app.include_router(export.router)
 app.include_router(notification.router)
 app.include_router(media.router)
 
@@ -1,35 +1,78 @@
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
+from functools import lru_cache
+from starlette.datastructures import MutableHeaders
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from loguru import logger
+from app.core.query_stats import track_queries, report
+from app.core.metrics import HTTP_REQUEST_SECONDS, route_label
+import re
 import time
 
+MUTATING_METHODS = frozenset(("POST", "PUT", "PATCH", "DELETE"))
+_CACHED_RESOURCE = re.compile(r"/(tournaments|teams|matches|spirit)")
 
-class LoggingMiddleware(BaseHTTPMiddleware):
-    """Middleware to log all HTTP requests with timing and cache invalidation detection."""
-    
-    async def dispatch(self, request: Request, call_next):
-        start_time = time.time()
-        
-        response = await call_next(request)
-        
-        duration = time.time() - start_time
-        
-        # Detect cache invalidation operations
-        cache_indicators = ["POST", "PUT", "PATCH", "DELETE"]
-        cache_paths = ["/tournaments", "/teams", "/matches", "/spirit"]
-        
-        is_mutation = request.method in cache_indicators
-        affects_cache = any(path in str(request.url.path) for path in cache_paths)
-        
-        if is_mutation and affects_cache:
-            logger.info(
-                f"{request.method} {request.url.path} | Status: {response.status_code} | "
-                f"Duration: {duration:.3f}s | Cache: likely invalidated"
-            )
-        else:
-            logger.info(
-                f"{request.method} {request.url.path} | Status: {response.status_code} | "
-                f"Duration: {duration:.3f}s"
-            )
-        
-        return response
+
+@lru_cache(maxsize=1024)
+def _affects_cache(method: str, route: str) -> bool:
+    """Classified once per route template, not per request."""
+    return method in MUTATING_METHODS and _CACHED_RESOURCE.search(route) is not None
+
+
+class LoggingMiddleware:
+    """
+    Pure ASGI middleware logging every HTTP request with timing, DB query
+    totals and cache invalidation detection. It wraps `send` instead of
+    buffering the response, so streaming responses pass through untouched.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        method = scope["method"]
+        status_code = 500
+        replaced = False
+
+        with track_queries() as queries:
+            async def send_wrapper(message: Message):
+                nonlocal status_code, replaced
+                if replaced:
+                    return
+                if message["type"] == "http.response.start":
+                    budget_error = report(queries, f"{method} {scope['path']}")
+                    if budget_error:
+                        replaced = True
+                        await JSONResponse({"detail": budget_error}, status_code=500)(scope, receive, send)
+                        return
+                    status_code = message["status"]
+                    headers = MutableHeaders(scope=message)
+                    headers["X-DB-Queries"] = str(queries.count)
+                    headers["X-DB-Time-Ms"] = f"{queries.seconds * 1000:.1f}"
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                duration = time.perf_counter() - start_time
+                route = route_label(scope)
+                HTTP_REQUEST_SECONDS.labels(method, route, status_code).observe(duration)
+                self._log(scope, method, route, status_code, duration, queries)
+
+    @staticmethod
+    def _log(scope: Scope, method: str, route: str, status_code: int, duration: float, queries):
+        cache = " | Cache: likely invalidated" if _affects_cache(method, route) else ""
+        db_summary = f" | DB: {queries.count} queries, {queries.seconds * 1000:.1f}ms" if queries.count else ""
+        logger.bind(
+            method=method,
+            path=scope["path"],
+            route=route,
+            status=status_code,
+            duration_ms=round(duration * 1000, 2),
+            db_queries=queries.count,
+            db_ms=round(queries.seconds * 1000, 2),
+        ).info(f"{method} {scope['path']} | Status: {status_code} | Duration: {duration:.3f}s{db_summary}{cache}")
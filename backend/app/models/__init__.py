@@ -6,6 +6,13 @@ from app.models.team import Team
 from app.models.team_member import TeamMember
 from app.models.match import Match
 from app.models.spirit_score import SpiritScore
+from app.models.session import Session as CoachingSession
+from app.models.attendance import Attendance
+from app.models.home_visit import HomeVisit
+from app.models.lsas_assessment import LSASAssessment
+from app.models.media import Media
+from app.models.notification import Notification
+from app.models.deleted_row import DeletedRow
 # This ensures both models are loaded before relationships are configured
 __all__ = [
     "User",
@@ -17,5 +24,12 @@ __all__ = [
     "Team",
     "TeamMember",
     "Match",
-    "SpiritScore"
+    "SpiritScore",
+    "CoachingSession",
+    "Attendance",
+    "HomeVisit",
+    "LSASAssessment",
+    "Media",
+    "Notification",
+    "DeletedRow"
 ]
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Boolean, Date, Text, ForeignKey, DateTime, func
+from sqlalchemy import Column, Integer, Boolean, Date, Text, ForeignKey, DateTime, Index, func
 from sqlalchemy.orm import relationship
 from app.db.session import Base
 
@@ -15,7 +15,13 @@ class Attendance(Base):
     marked_by = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"))
     notes = Column(Text, nullable=True)
 
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), index=True)
 
     participant = relationship("Participant")
     session = relationship("Session", back_populates="attendances")
+
+    __table_args__ = (
+        # One row per child per coaching session; resubmissions update it in place
+        Index("uq_attendances_session_participant", "session_id", "participant_id", unique=True),
+    )
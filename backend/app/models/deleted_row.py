@@ -0,0 +1,72 @@
+from sqlalchemy import Column, Integer, String, DateTime, Index, event, func, text
+from app.db.session import Base
+
+class DeletedRow(Base):
+    """Tombstone written whenever an exported row is deleted, so delta exports can report it."""
+    __tablename__ = "deleted_rows"
+
+    id = Column(Integer, primary_key=True, index=True)
+    table_name = Column(String, nullable=False)
+    row_id = Column(Integer, nullable=False)
+    tournament_id = Column(Integer, nullable=True)
+    deleted_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_deleted_rows_table_name_id", "table_name", "id"),
+    )
+
+
+# Tombstoned table -> SQL for the deleted row's tournament id. A spirit score
+# removed by the FK cascade of its match no longer finds the match row, but the
+# match's tombstone is already there: the triggers run before each delete.
+TOMBSTONED_TABLES = {
+    "matches": "OLD.tournament_id",
+    "spirit_scores": """COALESCE(
+        (SELECT tournament_id FROM matches WHERE id = OLD.match_id),
+        (SELECT tournament_id FROM deleted_rows WHERE table_name = 'matches' AND row_id = OLD.match_id ORDER BY id DESC LIMIT 1)
+    )""",
+    "attendances": "OLD.tournament_id",
+    "lsas_assessments": "NULL",
+    "participants": "NULL",
+    "sessions": "NULL",
+}
+
+
+def install_tombstone_triggers(connection):
+    """
+    Record deletions with row triggers rather than ORM events, so rows removed
+    by FK cascades (a participant's attendance and LSAS rows, a deleted team's
+    matches and their spirit scores) and by bulk or Core deletes get tombstones
+    too. Idempotent; also upgrades a naive deleted_at column to timestamptz.
+    """
+    if connection.dialect.name != "postgresql":
+        return
+    naive = connection.scalar(text(
+        "SELECT data_type = 'timestamp without time zone' FROM information_schema.columns "
+        "WHERE table_name = 'deleted_rows' AND column_name = 'deleted_at'"
+    ))
+    if naive:
+        connection.execute(text(
+            "ALTER TABLE deleted_rows ALTER COLUMN deleted_at TYPE timestamptz USING deleted_at AT TIME ZONE 'UTC'"
+        ))
+
+    present = set(connection.scalars(text("SELECT tgname FROM pg_trigger WHERE tgname LIKE 'tombstone\\_%'")))
+    for table, tournament_id in TOMBSTONED_TABLES.items():
+        connection.execute(text(f"""
+            CREATE OR REPLACE FUNCTION tombstone_{table}() RETURNS trigger AS $$
+            BEGIN
+                INSERT INTO deleted_rows (table_name, row_id, tournament_id, deleted_at)
+                VALUES (TG_TABLE_NAME, OLD.id, {tournament_id}, now());
+                RETURN OLD;
+            END
+            $$ LANGUAGE plpgsql
+        """))
+        if f"tombstone_{table}" not in present:
+            connection.execute(text(
+                f"CREATE TRIGGER tombstone_{table} BEFORE DELETE ON {table} FOR EACH ROW EXECUTE FUNCTION tombstone_{table}()"
+            ))
+
+
+@event.listens_for(Base.metadata, "after_create")
+def _after_create(metadata, connection, **kw):
+    install_tombstone_triggers(connection)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, Date, Text, DateTime, func
+from sqlalchemy import Column, Integer, String, ForeignKey, Date, Text, DateTime, func
 from sqlalchemy.orm import relationship
 from app.db.session import Base
 
@@ -6,12 +6,15 @@ class HomeVisit(Base):
     __tablename__ = "home_visits"
 
     id = Column(Integer, primary_key=True, index=True)
-    participant_id = Column(Integer, ForeignKey("participants.id", ondelete="CASCADE"), nullable=False)
+    participant_id = Column(Integer, ForeignKey("participants.id", ondelete="CASCADE"), nullable=False, index=True)
     coach_id = Column(Integer, ForeignKey("participants.id", ondelete="SET NULL"), nullable=True)
     visit_date = Column(Date, nullable=False)
     notes = Column(Text, nullable=True)
     photos_json = Column(Text, nullable=True)  # store URLs or file refs
 
+    # Id assigned by the coach's device when the row was created offline; makes uploads idempotent
+    client_id = Column(String, nullable=True, unique=True, index=True)
+
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     participant = relationship("Participant", foreign_keys=[participant_id])
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, Date, Text, JSON, Float, DateTime, func
+from sqlalchemy import Column, Integer, String, ForeignKey, Date, Text, JSON, Float, DateTime, func
 from sqlalchemy.orm import relationship
 from app.db.session import Base
 
@@ -6,7 +6,7 @@ class LSASAssessment(Base):
     __tablename__ = "lsas_assessments"
 
     id = Column(Integer, primary_key=True, index=True)
-    participant_id = Column(Integer, ForeignKey("participants.id", ondelete="CASCADE"), nullable=False)
+    participant_id = Column(Integer, ForeignKey("participants.id", ondelete="CASCADE"), nullable=False, index=True)
     assessor_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
     date = Column(Date, nullable=False)
 
@@ -14,6 +14,10 @@ class LSASAssessment(Base):
     total_score = Column(Float, default=0.0)
     notes = Column(Text, nullable=True)
 
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Id assigned by the coach's device when the row was created offline; makes uploads idempotent
+    client_id = Column(String, nullable=True, unique=True, index=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now(), index=True)
 
     participant = relationship("Participant", foreign_keys=[participant_id])
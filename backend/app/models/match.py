@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Enum
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Enum, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.db.session import Base
@@ -28,12 +28,30 @@ class Match(Base):
     score_a = Column(Integer, default=0)
     score_b = Column(Integer, default=0)
     status = Column(Enum(MatchStatus), default=MatchStatus.scheduled)
+    # Bumped by every score update; orders the leaderboard deltas in Redis
+    score_version = Column(Integer, nullable=True, default=0)
+
+    # Pool play / bracket placement (null for plain round-robin matches)
+    stage = Column(String, nullable=True)  # pool, crossover, bracket, losers, final
+    pool = Column(String, nullable=True)
+    round_number = Column(Integer, nullable=True)
+    # Where a not-yet-known team comes from: pool:{label}:{rank}, winner:{match_id}, loser:{match_id}
+    source_a = Column(String, nullable=True)
+    source_b = Column(String, nullable=True)
 
     created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
 
     # Relationships
     tournament = relationship("Tournament", back_populates="matches")
     team_a = relationship("Team", foreign_keys=[team_a_id])
     team_b = relationship("Team", foreign_keys=[team_b_id])
-    spirit_scores = relationship("SpiritScore", back_populates="match", cascade="all, delete-orphan")
\ No newline at end of file
+    spirit_scores = relationship("SpiritScore", back_populates="match", cascade="all, delete-orphan")
+
+    __table_args__ = (
+        Index("ix_matches_tournament_stage_pool", "tournament_id", "stage", "pool"),
+        Index("ix_matches_tournament_id_id", "tournament_id", "id"),  # keyset pages within a tournament
+        Index("ix_matches_tournament_status", "tournament_id", "status"),
+        Index("ix_matches_team_a_id", "team_a_id"),
+        Index("ix_matches_team_b_id", "team_b_id"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, func, Boolean
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, func, Boolean, Index, text
 from app.db.session import Base
 
 class Media(Base):
@@ -14,3 +14,8 @@ class Media(Base):
     caption = Column(String, nullable=True)
     is_public = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        # Keyset pagination of a tournament's public gallery, newest first
+        Index("ix_media_public_tournament_created_id", "tournament_id", "created_at", "id", postgresql_where=text("is_public")),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, func, Boolean, JSON
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, func, Boolean, JSON, Index
 from app.db.session import Base
 
 class Notification(Base):
@@ -9,4 +9,9 @@ class Notification(Base):
     type = Column(String, nullable=False)
     payload_json = Column(JSON, nullable=True)
     is_read = Column(Boolean, default=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        # Keyset pagination of a user's inbox, newest first
+        Index("ix_notifications_user_created_id", "user_id", "created_at", "id"),
+    )
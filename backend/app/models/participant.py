@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Enum, Date, Boolean, Text, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Enum, Date, Boolean, Text, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.session import Base
@@ -34,7 +34,7 @@ class Participant(Base):
     notes = Column(Text, nullable=True)
     is_active = Column(Boolean, default=True)
 
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True, index=True)
     user = relationship("User", back_populates="participant", foreign_keys=[user_id], uselist=False)
 
     coach_id = Column(Integer, ForeignKey("participants.id"), nullable=True)
@@ -43,5 +43,11 @@ class Participant(Base):
 
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(
-        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
-    )
\ No newline at end of file
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), index=True
+    )
+
+    __table_args__ = (
+        # Keyset pagination of filtered participant lists
+        Index("ix_participants_type_id", "participant_type", "id"),
+        Index("ix_participants_coach_id_id", "coach_id", "id"),
+    )
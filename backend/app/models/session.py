@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Date, Time, Boolean, ForeignKey, Text, DateTime, func
+from sqlalchemy import Column, Integer, String, Date, Time, Boolean, ForeignKey, Text, DateTime, func, Index
 from sqlalchemy.orm import relationship
 from app.db.session import Base
 
@@ -7,7 +7,7 @@ class Session(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     program_id = Column(Integer, nullable=True)  # future expansion
-    coach_id = Column(Integer, ForeignKey("participants.id", ondelete="SET NULL"), nullable=True)
+    coach_id = Column(Integer, ForeignKey("participants.id", ondelete="SET NULL"), nullable=True, index=True)
     date = Column(Date, nullable=False)
     location = Column(String, nullable=True)
     start_time = Column(Time, nullable=True)
@@ -15,8 +15,16 @@ class Session(Base):
     notes = Column(Text, nullable=True)
     is_online = Column(Boolean, default=False)
 
+    # Id assigned by the coach's device when the row was created offline; makes uploads idempotent
+    client_id = Column(String, nullable=True, unique=True, index=True)
+
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     coach = relationship("Participant", foreign_keys=[coach_id])
-    attendances = relationship("Attendance", back_populates="session", cascade="all, delete-orphan")
\ No newline at end of file
+    attendances = relationship("Attendance", back_populates="session", cascade="all, delete-orphan")
+
+    __table_args__ = (
+        # Latest sessions first, as listed on the coaching page
+        Index("ix_sessions_date_id", "date", "id"),
+    )
\ No newline at end of file
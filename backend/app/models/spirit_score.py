@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.db.session import Base
@@ -22,11 +22,16 @@ class SpiritScore(Base):
     comments = Column(Text, nullable=True)
     submitted_by = Column(Integer, ForeignKey("participants.id"), nullable=True)
 
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
 
     # Relationships
     match = relationship("Match", back_populates="spirit_scores")
     from_team = relationship("Team", foreign_keys=[from_team_id])
     to_team = relationship("Team", foreign_keys=[to_team_id])
 
+    __table_args__ = (
+        Index("ix_spirit_scores_to_team_id", "to_team_id"),
+        Index("ix_spirit_scores_match_from_team", "match_id", "from_team_id"),
+    )
+
 
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Enum, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, Enum, DateTime, Index, func
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from typing import Optional
@@ -21,8 +21,15 @@ class Team(Base):
     status = Column(Enum(TeamStatus), default=TeamStatus.pending)
 
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=True)
 
     # Relationships
     tournament = relationship("Tournament", back_populates="teams")
     manager = relationship("Participant", foreign_keys=[manager_participant_id])
-    members = relationship("TeamMember", back_populates="team", cascade="all, delete-orphan")
\ No newline at end of file
+    members = relationship("TeamMember", back_populates="team", cascade="all, delete-orphan")
+
+    __table_args__ = (
+        Index("ix_teams_tournament_status", "tournament_id", "status"),
+        # Case-insensitive duplicate name check on registration
+        Index("ix_teams_tournament_lower_name", "tournament_id", func.lower(name)),
+    )
\ No newline at end of file
@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Boolean, DateTime, func
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, ForeignKey, Boolean, DateTime, Index, func
+from sqlalchemy.orm import backref, relationship
 from app.db.session import Base
 
 class TeamMember(Base):
@@ -18,5 +18,11 @@ class TeamMember(Base):
 
     # Relationships
     team = relationship("Team", back_populates="members")
-    participant = relationship("Participant", backref="team_memberships")
+    # Deleting a participant leaves their memberships to the FK cascade instead of nulling participant_id
+    participant = relationship("Participant", backref=backref("team_memberships", passive_deletes=True))
+
+    __table_args__ = (
+        Index("ix_team_members_team_id", "team_id"),
+        Index("ix_team_members_participant_id", "participant_id"),
+    )
     
\ No newline at end of file
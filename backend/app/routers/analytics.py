@@ -1,46 +1,41 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.redis import redis_client
 import json
 from datetime import timedelta
-from app.db.session import SessionLocal
+from app.core.deps import get_async_db
 from app.models.tournament import Tournament
 from app.models.team import Team
 from app.models.match import Match
 from app.models.spirit_score import SpiritScore
 from app.models.participant import Participant
 from app.core.rate_limits import public_limiter, heavy_query_limiter
+from app.core.metrics import record_cache
 
 router = APIRouter(prefix="/analytics", tags=["Analytics"])
 
 CACHE_TTL = 300 # 5 min cache
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 
 @router.get("/overview", dependencies=[Depends(public_limiter)])
-async def get_global_analytics(db: Session = Depends(get_db)):
+async def get_global_analytics(db: AsyncSession = Depends(get_async_db)):
     """Return global analytics across all tournaments."""
     
     cache_key = "analytics:global"
 
     cached_data = await redis_client.get(cache_key)
+    record_cache("analytics_global", bool(cached_data))
     if cached_data:
         return json.loads(cached_data)
 
-    total_tournaments = db.query(func.count(Tournament.id)).scalar()
-    total_teams = db.query(func.count(Team.id)).scalar()
-    total_matches = db.query(func.count(Match.id)).scalar()
-    completed_matches = db.query(func.count(Match.id)).filter(Match.status == "completed").scalar()
-    ongoing_matches = db.query(func.count(Match.id)).filter(Match.status == "ongoing").scalar()
-    average_spirit = db.query(func.avg(SpiritScore.total)).scalar() or 0.0
-    total_participants = db.query(func.count(Participant.id)).scalar()
+    total_tournaments = await db.scalar(select(func.count(Tournament.id)))
+    total_teams = await db.scalar(select(func.count(Team.id)))
+    total_matches = await db.scalar(select(func.count(Match.id)))
+    completed_matches = await db.scalar(select(func.count(Match.id)).where(Match.status == "completed"))
+    ongoing_matches = await db.scalar(select(func.count(Match.id)).where(Match.status == "ongoing"))
+    average_spirit = await db.scalar(select(func.avg(SpiritScore.total))) or 0.0
+    total_participants = await db.scalar(select(func.count(Participant.id)))
 
     data = {
         "scope": "global",
@@ -61,29 +56,30 @@ async def get_global_analytics(db: Session = Depends(get_db)):
 
 
 @router.get("/tournaments/{tournament_id}", dependencies=[Depends(heavy_query_limiter)])
-async def get_tournament_analytics(tournament_id: int, db: Session = Depends(get_db)):
+async def get_tournament_analytics(tournament_id: int, db: AsyncSession = Depends(get_async_db)):
     """Return analytics for a specific tournament."""
     
     cache_key = f"analytics:tournament:{tournament_id}"
 
     cached_data = await redis_client.get(cache_key)
+    record_cache("analytics_tournament", bool(cached_data))
     if cached_data:
         return json.loads(cached_data)
     
-    tournament = db.query(Tournament).filter(Tournament.id == tournament_id).first()
+    tournament = await db.get(Tournament, tournament_id)
     if not tournament:
         raise HTTPException(status_code=404, detail="Tournament not found")
 
-    team_count = db.query(func.count(Team.id)).filter(Team.tournament_id == tournament_id).scalar()
-    matches = db.query(Match).filter(Match.tournament_id == tournament_id).all()
+    team_count = await db.scalar(select(func.count(Team.id)).where(Team.tournament_id == tournament_id))
+    statuses = (await db.scalars(select(Match.status).where(Match.tournament_id == tournament_id))).all()
 
-    total_matches = len(matches)
-    completed_matches = len([m for m in matches if m.status == "completed"]) # type: ignore
-    ongoing_matches = len([m for m in matches if m.status == "ongoing"]) # type: ignore
+    total_matches = len(statuses)
+    completed_matches = len([s for s in statuses if s == "completed"])
+    ongoing_matches = len([s for s in statuses if s == "ongoing"])
 
-    average_spirit = db.query(func.avg(SpiritScore.total)).join(Match).filter(
-        Match.tournament_id == tournament_id
-    ).scalar() or 0.0
+    average_spirit = await db.scalar(
+        select(func.avg(SpiritScore.total)).join(Match).where(Match.tournament_id == tournament_id)
+    ) or 0.0
 
     data = {
         "scope": "tournament",
@@ -1,52 +1,87 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.security import OAuth2PasswordRequestForm
 
 from app.models.user import User, RoleEnum
 from app.schemas.user import UserCreate, UserOut
-from app.core.security import hash_password, verify_password, create_access_token
+from app.core.security import create_access_token
+from app.core.password_pool import hash_password_async, verify_password_async
 from app.core.rate_limits import auth_limiter
-from app.core.deps import get_db, get_current_user, require_roles
+from app.core.deps import get_db, get_async_db, get_current_user, require_roles, decode_token, oauth2_scheme
+from app.core.revocation import revocations
+from app.core.config import settings
 from loguru import logger
+from uuid import uuid4
+import time
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
 
 # Register new user (admin-only)
 @router.post("/register", response_model=UserOut, dependencies=[Depends(auth_limiter)])
-def register(
+async def register(
     user: UserCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _: User = Depends(require_roles(RoleEnum.admin.value)),
 ):
     logger.info(f"Registration attempt for username: {user.username}")
-    existing = db.query(User).filter(User.username == user.username).first()
+    existing = await db.scalar(select(User.id).where(User.username == user.username))
     if existing:
         logger.warning(f"Registration failed - username exists: {user.username}")
         raise HTTPException(status_code=400, detail="Username already exists")
-    hashed_pw = hash_password(user.password)
+    hashed_pw = await hash_password_async(user.password)
     new_user = User(username=user.username, hashed_password=hashed_pw, role=user.role)
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
     logger.success(f"User registered: {user.username}")
     return new_user
 
 
 # Login
 @router.post("/login", dependencies=[Depends(auth_limiter)])
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
     logger.info(f"Login attempt for user: {form_data.username}")
-    db_user = db.query(User).filter(User.username == form_data.username).first()
-    if not db_user or not verify_password(form_data.password, db_user.hashed_password):  # type: ignore
+    db_user = await db.scalar(select(User).where(User.username == form_data.username))
+    valid, new_hash = (False, None)
+    if db_user:
+        valid, new_hash = await verify_password_async(form_data.password, db_user.hashed_password)  # type: ignore
+    if not valid:
         logger.warning(f"Login failed for user: {form_data.username}")
         raise HTTPException(status_code=401, detail="Invalid credentials")
-    token = create_access_token({"sub": db_user.username, "role": db_user.role.value})
+    if not db_user.is_active:
+        logger.warning(f"Login refused for inactive user: {form_data.username}")
+        raise HTTPException(status_code=403, detail="User is inactive")
+    if new_hash:
+        db_user.hashed_password = new_hash  # type: ignore
+        await db.commit()
+        logger.info(f"Upgraded password hash for user: {form_data.username}")
+    jti = uuid4().hex
+    token = create_access_token({"sub": db_user.username, "uid": db_user.id, "role": db_user.role.value, "jti": jti})  # type: ignore
+    await revocations.register(db_user.id, jti, time.time() + settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60)  # type: ignore
     logger.success(f"Login successful for user: {form_data.username}")
-    return {"access_token": token, "token_type": "bearer", "role": db_user.role.value}
+    return {"access_token": token, "token_type": "bearer", "role": db_user.role.value}  # type: ignore
 
 
 # ✅ Get current user profile
 @router.get("/me", response_model=UserOut)
 def read_current_user(current_user: User = Depends(get_current_user)):
     return current_user
+
+
+# Revoke the token used for this request
+@router.post("/logout", status_code=204)
+async def logout(token: str = Depends(oauth2_scheme), _: User = Depends(get_current_user)):
+    payload = decode_token(token)
+    if not payload.get("jti"):
+        raise HTTPException(status_code=400, detail="Token predates revocation support; it expires on its own")
+    await revocations.revoke({payload["jti"]: payload["exp"]})
+
+
+# Revoke every live token of a user (admin-only), e.g. a lost scorer device
+@router.post("/users/{user_id}/revoke-sessions")
+async def revoke_user_sessions(user_id: int, _: User = Depends(require_roles(RoleEnum.admin.value))):
+    revoked = await revocations.revoke_user(user_id)
+    logger.warning(f"Revoked {revoked} sessions of user {user_id}")
+    return {"user_id": user_id, "revoked": revoked}
@@ -1,10 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from typing import List
 from datetime import date
+import gzip
 
 from app.core.deps import get_db, require_roles
+from app.db.bulk import bulk_upsert_returning
 from app.models.session import Session as CoachingSession
 from app.models.attendance import Attendance
 from app.models.home_visit import HomeVisit
@@ -15,6 +17,8 @@ from app.schemas.session import SessionCreate, SessionOut
 from app.schemas.attendance import AttendanceCreate, AttendanceOut
 from app.schemas.home_visit import HomeVisitCreate, HomeVisitOut
 from app.schemas.lsas_assessment import LSASAssessmentCreate, LSASAssessmentOut
+from app.schemas.sync import SyncRequest, SyncResponse
+from app.core.coach_sync import coach_scope, decode_sync_token, pull_changes, push_changes
 
 router = APIRouter(prefix="/coaching", tags=["Coaching & Attendance"])
 
@@ -56,23 +60,27 @@ def mark_attendance(
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
 
-    attendances = []
-    for record in records:
-        att = Attendance(
-            participant_id=record.participant_id,
-            session_id=session_id,
-            tournament_id=record.tournament_id,
-            date=record.date or date.today(),
-            present=record.present,
-            marked_by=current_user.id,
-            notes=record.notes,
-        )
-        db.add(att)
-        attendances.append(att)
-
+    rows = [
+        {
+            "participant_id": record.participant_id,
+            "session_id": session_id,
+            "tournament_id": record.tournament_id,
+            "date": record.date or date.today(),
+            "present": record.present,
+            "marked_by": current_user.id,
+            "notes": record.notes,
+        }
+        for record in records
+    ]
+    # Idempotent: resubmitting a session's register updates the existing rows instead of duplicating them
+    stored = bulk_upsert_returning(
+        db, Attendance, rows,
+        key_columns=("session_id", "participant_id"),
+        update_columns=("tournament_id", "date", "present", "marked_by", "notes"),
+        changed_stamp="updated_at",
+    )
+    attendances = [AttendanceOut.model_validate(a) for a in stored]
     db.commit()
-    for att in attendances:
-        db.refresh(att)
     return attendances
 
 @router.post("/participants/{participant_id}/home-visit", response_model=HomeVisitOut)
@@ -153,4 +161,33 @@ def coaching_overview(
         "avg_lsas_score": round(float(avg_lsas), 2),
         "total_home_visits": total_home_visits,
         "total_participants": total_participants,
-    }
\ No newline at end of file
+    }
+
+
+@router.post("/sync", response_model=SyncResponse)
+def sync_device(
+    payload: SyncRequest,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_roles("coach", "manager", "admin")),
+):
+    """
+    One round trip for an offline coach device: apply its queued writes, then
+    return everything changed since its sync token (gzip-compressed when the
+    client accepts it). Repeat with the returned token while has_more is true.
+    """
+    try:
+        decode_sync_token(payload.token)
+    except (ValueError, KeyError, TypeError, IndexError):
+        raise HTTPException(status_code=400, detail="Invalid sync token")
+
+    coach_id = coach_scope(db, current_user)
+    applied, conflicts = push_changes(db, payload.upload, current_user, coach_id)
+    db.commit()
+
+    delta = pull_changes(db, payload.token, coach_id)
+
+    body = SyncResponse(applied=applied, conflicts=conflicts, **delta).model_dump_json().encode() # type: ignore
+    if len(body) > 1024 and "gzip" in request.headers.get("accept-encoding", ""):
+        return Response(gzip.compress(body, compresslevel=6), media_type="application/json", headers={"Content-Encoding": "gzip", "Vary": "Accept-Encoding"})
+    return Response(body, media_type="application/json")
@@ -1,16 +1,15 @@
-import io
-import csv
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session, joinedload
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse, FileResponse
+from sqlalchemy.orm import Session
 from app.db.session import SessionLocal
 from app.models.tournament import Tournament
-from app.models.match import Match
-from app.models.spirit_score import SpiritScore
 from app.core.deps import require_roles
 from app.routers.auth import get_current_user
 from app.models.user import User
-from app.core.rate_limits import heavy_query_limiter
+from app.core.rate_limits import heavy_query_limiter, frequent_action_limiter
+from app.core.export_formats import DATASETS, COLUMNAR_FORMATS, stream_columnar, stream_export_csv, export_delta
+from app.core import export_jobs
 from loguru import logger
 
 router = APIRouter(prefix="/tournaments", tags=["Export"])
@@ -24,6 +23,33 @@ def get_db():
         db.close()
 
 
+def _export_response(db: Session, export_format: str, dataset: str, basename: str, since: str | None, tournament_id: int | None = None):
+    if export_format == "json":
+        try:
+            return JSONResponse(jsonable_encoder(export_delta(db, dataset, tournament_id, since)))
+        except (ValueError, KeyError, TypeError, IndexError):
+            raise HTTPException(status_code=400, detail="Invalid since watermark")
+    if since is not None:
+        raise HTTPException(status_code=400, detail="since is only supported with format=json")
+
+    if export_format == "csv":
+        if dataset != "matches":
+            raise HTTPException(status_code=400, detail="CSV export only supports the matches dataset")
+        return StreamingResponse(
+            stream_export_csv(tournament_id),
+            media_type="text/csv",
+            headers={"Content-Disposition": f"attachment; filename={basename}.csv"}
+        )
+
+    media_type, extension = COLUMNAR_FORMATS[export_format]
+    suffix = "" if dataset == "matches" else f"_{dataset}"
+    return StreamingResponse(
+        stream_columnar(dataset, export_format, tournament_id),
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename={basename}{suffix}.{extension}"}
+    )
+
+
 @router.get(
     "/{tournament_id}/export",
     response_class=StreamingResponse,
@@ -31,135 +57,79 @@ def get_db():
 )
 def export_tournament_data(
     tournament_id: int,
+    export_format: str = Query("csv", alias="format", pattern="^(csv|parquet|arrow|json)$"),
+    dataset: str = Query("matches", pattern=f"^({'|'.join(DATASETS)})$"),
+    since: str | None = Query(None, description="Watermark from a previous format=json export"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    logger.info(f"Export requested for tournament {tournament_id}")
-    # Fetch tournament and its matches
-    tournament = (
-        db.query(Tournament)
-        .options(joinedload(Tournament.matches))
-        .filter(Tournament.id == tournament_id)
-        .first()
-    )
+    logger.info(f"Export requested for tournament {tournament_id} ({dataset}, {export_format})")
+    tournament = db.query(Tournament.id).filter(Tournament.id == tournament_id).first()
     if not tournament:
         raise HTTPException(status_code=404, detail="Tournament not found")
 
-    matches = (
-        db.query(Match)
-        .filter(Match.tournament_id == tournament_id)
-        .options(
-            joinedload(Match.team_a),
-            joinedload(Match.team_b),
-            joinedload(Match.spirit_scores)
-        )
-        .all()
-    )
+    return _export_response(db, export_format, dataset, f"tournament_{tournament_id}_export", since, tournament_id)
 
-    # Prepare CSV
-    buffer = io.StringIO()
-    writer = csv.writer(buffer)
-
-    writer.writerow([
-        "Tournament",
-        "Team A",
-        "Team B",
-        "Score A",
-        "Score B",
-        "Spirit A→B",
-        "Spirit B→A",
-        "Status",
-        "Field",
-        "Start Time"
-    ])
-
-    for match in matches:
-        spirit_a_to_b = next(
-            (s.total for s in match.spirit_scores if s.from_team_id == match.team_a_id),
-            None
-        )
-        spirit_b_to_a = next(
-            (s.total for s in match.spirit_scores if s.from_team_id == match.team_b_id),
-            None
-        )
 
-        writer.writerow([
-            tournament.title,
-            match.team_a.name if match.team_a else "-",
-            match.team_b.name if match.team_b else "-",
-            match.score_a,
-            match.score_b,
-            spirit_a_to_b or "-",
-            spirit_b_to_a or "-",
-            match.status,
-            match.field_id or "-",
-           (match.start_time.strftime("%Y-%m-%d %H:%M") if getattr(match, "start_time", None) else "-")
+@router.get("/export-all", response_class=StreamingResponse, dependencies=[Depends(require_roles("admin")), Depends(heavy_query_limiter)])
+def export_all_tournaments(
+    export_format: str = Query("csv", alias="format", pattern="^(csv|parquet|arrow|json)$"),
+    dataset: str = Query("matches", pattern=f"^({'|'.join(DATASETS)})$"),
+    since: str | None = Query(None, description="Watermark from a previous format=json export"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    logger.info(f"Export all tournaments requested ({dataset}, {export_format})")
+    if not db.query(Tournament.id).first():
+        raise HTTPException(status_code=404, detail="No tournaments found")
 
-        ])
+    return _export_response(db, export_format, dataset, "all_tournaments_export", since)
 
-    buffer.seek(0)
-    filename = f"tournament_{tournament_id}_export.csv"
 
-    return StreamingResponse(
-        iter([buffer.getvalue()]),
-        media_type="text/csv",
-        headers={"Content-Disposition": f"attachment; filename={filename}"}
-    )
+def _job_out(job: dict) -> dict:
+    out = {key: job.get(key) for key in ("job_id", "status", "scope", "dataset", "format", "size", "error")}
+    if job["status"] == "completed":
+        out["download_url"] = f"/tournaments/export-jobs/{job['job_id']}/download"
+    return out
 
 
-@router.get("/export-all", response_class=StreamingResponse, dependencies=[Depends(require_roles("admin")), Depends(heavy_query_limiter)])
-def export_all_tournaments(
+@router.post("/export-jobs", dependencies=[Depends(require_roles("admin")), Depends(frequent_action_limiter)])
+def submit_export_job(
+    tournament_id: int | None = None,
+    export_format: str = Query("csv", alias="format", pattern="^(csv|parquet|arrow)$"),
+    dataset: str = Query("matches", pattern=f"^({'|'.join(DATASETS)})$"),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
 ):
-    logger.info("Export all tournaments requested")
-    tournaments = db.query(Tournament).options(joinedload(Tournament.matches)).all()
-    if not tournaments:
-        raise HTTPException(status_code=404, detail="No tournaments found")
+    """Queue an export in the background; unchanged data resolves to the already rendered artifact."""
+    if export_format == "csv" and dataset != "matches":
+        raise HTTPException(status_code=400, detail="CSV export only supports the matches dataset")
+    if tournament_id is not None and not db.query(Tournament.id).filter(Tournament.id == tournament_id).first():
+        raise HTTPException(status_code=404, detail="Tournament not found")
 
-    buffer = io.StringIO()
-    writer = csv.writer(buffer)
-
-    writer.writerow([
-        "Tournament",
-        "Team A",
-        "Team B",
-        "Score A",
-        "Score B",
-        "Spirit A→B",
-        "Spirit B→A",
-        "Status",
-        "Field",
-        "Start Time"
-    ])
-
-    for tournament in tournaments:
-        for match in tournament.matches:
-            spirit_a_to_b = next(
-                (s.total for s in match.spirit_scores if s.from_team_id == match.team_a_id),
-                None
-            )
-            spirit_b_to_a = next(
-                (s.total for s in match.spirit_scores if s.from_team_id == match.team_b_id),
-                None
-            )
-
-            writer.writerow([
-                tournament.title,
-                match.team_a.name if match.team_a else "-",
-                match.team_b.name if match.team_b else "-",
-                match.score_a,
-                match.score_b,
-                spirit_a_to_b or "-",
-                spirit_b_to_a or "-",
-                match.status,
-                match.field_id or "-",
-                match.start_time.strftime("%Y-%m-%d %H:%M") if match.start_time else "-"
-            ])
-
-    buffer.seek(0)
-    return StreamingResponse(
-        iter([buffer.getvalue()]),
-        media_type="text/csv",
-        headers={"Content-Disposition": "attachment; filename=all_tournaments_export.csv"}
-    )
\ No newline at end of file
+    job = export_jobs.submit_job(db, export_format, dataset, tournament_id)
+    return _job_out(job)
+
+
+@router.get("/export-jobs/{job_id}", dependencies=[Depends(require_roles("admin"))])
+def get_export_job(job_id: str):
+    job = export_jobs.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Export job not found")
+    return _job_out(job)
+
+
+@router.get("/export-jobs/{job_id}/download", dependencies=[Depends(require_roles("admin"))])
+def download_export_job(job_id: str):
+    job = export_jobs.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Export job not found")
+    if job["status"] != "completed":
+        raise HTTPException(status_code=409, detail=f"Export job is {job['status']}")
+
+    path = export_jobs.artifact_path(job)
+    if not path.exists():
+        raise HTTPException(status_code=410, detail="Export artifact has been evicted, submit the job again")
+
+    export_jobs.touch_artifact(job)
+    media_type = "text/csv" if job["format"] == "csv" else COLUMNAR_FORMATS[job["format"]][0]
+    return FileResponse(path, media_type=media_type, filename=job["filename"])
@@ -1,12 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import func, case
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import func, case, select, update, or_
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from datetime import datetime, timedelta
-import json
-from collections import defaultdict
+from datetime import datetime, time, timedelta
+from itertools import groupby
+from anyio import from_thread
 
 from app.db.session import SessionLocal
+from app.db.bulk import bulk_insert_returning
 from app.models.match import Match, MatchStatus
 from app.models.tournament import Tournament
 from app.models.team import Team, TeamStatus
@@ -17,13 +19,24 @@ from app.schemas.match import (
     MatchUpdate,
     MatchScoreUpdate,
     TournamentScheduleOut,
+    BracketFormatIn,
+    ScheduleConflictOut,
+    RescheduleIn,
+    RescheduleOut,
 )
 from app.core.redis import publish
 from app.routers.auth import get_current_user
 from app.models.user import User
-from app.core.deps import require_roles
-from app.core.rate_limits import frequent_action_limiter
-from app.core.cache_utils import invalidate_tournament_analytics
+from app.core.deps import require_roles, get_async_db
+from app.core.pagination import Page, page_params, paginate
+from app.core.query_stats import query_budget
+from app.core.metrics import record_cache
+from app.core.rate_limits import frequent_action_limiter, scoring_limiter
+from app.core.cache_utils import invalidate_tournament_analytics, invalidate_tournament_schedule, read_tournament_schedule, cache_tournament_schedule
+from app.core.leaderboard_cache import apply_match_change, apply_spirit_score, match_snapshot
+from app.core.scheduling import schedule_matches, schedule_round_robin, tournament_fields
+from app.core.tournament_formats import advance_bracket, build_format, render_source
+from app.core.schedule_index import load_index, remember_index, forget_index
 from loguru import logger
 
 router = APIRouter(prefix="/matches", tags=["Matches"])
@@ -36,6 +49,17 @@ def get_db():
         db.close()
 
 
+async def _load_match(db: AsyncSession, match_id: int) -> Match | None:
+    # spirit_scores is part of MatchOut, so load it up front (no lazy loads under asyncio)
+    result = await db.execute(
+        select(Match)
+        .options(selectinload(Match.spirit_scores))
+        .where(Match.id == match_id)
+        .execution_options(populate_existing=True)
+    )
+    return result.scalar_one_or_none()
+
+
 @router.post(
     "/",
     response_model=MatchOut,
@@ -43,17 +67,17 @@ def get_db():
 )
 async def create_match(
     match_data: MatchCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     logger.info(f"Creating match: Tournament {match_data.tournament_id}, Team {match_data.team_a_id} vs {match_data.team_b_id}")
-    tournament = db.query(Tournament).filter(Tournament.id == match_data.tournament_id).first()
+    tournament = await db.get(Tournament, match_data.tournament_id)
     if not tournament:
         raise HTTPException(status_code=404, detail="Tournament not found")
 
     # Check if both teams exist in the same tournament and are approved
     for team_id in [match_data.team_a_id, match_data.team_b_id]:
-        team = db.query(Team).filter(Team.id == team_id, Team.tournament_id == tournament.id).first()
+        team = await db.scalar(select(Team).where(Team.id == team_id, Team.tournament_id == tournament.id))
         if not team:
             raise HTTPException(status_code=404, detail=f"Team {team_id} not found in tournament")
         if team.status != TeamStatus.approved:
@@ -61,20 +85,33 @@ async def create_match(
 
     new_match = Match(**match_data.model_dump())
     db.add(new_match)
-    db.commit()
-    db.refresh(new_match)
+    await db.commit()
+    new_match = await _load_match(db, new_match.id) # type: ignore
     logger.success(f"Match {new_match.id} created")
+    await apply_match_change(match_data.tournament_id, new_match.id, match_snapshot(new_match))
     await invalidate_tournament_analytics(match_data.tournament_id)
+    await invalidate_tournament_schedule(match_data.tournament_id)
     return new_match
 
 
-@router.get("/", response_model=List[MatchOut])
+@router.get("/", response_model=List[MatchOut], dependencies=[Depends(query_budget(3))])
 def list_matches(
+    response: Response,
+    tournament_id: int | None = None,
+    status: MatchStatus | None = None,
+    team_id: int | None = None,
+    page: Page = Depends(page_params),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    matches = db.query(Match).all()
-    return matches
+    query = select(Match).options(selectinload(Match.spirit_scores))
+    if tournament_id is not None:
+        query = query.where(Match.tournament_id == tournament_id)
+    if status is not None:
+        query = query.where(Match.status == status)
+    if team_id is not None:
+        query = query.where(or_(Match.team_a_id == team_id, Match.team_b_id == team_id))
+    return paginate(db, query, (Match.id,), page, response)
 
 
 @router.get("/{match_id}", response_model=MatchOut)
@@ -85,24 +122,26 @@ def get_match(match_id: int, db: Session = Depends(get_db)):
     return match
 
 
-@router.patch("/{match_id}/score", response_model=MatchOut, dependencies=[Depends(frequent_action_limiter)])
+@router.patch("/{match_id}/score", response_model=MatchOut, dependencies=[Depends(scoring_limiter)])
 async def update_score(
     match_id: int,
     score_data: MatchScoreUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     logger.info(f"Updating score for match {match_id}: {score_data.score_a}-{score_data.score_b}")
-    match = db.query(Match).filter(Match.id == match_id).first()
+    match = await _load_match(db, match_id)
     if not match:
         raise HTTPException(status_code=404, detail="Match not found")
 
     match.score_a = score_data.score_a # type: ignore
     match.score_b = score_data.score_b # type: ignore
     match.status = score_data.status # type: ignore
+    # Evaluated under the row lock, so concurrent updates get distinct versions
+    match.score_version = func.coalesce(Match.score_version, 0) + 1 # type: ignore
     tournament_id = match.tournament_id
-    db.commit()
-    db.refresh(match)
+    await db.commit()
+    match = await _load_match(db, match_id)
 
     # Publish live update to Redis
     await publish(f"live:match:{match_id}", {
@@ -113,27 +152,60 @@ async def update_score(
 })
 
     logger.success(f"Match {match_id} score updated and broadcast")
+    await apply_match_change(tournament_id, match_id, match_snapshot(match)) # type: ignore
     await invalidate_tournament_analytics(tournament_id) # type: ignore
+    await advance_bracket(db, match) # type: ignore
+    await invalidate_tournament_schedule(tournament_id) # type: ignore
     return match
 
 
 @router.delete("/{match_id}", status_code=204, dependencies=[Depends(frequent_action_limiter)])
 async def delete_match(
     match_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    match = db.query(Match).filter(Match.id == match_id).first()
+    match = await db.get(Match, match_id)
     if not match:
         raise HTTPException(status_code=404, detail="Match not found")
     
     tournament_id = match.tournament_id
-    db.delete(match)
-    db.commit()
+    # Spirit scores go with the match (cascade); take them out of the standings too
+    spirit_scores = (await db.execute(
+        select(SpiritScore.id, SpiritScore.to_team_id, SpiritScore.total).where(SpiritScore.match_id == match_id)
+    )).all()
+    await db.delete(match)
+    await db.commit()
     logger.info(f"Match {match_id} deleted")
+    await apply_match_change(tournament_id, match_id, None) # type: ignore
+    for spirit in spirit_scores:
+        await apply_spirit_score(tournament_id, spirit.id, spirit.to_team_id, spirit.total, sign=-1) # type: ignore
     await invalidate_tournament_analytics(tournament_id) # type: ignore
+    await invalidate_tournament_schedule(tournament_id) # type: ignore
     return None
 
+def _generation_input(db: Session, tournament_id: int, day_start: time, day_end: time) -> tuple:
+    """Validate a match generation request; returns the tournament and its approved team ids."""
+    tournament = db.query(Tournament).filter(Tournament.id == tournament_id).first()
+    if not tournament:
+        raise HTTPException(status_code=404, detail="Tournament not found")
+    if day_end <= day_start:
+        raise HTTPException(status_code=400, detail="day_end must be after day_start")
+
+    team_ids = db.scalars(
+        select(Team.id)
+        .where(Team.tournament_id == tournament_id, Team.status == TeamStatus.approved)
+        .order_by(Team.id)
+    ).all()
+    if len(team_ids) < 2:
+        raise HTTPException(status_code=400, detail="At least two approved teams required")
+    
+    existing_matches = db.query(Match).filter(Match.tournament_id == tournament_id).count()
+    if existing_matches > 0:
+        raise HTTPException(status_code=400, detail="Matches have already been generated for this tournament")
+    return tournament, list(team_ids)
+
+
 @router.post(
     "/tournaments/{tournament_id}/generate-matches",
     response_model=List[MatchOut],
@@ -141,114 +213,222 @@ async def delete_match(
 )
 def generate_matches(
     tournament_id: int,
+    match_minutes: int = Query(60, ge=10, le=240),
+    rest_minutes: int = Query(60, ge=0, le=24 * 60),
+    day_start: time = Query(time(9, 0)),
+    day_end: time = Query(time(18, 0)),
     db: Session = Depends(get_db),
     current_user = Depends(get_current_user),
 ):
-    tournament = db.query(Tournament).filter(Tournament.id == tournament_id).first()
-    if not tournament:
-        raise HTTPException(status_code=404, detail="Tournament not found")
+    tournament, team_ids = _generation_input(db, tournament_id, day_start, day_end)
 
-    teams = (
-        db.query(Team)
-        .filter(Team.tournament_id == tournament_id, Team.status == TeamStatus.approved)
-        .all()
-    )
-    if len(teams) < 2:
-        raise HTTPException(status_code=400, detail="At least two approved teams required")
-    
-    existing_matches = db.query(Match).filter(Match.tournament_id == tournament_id).count()
-    if existing_matches > 0:
-        raise HTTPException(status_code=400, detail="Matches have already been generated for this tournament")
-    
     try:
-        fields = json.loads(tournament.fields_json) if tournament.fields_json else [] # type: ignore
-    except Exception:
-        fields = [tournament.fields_json] if tournament.fields_json else [] # type: ignore
-
-    if not fields:
-        fields = ["Field A", "Field B"]
-
-    start_date = tournament.start_date or datetime.utcnow().date()
-    start_time = datetime.combine(start_date, datetime.min.time()) + timedelta(hours=9)  # type: ignore # 9 AM start
-    time_gap = timedelta(minutes=60)  # 1 hour per match
-
-    new_matches = []
-    field_index = 0
-
-    for i in range(len(teams)):
-        for j in range(i + 1, len(teams)):
-            field_id = fields[field_index % len(fields)]
-            match = Match (
-                tournament_id=tournament_id,
-                team_a_id=teams[i].id,
-                team_b_id=teams[j].id,
-                field_id=field_id,
-                start_time=start_time,
-                status=MatchStatus.scheduled
-            )
-            db.add(match)
-            new_matches.append(match)
-
-            field_index += 1
-            start_time += time_gap
+        schedule = schedule_round_robin(
+            team_ids,
+            tournament_fields(tournament),
+            tournament.start_date or datetime.utcnow().date(), # type: ignore
+            match_minutes=match_minutes,
+            rest_minutes=rest_minutes,
+            day_start=day_start,
+            day_end=day_end,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    rows = [{**m, "tournament_id": tournament_id, "status": MatchStatus.scheduled} for m in schedule]
+
+    new_matches = bulk_insert_returning(db, Match, rows, empty_collections=("spirit_scores",))
+    result = [MatchOut.model_validate(m, from_attributes=True) for m in new_matches]
+    db.commit()
+    from_thread.run(invalidate_tournament_schedule, tournament_id)
 
+    logger.info(f"Generated {len(result)} matches for tournament {tournament_id}")
+    return result
+
+
+@router.post(
+    "/tournaments/{tournament_id}/generate-bracket",
+    response_model=List[MatchOut],
+    dependencies=[Depends(require_roles("admin", "manager"))],
+)
+def generate_bracket(
+    tournament_id: int,
+    options: BracketFormatIn,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user),
+):
+    """
+    Generate seeded pools, optional crossovers and a single or double
+    elimination bracket. Bracket slots are filled automatically as the
+    matches feeding them are completed.
+    """
+    tournament, team_ids = _generation_input(db, tournament_id, options.day_start, options.day_end)
+
+    seeds = list(dict.fromkeys(options.seeds or []))
+    unknown = set(seeds) - set(team_ids)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Seeded teams are not approved in this tournament: {sorted(unknown)}")
+    seeded = set(seeds)
+    seeds += [t for t in team_ids if t not in seeded]
+
+    try:
+        specs = build_format(seeds, options.pool_count, options.advance_per_pool, options.crossovers, options.elimination)
+        schedule = schedule_matches(
+            specs,
+            tournament_fields(tournament),
+            tournament.start_date or datetime.utcnow().date(), # type: ignore
+            match_minutes=options.match_minutes,
+            rest_minutes=options.rest_minutes,
+            day_start=options.day_start,
+            day_end=options.day_end,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    rows = [
+        {**m, "source_a": None, "source_b": None, "tournament_id": tournament_id, "status": MatchStatus.scheduled}
+        for m in schedule
+    ]
+
+    new_matches = bulk_insert_returning(db, Match, rows, empty_collections=("spirit_scores",))
+    # Sources reference match ids, which only exist now
+    match_ids = [m.id for m in new_matches]
+    for m, spec in zip(new_matches, specs):
+        if spec["source_a"] or spec["source_b"]:
+            m.source_a = render_source(spec["source_a"], match_ids) # type: ignore
+            m.source_b = render_source(spec["source_b"], match_ids) # type: ignore
+    db.flush()
+    result = [MatchOut.model_validate(m, from_attributes=True) for m in new_matches]
     db.commit()
+    from_thread.run(invalidate_tournament_schedule, tournament_id)
 
-    for m in new_matches:
-        db.refresh(m)
+    logger.info(f"Generated {len(result)} {options.elimination}-elimination matches for tournament {tournament_id} ({options.pool_count} pools)")
+    return result
 
-    return new_matches
+SCHEDULE_CACHE_TTL = 3600  # invalidated explicitly on every match change
 
-@router.get("/tournaments/{tournament_id}/schedule", response_model=TournamentScheduleOut)
-def get_tournament_schedule(tournament_id: int, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
-    tournament = db.query(Tournament).filter(Tournament.id == tournament_id).first()
-    if not tournament:
+
+@router.get(
+    "/tournaments/{tournament_id}/schedule",
+    response_model=TournamentScheduleOut,
+    dependencies=[Depends(query_budget(3))],
+)
+async def get_tournament_schedule(
+    tournament_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(get_current_user),
+):
+    """
+    Matches grouped by day and field. The serialized JSON is cached in Redis,
+    so hot reads skip both the database and response validation. A body is
+    only cached if no match changed while it was being built.
+    """
+    try:
+        cached, version = await read_tournament_schedule(tournament_id)
+    except Exception as e:
+        logger.warning(f"Failed to read schedule cache for tournament {tournament_id}: {e}")
+        cached, version = None, None
+    record_cache("schedule", bool(cached))
+    if cached:
+        return Response(content=cached, media_type="application/json")
+
+    title = await db.scalar(select(Tournament.title).where(Tournament.id == tournament_id))
+    if title is None:
         raise HTTPException(status_code=404, detail="Tournament not found")
-    
-    matches = (
-        db.query(Match)
-        .filter(Match.tournament_id == tournament_id)
-        .order_by(Match.start_time)
-        .all()
-    )
 
-    if not matches:
+    # Grouping order comes from the database: day, then field (byte order, like Python's sort), then kick-off
+    day = func.date(Match.start_time)
+    field = func.coalesce(Match.field_id, "Unknown Field").collate("C")
+    rows = (await db.execute(
+        select(
+            day.label("day"), field.label("field"),
+            Match.id, Match.team_a_id, Match.team_b_id, Match.score_a, Match.score_b,
+            Match.status, Match.start_time, Match.end_time,
+        )
+        .where(Match.tournament_id == tournament_id)
+        .order_by(day.asc().nulls_last(), field, Match.start_time.asc().nulls_first(), Match.id)
+    )).all()
+
+    if not rows:
         raise HTTPException(status_code=404, detail="No matches found for this tournament")
 
-    grouped = defaultdict(lambda: defaultdict(list))
-
-    for m in matches:
-        field = m.field_id or "Unknown Field"
-        date = m.start_time.date().isoformat() if m.start_time else "Unknown Date"  # type: ignore
-
-        grouped[date][field].append({
-            "match_id": m.id,
-            "team_a_id": m.team_a_id,
-            "team_b_id": m.team_b_id,
-            "score_a": m.score_a,
-            "score_b": m.score_b,
-            "status": getattr(m.status, "value", m.status),
-            "start_time": m.start_time,
-            "end_time": m.end_time,
-        })
     schedule = []
-    for date, fields in grouped.items():
-        sorted_fields = []
-        for field_id, matches_list in fields.items():
-            sorted_matches = sorted(matches_list, key=lambda x: x["start_time"] or datetime.min)
-            sorted_fields.append({
+    for day_value, day_rows in groupby(rows, key=lambda r: r.day):
+        fields = []
+        for field_id, field_rows in groupby(day_rows, key=lambda r: r.field):
+            fields.append({
                 "field_id": field_id,
-                "matches": sorted_matches,
+                "matches": [
+                    {
+                        "match_id": r.id,
+                        "team_a_id": r.team_a_id,
+                        "team_b_id": r.team_b_id,
+                        "score_a": r.score_a,
+                        "score_b": r.score_b,
+                        "status": getattr(r.status, "value", r.status),
+                        "start_time": r.start_time,
+                        "end_time": r.end_time,
+                    }
+                    for r in field_rows
+                ],
             })
-        schedule.append({
-            "date": date,
-            "fields": sorted(sorted_fields, key=lambda x: x["field_id"]),
-        })
+        schedule.append({"date": day_value.isoformat() if day_value else "Unknown Date", "fields": fields})
+
+    body = TournamentScheduleOut(tournament_id=tournament_id, tournament_title=title, schedule=schedule).model_dump_json() # type: ignore
+    try:
+        if version is not None:
+            await cache_tournament_schedule(tournament_id, version, SCHEDULE_CACHE_TTL, body)
+    except Exception as e:
+        logger.warning(f"Failed to cache schedule for tournament {tournament_id}: {e}")
+    return Response(content=body, media_type="application/json")
+
 
-    schedule = sorted(schedule, key=lambda x: x["date"])
+@router.get("/tournaments/{tournament_id}/conflicts", response_model=List[ScheduleConflictOut])
+def get_schedule_conflicts(tournament_id: int, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
+    """Double-booked teams and overlapping matches on the same field."""
+    index = load_index(db, tournament_id)
+    with index.lock:
+        return index.conflicts()
 
+
+@router.post(
+    "/tournaments/{tournament_id}/reschedule",
+    response_model=RescheduleOut,
+    dependencies=[Depends(require_roles("admin", "manager"))],
+)
+def reschedule_match(
+    tournament_id: int,
+    payload: RescheduleIn,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user),
+):
+    """
+    Delay (or bring forward) one match and push back every later match that
+    would now overlap it through a shared team or field, transitively.
+    All moved matches are written in a single transaction.
+    """
+    index = load_index(db, tournament_id)
+    with index.lock:
+        if payload.match_id not in index.slots:
+            raise HTTPException(status_code=404, detail="Scheduled match not found in this tournament")
+        try:
+            moved = index.shift(payload.match_id, timedelta(minutes=payload.delay_minutes), timedelta(minutes=payload.gap_minutes))
+            conflicts = [c for match_id in moved for c in index.conflicts_for(match_id)]
+            if payload.dry_run:
+                forget_index(tournament_id)
+            else:
+                db.execute(update(Match), [
+                    {"id": match_id, "start_time": start, "end_time": end} for match_id, (start, end) in moved.items()
+                ])
+                db.commit()
+                remember_index(db, tournament_id, index)
+        except Exception:
+            forget_index(tournament_id)
+            raise
+
+    if not payload.dry_run:
+        from_thread.run(invalidate_tournament_schedule, tournament_id)
+        logger.info(f"Rescheduled {len(moved)} matches in tournament {tournament_id} after match {payload.match_id}")
+    unique_conflicts = {tuple(c["match_ids"]) + (c["kind"], c["resource"]): c for c in conflicts}
     return {
-        "tournament_id": tournament_id,
-        "tournament_title": tournament.title,
-        "schedule": schedule,
+        "moved": [{"match_id": m, "start_time": start, "end_time": end} for m, (start, end) in sorted(moved.items(), key=lambda i: i[1])],
+        "conflicts": list(unique_conflicts.values()),
     }
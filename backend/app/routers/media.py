@@ -2,16 +2,19 @@ import os
 import uuid
 import time
 from typing import List
-from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException
+from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, Response
 from fastapi.responses import FileResponse
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.session import SessionLocal
 from app.models.media import Media
 from app.models.participant import Participant
 from app.schemas.media import MediaOut
 from app.routers.auth import get_current_user, User
 from app.core.rate_limits import media_upload_limiter, public_limiter
-from app.core.deps import require_roles
+from app.core.deps import require_roles, get_async_db
+from app.core.pagination import Page, page_params, paginate
 from loguru import logger
 from pathlib import Path
 
@@ -39,7 +42,7 @@ async def upload_tournament_media(
     file: UploadFile = File(...),
     caption: str | None = Form(None),
     is_public: bool = Form(True),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     logger.info(f"Media upload: {file.filename} for tournament {tournament_id}")
@@ -63,8 +66,8 @@ async def upload_tournament_media(
         is_public=is_public
     )
     db.add(media)
-    db.commit()
-    db.refresh(media)
+    await db.commit()
+    await db.refresh(media)
     logger.success(f"Media uploaded: {file.filename}")
     return media
 
@@ -76,10 +79,10 @@ async def upload_tournament_media(
 async def upload_home_visit_media(
     participant_id: int,
     files: List[UploadFile] = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
-    participant = db.query(Participant).filter(Participant.id == participant_id).first()
+    participant = await db.get(Participant, participant_id)
     if not participant:
         raise HTTPException(status_code=404, detail="Participant not found")
 
@@ -111,8 +114,17 @@ async def upload_home_visit_media(
     return {"photos": stored_paths, "upload_id": upload_id}
 
 @router.get("/tournaments/{tournament_id}/gallery", response_model=list[MediaOut], dependencies=[Depends(public_limiter)])
-def tournament_gallery(tournament_id: int, db: Session = Depends(get_db)):
-    return db.query(Media).filter(Media.tournament_id == tournament_id, Media.is_public == True).order_by(Media.created_at.desc()).all()
+def tournament_gallery(
+    tournament_id: int,
+    response: Response,
+    match_id: int | None = None,
+    page: Page = Depends(page_params),
+    db: Session = Depends(get_db),
+):
+    query = select(Media).where(Media.tournament_id == tournament_id, Media.is_public == True)
+    if match_id is not None:
+        query = query.where(Media.match_id == match_id)
+    return paginate(db, query, (Media.created_at, Media.id), page, response, descending=True)
 
 @router.get("/files/{filename}", dependencies=[Depends(public_limiter)])
 def media_file(filename: str):
@@ -138,10 +150,10 @@ def home_visit_media(upload_id: str, filename: str):
 @router.delete("/{media_id}", status_code=204, dependencies=[Depends(require_roles("admin"))])
 async def delete_media(
     media_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    media = db.query(Media).filter(Media.id == media_id).first()
+    media = await db.get(Media, media_id)
     if not media:
         raise HTTPException(status_code=404, detail="Media not found")
     
@@ -150,8 +162,8 @@ async def delete_media(
     file_path = MEDIA_DIR / filename
     
     # Delete from database
-    db.delete(media)
-    db.commit()
+    await db.delete(media)
+    await db.commit()
     
     # Delete physical file if it exists
     if file_path.exists():
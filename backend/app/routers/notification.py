@@ -1,9 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.session import SessionLocal
 from app.models.notification import Notification
 from app.schemas.notification import NotificationCreate, NotificationOut
 from app.routers.auth import get_current_user
+from app.core.deps import get_async_db
+from app.core.pagination import Page, page_params, paginate
 from app.models.user import User
 from app.core.redis import publish
 from typing import List
@@ -18,16 +22,27 @@ def get_db():
         db.close()
 
 @router.get("/", response_model=List[NotificationOut])
-def list_notifications(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    notifications = db.query(Notification).filter(Notification.user_id == current_user.id).order_by(Notification.created_at.desc()).all()
-    return notifications
+def list_notifications(
+    response: Response,
+    is_read: bool | None = None,
+    type: str | None = None,
+    page: Page = Depends(page_params),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    query = select(Notification).where(Notification.user_id == current_user.id)
+    if is_read is not None:
+        query = query.where(Notification.is_read == is_read)
+    if type is not None:
+        query = query.where(Notification.type == type)
+    return paginate(db, query, (Notification.created_at, Notification.id), page, response, descending=True)
 
 @router.post("/", response_model=NotificationOut)
-async def create_notification(notif: NotificationCreate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def create_notification(notif: NotificationCreate, db: AsyncSession = Depends(get_async_db), current_user: User = Depends(get_current_user)):
     new_notif = Notification(**notif.model_dump())
     db.add(new_notif)
-    db.commit()
-    db.refresh(new_notif)
+    await db.commit()
+    await db.refresh(new_notif)
 
     await publish(f"notify:user:{notif.user_id}", {
         "type": notif.type,
@@ -1,10 +1,12 @@
-from fastapi import Depends, HTTPException, APIRouter
+from fastapi import Depends, HTTPException, APIRouter, Response
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from typing import List
 from app.routers.auth import get_db
-from app.models.participant import Participant
+from app.models.participant import Participant, ParticipantStatus, ParticipantType
 from app.schemas.participant import ParticipantCreate, ParticipantOut
 from app.core.deps import require_roles
+from app.core.pagination import Page, page_params, paginate
 
 router = APIRouter(prefix="/participants", tags=["participants"])
 
@@ -17,9 +19,22 @@ def create_participant(participant: ParticipantCreate, db: Session = Depends(get
     return new_participant
 
 @router.get("/", response_model=List[ParticipantOut])
-def list_participants(db: Session = Depends(get_db)):
-    participants = db.query(Participant).all()
-    return participants
+def list_participants(
+    response: Response,
+    participant_type: ParticipantType | None = None,
+    current_status: ParticipantStatus | None = None,
+    coach_id: int | None = None,
+    page: Page = Depends(page_params),
+    db: Session = Depends(get_db),
+):
+    query = select(Participant)
+    if participant_type is not None:
+        query = query.where(Participant.participant_type == participant_type)
+    if current_status is not None:
+        query = query.where(Participant.current_status == current_status)
+    if coach_id is not None:
+        query = query.where(Participant.coach_id == coach_id)
+    return paginate(db, query, (Participant.id,), page, response)
 
 @router.get("/{participant_id}", response_model=ParticipantOut)
 def get_participant(participant_id: int, db: Session = Depends(get_db)):
@@ -1,22 +1,23 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.routers.auth import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.deps import get_async_db
 from app.models.spirit_score import SpiritScore
 from app.models.match import Match
 from app.schemas.spirit_score import SpiritScoreCreate, SpiritScoreOut
 from app.core.redis import publish
-from app.core.rate_limits import frequent_action_limiter
+from app.core.rate_limits import scoring_limiter
 from app.core.cache_utils import invalidate_tournament_analytics
+from app.core.leaderboard_cache import apply_spirit_score
 from loguru import logger
 from datetime import datetime
 
 router = APIRouter(prefix="/spirit", tags=["Spirit Scores"])
 
-@router.post("/", response_model=SpiritScoreOut, dependencies=[Depends(frequent_action_limiter)])
-async def submit_spirit_score(payload: SpiritScoreCreate, db: Session = Depends(get_db)):
+@router.post("/", response_model=SpiritScoreOut, dependencies=[Depends(scoring_limiter)])
+async def submit_spirit_score(payload: SpiritScoreCreate, db: AsyncSession = Depends(get_async_db)):
     """Submit spirit score for a completed match."""
     logger.info(f"Spirit score submission: Match {payload.match_id}, Team {payload.from_team_id} -> Team {payload.to_team_id}")
-    match = db.query(Match).filter(Match.id == payload.match_id).first()
+    match = await db.get(Match, payload.match_id)
     if not match:
         raise HTTPException(status_code=404, detail="Match not found")
 
@@ -46,8 +47,8 @@ async def submit_spirit_score(payload: SpiritScoreCreate, db: Session = Depends(
 
     tournament_id = match.tournament_id
     db.add(spirit)
-    db.commit()
-    db.refresh(spirit)
+    await db.commit()
+    await db.refresh(spirit)
 
     # publish update to Redis
     await publish(f"live:match:{payload.match_id}", {
@@ -67,5 +68,6 @@ async def submit_spirit_score(payload: SpiritScoreCreate, db: Session = Depends(
     })
 
     logger.success(f"Spirit score submitted: Total {total}/20")
+    await apply_spirit_score(tournament_id, spirit.id, payload.to_team_id, total) # type: ignore
     await invalidate_tournament_analytics(tournament_id) # type: ignore
     return spirit
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import func
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.routers.auth import get_db
 from app.models.team import Team, TeamStatus
 from app.models.tournament import Tournament
@@ -8,8 +9,9 @@ from app.schemas.team import TeamCreate, TeamOut
 from typing import List, Optional
 from app.routers.auth import get_current_user
 from app.core.rate_limits import frequent_action_limiter
-from app.core.cache_utils import invalidate_tournament_analytics
-from app.core.deps import require_roles
+from app.core.cache_utils import invalidate_tournament_analytics, invalidate_tournament_schedule
+from app.core.leaderboard_cache import add_team, drop_leaderboard
+from app.core.deps import require_roles, get_async_db
 
 router = APIRouter(prefix="/tournaments", tags=["Teams"])
 
@@ -17,17 +19,17 @@ router = APIRouter(prefix="/tournaments", tags=["Teams"])
 async def register_team(
     tournament_id: int,
     team: TeamCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user=Depends(get_current_user)
 ):
-    tournament = db.query(Tournament).filter(Tournament.id == tournament_id).first()
+    tournament = await db.get(Tournament, tournament_id)
     if not tournament:
         raise HTTPException(status_code=404, detail="Tournament not found")
 
-    existing_team = db.query(Team).filter(
+    existing_team = await db.scalar(select(Team).where(
         Team.tournament_id == tournament_id,
         func.lower(Team.name) == func.lower(team.name)
-    ).first()
+    ).limit(1))
 
     if existing_team:
         raise HTTPException(
@@ -41,8 +43,9 @@ async def register_team(
         manager_participant_id=team.manager_participant_id
     )
     db.add(new_team)
-    db.commit()
-    db.refresh(new_team)
+    await db.commit()
+    await db.refresh(new_team)
+    await add_team(tournament_id, new_team.id, new_team.name) # type: ignore
     await invalidate_tournament_analytics(tournament_id)
     return new_team
 
@@ -70,16 +73,16 @@ def list_teams(
 )
 async def approve_team(
     team_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    team = db.query(Team).filter(Team.id == team_id).first()
+    team = await db.get(Team, team_id)
     if not team:
         raise HTTPException(status_code=404, detail="Team not found")
 
     team.status = TeamStatus.approved # type: ignore
     tournament_id = team.tournament_id
-    db.commit()
-    db.refresh(team)
+    await db.commit()
+    await db.refresh(team)
     await invalidate_tournament_analytics(tournament_id) # type: ignore
     return team
 
@@ -87,15 +90,18 @@ async def approve_team(
 @router.delete("/teams/{team_id}", status_code=204, dependencies=[Depends(frequent_action_limiter)])
 async def delete_team(
     team_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user=Depends(get_current_user)
 ):
-    team = db.query(Team).filter(Team.id == team_id).first()
+    team = await db.get(Team, team_id)
     if not team:
         raise HTTPException(status_code=404, detail="Team not found")
     
     tournament_id = team.tournament_id
-    db.delete(team)
-    db.commit()
+    await db.delete(team)
+    await db.commit()
+    # Cascaded match deletes change opponents' standings too, so rebuild on next read
+    await drop_leaderboard(tournament_id) # type: ignore
     await invalidate_tournament_analytics(tournament_id) # type: ignore
+    await invalidate_tournament_schedule(tournament_id) # type: ignore
     return None
\ No newline at end of file
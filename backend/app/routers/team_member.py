@@ -1,7 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from typing import List
 from app.db.session import SessionLocal
+from app.db.bulk import bulk_insert_returning
 from app.models.team_member import TeamMember
 from app.models.team import Team
 from app.models.participant import Participant
@@ -30,25 +32,24 @@ def add_team_members(
     if not team:
         raise HTTPException(status_code=404, detail="Team not found")
 
-    created_members = []
+    participant_ids = {m.participant_id for m in members}
+    found = set(db.scalars(select(Participant.id).where(Participant.id.in_(participant_ids))).all())
     for member_data in members:
-        participant = db.query(Participant).filter(Participant.id == member_data.participant_id).first()
-        if not participant:
+        if member_data.participant_id not in found:
             raise HTTPException(status_code=404, detail=f"Participant {member_data.participant_id} not found")
 
-        new_member = TeamMember(
-            team_id=team_id,
-            participant_id=participant.id,
-            role=member_data.role,
-            jersey_number=member_data.jersey_number,
-            is_active=member_data.is_active
-        )
-        db.add(new_member)
-        created_members.append(new_member)
-
+    rows = [
+        {
+            "team_id": team_id,
+            "participant_id": member_data.participant_id,
+            "role": member_data.role,
+            "jersey_number": member_data.jersey_number,
+            "is_active": member_data.is_active,
+        }
+        for member_data in members
+    ]
+    created_members = [TeamMemberOut.model_validate(m) for m in bulk_insert_returning(db, TeamMember, rows)]
     db.commit()
-    for m in created_members:
-        db.refresh(m)
     return created_members
 
 
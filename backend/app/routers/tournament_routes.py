@@ -1,12 +1,14 @@
 from fastapi import Depends, APIRouter, HTTPException, status
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from .auth import get_db
 from app.models.tournament import Tournament
 from app.schemas.tournament import TournamentCreate, TournamentOut
-from app.core.deps import require_roles
+from app.core.deps import require_roles, get_async_db
 from .auth import get_current_user
 from app.core.rate_limits import public_limiter, frequent_action_limiter
-from app.core.cache_utils import invalidate_global_analytics, invalidate_tournament_analytics
+from app.core.cache_utils import invalidate_global_analytics, invalidate_tournament_analytics, invalidate_tournament_schedule
+from app.core.leaderboard_cache import drop_leaderboard
 from loguru import logger
 
 router = APIRouter(prefix="/tournaments", tags=["tournaments"])
@@ -25,13 +27,13 @@ def get_tournament(tournament_id: int, db: Session = Depends(get_db)):
 
 @router.post("/", response_model=TournamentOut, status_code=status.HTTP_201_CREATED, dependencies=[Depends(frequent_action_limiter)])
 async def create_tournament(
-    tournament_data: TournamentCreate, db: Session = Depends(get_db), current_user=Depends(require_roles("admin", "manager")),
+    tournament_data: TournamentCreate, db: AsyncSession = Depends(get_async_db), current_user=Depends(require_roles("admin", "manager")),
 ):
     logger.info(f"Creating tournament: {tournament_data.title}")
     new_tournament = Tournament(**tournament_data.dict(), created_by=current_user.id)
     db.add(new_tournament)
-    db.commit()
-    db.refresh(new_tournament)
+    await db.commit()
+    await db.refresh(new_tournament)
     logger.success(f"Tournament created: {new_tournament.title} (ID: {new_tournament.id})")
     await invalidate_global_analytics()
     return new_tournament
@@ -40,17 +42,19 @@ async def create_tournament(
 @router.delete("/{tournament_id}", status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(frequent_action_limiter)])
 async def delete_tournament(
     tournament_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user=Depends(require_roles("admin"))
 ):
     logger.info(f"Admin {current_user.username} deleting tournament {tournament_id}")
-    tournament = db.query(Tournament).filter(Tournament.id == tournament_id).first()
+    tournament = await db.get(Tournament, tournament_id)
     if not tournament:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Tournament not found")
     
-    db.delete(tournament)
-    db.commit()
+    await db.delete(tournament)
+    await db.commit()
     logger.success(f"Tournament {tournament_id} deleted with cascade")
     await invalidate_global_analytics()
     await invalidate_tournament_analytics(tournament_id)
+    await drop_leaderboard(tournament_id)
+    await invalidate_tournament_schedule(tournament_id)
     return None
\ No newline at end of file
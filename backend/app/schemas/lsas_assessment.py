@@ -16,6 +16,7 @@ class LSASAssessmentCreate(LSASAssessmentBase):
 class LSASAssessmentOut(LSASAssessmentBase):
     id: int
     created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
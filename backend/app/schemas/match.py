@@ -1,7 +1,7 @@
 # app/schemas/match.py
-from pydantic import BaseModel
-from typing import Optional, List
-from datetime import datetime
+from pydantic import BaseModel, Field
+from typing import Optional, List, Literal
+from datetime import datetime, time
 from app.schemas.spirit_score import SpiritScoreOut
 
 class MatchBase(BaseModel):
@@ -30,15 +30,32 @@ class MatchUpdate(BaseModel):
 
 class MatchOut(MatchBase):
     id: int
+    stage: Optional[str] = None
+    pool: Optional[str] = None
+    round_number: Optional[int] = None
+    source_a: Optional[str] = None
+    source_b: Optional[str] = None
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
     spirit_scores: Optional[List[SpiritScoreOut]] = []  # nested output
 
 
+class BracketFormatIn(BaseModel):
+    pool_count: int = Field(0, ge=0, le=64)  # 0 = straight bracket, no pool play
+    advance_per_pool: int = Field(2, ge=1)
+    crossovers: bool = False
+    elimination: Literal["single", "double"] = "single"
+    seeds: Optional[List[int]] = None  # team ids, best first; unlisted teams follow in id order
+    match_minutes: int = Field(60, ge=10, le=240)
+    rest_minutes: int = Field(60, ge=0, le=24 * 60)
+    day_start: time = time(9, 0)
+    day_end: time = time(18, 0)
+
+
 class MatchScheduleItem(BaseModel):
     match_id: int
-    team_a_id: int
-    team_b_id: int
+    team_a_id: Optional[int] = None  # unknown until a bracket slot is decided
+    team_b_id: Optional[int] = None
     score_a: Optional[int] = None
     score_b: Optional[int] = None
     status: Optional[str] = None
@@ -67,6 +84,30 @@ class TournamentScheduleOut(BaseModel):
     class Config:
         from_attributes = True
 
+class ScheduleConflictOut(BaseModel):
+    kind: str  # team or field
+    resource: str
+    match_ids: List[int]
+
+
+class RescheduleIn(BaseModel):
+    match_id: int
+    delay_minutes: int = Field(..., ge=-24 * 60, le=7 * 24 * 60)
+    gap_minutes: int = Field(0, ge=0, le=24 * 60)  # minimum break kept before a pushed match
+    dry_run: bool = False
+
+
+class RescheduledMatch(BaseModel):
+    match_id: int
+    start_time: datetime
+    end_time: datetime
+
+
+class RescheduleOut(BaseModel):
+    moved: List[RescheduledMatch]
+    conflicts: List[ScheduleConflictOut]
+
+
 class MatchScoreUpdate(BaseModel):
     """Used for updating match scores mid-game or after."""
     score_a: int
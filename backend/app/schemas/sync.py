@@ -0,0 +1,75 @@
+from pydantic import BaseModel, Field
+from typing import Optional, List, Dict, Any
+from datetime import date, time, datetime
+
+
+class SyncSessionIn(BaseModel):
+    """A session created (client_id) or edited (id + base_updated_at) on the device."""
+    id: Optional[int] = None
+    client_id: Optional[str] = Field(None, max_length=64)
+    base_updated_at: Optional[datetime] = None  # server version the edit was made against
+    program_id: Optional[int] = None
+    coach_id: Optional[int] = None
+    date: date
+    location: Optional[str] = None
+    start_time: Optional[time] = None
+    end_time: Optional[time] = None
+    notes: Optional[str] = None
+    is_online: Optional[bool] = False
+
+
+class SyncAttendanceIn(BaseModel):
+    """Attendance for a server session (session_id) or one created in the same upload (session_client_id)."""
+    session_id: Optional[int] = None
+    session_client_id: Optional[str] = None
+    participant_id: int
+    tournament_id: Optional[int] = None
+    date: Optional[date] = None
+    present: bool
+    notes: Optional[str] = None
+
+
+class SyncHomeVisitIn(BaseModel):
+    client_id: str = Field(..., max_length=64)
+    participant_id: int
+    coach_id: Optional[int] = None
+    visit_date: date
+    notes: Optional[str] = None
+    photos_json: Optional[str] = None
+
+
+class SyncLSASIn(BaseModel):
+    client_id: str = Field(..., max_length=64)
+    participant_id: int
+    date: date
+    scores_json: Optional[Dict[str, float]] = Field(default_factory=dict)
+    notes: Optional[str] = None
+
+
+class SyncUpload(BaseModel):
+    sessions: List[SyncSessionIn] = Field(default_factory=list, max_length=500)
+    attendance: List[SyncAttendanceIn] = Field(default_factory=list, max_length=5000)
+    home_visits: List[SyncHomeVisitIn] = Field(default_factory=list, max_length=500)
+    lsas_assessments: List[SyncLSASIn] = Field(default_factory=list, max_length=500)
+
+
+class SyncRequest(BaseModel):
+    token: Optional[str] = None  # from the previous response; omit for a full download
+    upload: SyncUpload = Field(default_factory=SyncUpload)
+
+
+class SyncConflict(BaseModel):
+    kind: str
+    id: Optional[int] = None
+    client_id: Optional[str] = None
+    reason: str
+    server: Optional[Dict[str, Any]] = None  # the version that was kept
+
+
+class SyncResponse(BaseModel):
+    token: str
+    has_more: bool  # call again with the new token to fetch the rest
+    applied: Dict[str, Dict[str, int]]  # kind -> {client_id: server id}
+    conflicts: List[SyncConflict]
+    changes: Dict[str, List[Dict[str, Any]]]
+    deleted: Dict[str, List[int]]
@@ -0,0 +1,13 @@
+"""Benchmarks; skipped unless pytest runs with --benchmark."""
+
+import time
+
+
+def timed(fn, *args, repeat: int = 5) -> float:
+    """Best wall-clock time of `repeat` calls, in milliseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
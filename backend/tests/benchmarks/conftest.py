@@ -0,0 +1,10 @@
+import pytest
+
+
+@pytest.fixture
+def table(capsys):
+    """Print a result row past pytest's output capture."""
+    def emit(*columns):
+        with capsys.disabled():
+            print("  ".join(f"{c:>12.2f}" if isinstance(c, float) else f"{c:>12}" for c in columns))
+    return emit
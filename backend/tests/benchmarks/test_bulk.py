@@ -0,0 +1,48 @@
+"""Roster inserts: add + commit + refresh per row against bulk_insert_returning."""
+
+import time
+import pytest
+from sqlalchemy import delete, select
+from app.core.query_stats import track_queries
+from app.db.bulk import bulk_insert_returning
+from app.models.team import Team
+from app.models.team_member import TeamMember
+from app.schemas.team_member import TeamMemberOut
+from tests.seed import make_tournament
+from tests.test_bulk import _participants
+
+pytestmark = pytest.mark.benchmark
+
+
+def per_row(db, rows):
+    members = [TeamMember(**row) for row in rows]
+    db.add_all(members)
+    db.commit()
+    for member in members:
+        db.refresh(member)
+    return [TeamMemberOut.model_validate(m) for m in members]
+
+
+def bulk(db, rows):
+    created = [TeamMemberOut.model_validate(m) for m in bulk_insert_returning(db, TeamMember, rows)]
+    db.commit()
+    return created
+
+
+@pytest.mark.parametrize("size", [1_000, 10_000, 100_000])
+def test_bulk_insert(db, table, size):
+    make_tournament(db, teams=1, matches=False)
+    team_id = db.scalar(select(Team.id))
+    rows = [{"team_id": team_id, "participant_id": pid} for pid in _participants(db, size)]
+    db.commit()
+
+    for name, insert in (("per-row", per_row), ("bulk", bulk)):
+        db.execute(delete(TeamMember))
+        db.commit()
+        db.expunge_all()
+        with track_queries() as stats:
+            started = time.perf_counter()
+            created = insert(db, rows)
+            elapsed = (time.perf_counter() - started) * 1000
+        assert len(created) == size
+        table(f"{size} rows", name, f"{stats.count}q", elapsed)
@@ -0,0 +1,34 @@
+"""Match exports: CSV against Parquet and Arrow, by size, export time and reload time."""
+
+import io
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pytest
+from app.core.export_formats import stream_columnar, stream_export_csv
+from tests.benchmarks import timed
+from tests.seed import make_tournament
+from tests.test_export_formats import read_table
+
+pytestmark = pytest.mark.benchmark
+
+
+def _export(export_format: str, tournament_id: int) -> bytes:
+    if export_format == "csv":
+        return b"".join(chunk.encode() if isinstance(chunk, str) else chunk for chunk in stream_export_csv(tournament_id))
+    return b"".join(stream_columnar("matches", export_format, tournament_id))
+
+
+def _reload(export_format: str, data: bytes) -> pa.Table:
+    if export_format == "csv":
+        return pa_csv.read_csv(io.BytesIO(data))
+    return read_table(data, export_format)
+
+
+@pytest.mark.parametrize("teams", [100, 400])
+def test_export_formats(db, table, teams):
+    tournament = make_tournament(db, teams=teams, completed=0.8, seed=teams)
+    for export_format in ("csv", "parquet", "arrow"):
+        data = _export(export_format, tournament.id)
+        export_ms = timed(_export, export_format, tournament.id, repeat=3)
+        reload_ms = timed(_reload, export_format, data)
+        table(f"{teams} teams", export_format, f"{len(data) / 1024:.0f} KiB", export_ms, reload_ms)
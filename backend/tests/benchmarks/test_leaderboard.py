@@ -0,0 +1,23 @@
+"""Leaderboard: per-team queries (original endpoint) against the single aggregated query."""
+
+import pytest
+from app.core.query_stats import track_queries
+from tests.benchmarks import timed
+from tests.seed import make_tournament
+from tests.test_leaderboard import engine_leaderboard, reference_leaderboard
+
+pytestmark = pytest.mark.benchmark
+
+
+@pytest.mark.parametrize("teams", [8, 64, 512])
+def test_leaderboard(db, run, table, teams):
+    tournament = make_tournament(db, teams=teams, completed=0.8, seed=teams)
+
+    with track_queries() as before:
+        reference_leaderboard(db, tournament.id)
+    _, after = run(engine_leaderboard, tournament.id)
+    per_team_ms = timed(reference_leaderboard, db, tournament.id, repeat=3)
+    aggregated_ms = timed(lambda: run(engine_leaderboard, tournament.id))
+
+    table(f"{teams} teams", f"per-team {before.count}q", per_team_ms, f"grouped {after}q", aggregated_ms)
+    assert after <= 2
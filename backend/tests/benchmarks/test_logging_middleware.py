@@ -0,0 +1,82 @@
+"""Request latency under concurrent load: pure ASGI LoggingMiddleware against a BaseHTTPMiddleware equivalent."""
+
+import asyncio
+import time
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from loguru import logger
+from starlette.middleware.base import BaseHTTPMiddleware
+from app.core.metrics import HTTP_REQUEST_SECONDS, route_label
+from app.core.query_stats import report, track_queries
+from app.middleware.logging_middleware import LoggingMiddleware
+
+pytestmark = pytest.mark.benchmark
+
+REQUESTS = 2_000
+CONCURRENCY = 50
+
+
+class BaseHTTPLoggingMiddleware(BaseHTTPMiddleware):
+    """The same work done the BaseHTTPMiddleware way, as LoggingMiddleware used to."""
+
+    async def dispatch(self, request, call_next):
+        start_time = time.perf_counter()
+        with track_queries() as queries:
+            response = await call_next(request)
+            report(queries, f"{request.method} {request.url.path}")
+            response.headers["X-DB-Queries"] = str(queries.count)
+            response.headers["X-DB-Time-Ms"] = f"{queries.seconds * 1000:.1f}"
+        duration = time.perf_counter() - start_time
+        route = route_label(request.scope)
+        HTTP_REQUEST_SECONDS.labels(request.method, route, response.status_code).observe(duration)
+        LoggingMiddleware._log(request.scope, request.method, route, response.status_code, duration, queries)
+        return response
+
+
+def make_app(middleware) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(middleware)
+
+    @app.get("/tournaments/{tournament_id}")
+    async def tournament(tournament_id: int):
+        return {"id": tournament_id}
+
+    @app.get("/export")
+    async def export():
+        async def rows():
+            for n in range(100):
+                yield f"{n},Team {n},15,9\n"
+        return StreamingResponse(rows(), media_type="text/csv")
+
+    return app
+
+
+async def load(app, path: str) -> list[float]:
+    """Latency of every request, in ms, with CONCURRENCY requests in flight."""
+    latencies = []
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        async def worker():
+            for _ in range(REQUESTS // CONCURRENCY):
+                started = time.perf_counter()
+                response = await client.get(path)
+                latencies.append((time.perf_counter() - started) * 1000)
+                assert response.status_code == 200
+        await asyncio.gather(*(worker() for _ in range(CONCURRENCY)))
+    return sorted(latencies)
+
+
+@pytest.mark.parametrize("path", ["/tournaments/1", "/export"])
+def test_middleware_latency(table, path):
+    logger.disable("app.middleware")  # both variants log through LoggingMiddleware._log; keep the sinks out of it
+    try:
+        for name, middleware in (("BaseHTTP", BaseHTTPLoggingMiddleware), ("pure ASGI", LoggingMiddleware)):
+            app = make_app(middleware)
+            asyncio.run(load(app, path))  # warm up
+            started = time.perf_counter()
+            latencies = asyncio.run(load(app, path))
+            elapsed = time.perf_counter() - started
+            table(path, name, f"{REQUESTS / elapsed:.0f} req/s", latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.99)])
+    finally:
+        logger.enable("app.middleware")
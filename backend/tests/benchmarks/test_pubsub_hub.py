@@ -0,0 +1,40 @@
+"""Hub fan-out: time from one Redis publish until every subscriber's queue holds the message."""
+
+import asyncio
+import statistics
+import time
+import pytest
+from app.core.pubsub_hub import PubSubHub
+from app.core.redis import redis_client
+
+pytestmark = pytest.mark.benchmark
+
+PUBLISHES = 200
+
+
+async def fan_out(subscribers: int) -> list[float]:
+    hub = PubSubHub(("bench:*",))
+    queues = [hub.subscribe("bench:match:1") for _ in range(subscribers)]
+    last = queues[-1]
+    latencies = []
+    try:
+        while await redis_client.publish("bench:match:1", "ready") == 0:
+            await asyncio.sleep(0.01)
+        await last.get()
+        for n in range(PUBLISHES):
+            for queue in queues[:-1]:
+                queue.get_nowait()
+            started = time.perf_counter()
+            await redis_client.publish("bench:match:1", str(n))
+            await last.get()  # dispatch fills every queue in one pass, the last one included
+            latencies.append((time.perf_counter() - started) * 1000)
+    finally:
+        await hub.stop()
+    return latencies
+
+
+@pytest.mark.parametrize("subscribers", [100, 1_000, 10_000])
+def test_fan_out_latency(client, run, redis, table, subscribers):
+    latencies = sorted(run(fan_out, subscribers))
+    table("subscribers", "p50 ms", "p99 ms")
+    table(subscribers, statistics.median(latencies), latencies[int(len(latencies) * 0.99)])
@@ -0,0 +1,16 @@
+"""Round-robin scheduling: 500 teams must be packed in under a second."""
+
+from datetime import date
+import pytest
+from app.core.scheduling import schedule_round_robin
+from tests.benchmarks import timed
+
+pytestmark = pytest.mark.benchmark
+
+
+@pytest.mark.parametrize("teams, fields", [(20, 4), (100, 8), (500, 8), (500, 32)])
+def test_schedule_round_robin(table, teams, fields):
+    names = [f"Field {n}" for n in range(fields)]
+    elapsed = timed(schedule_round_robin, list(range(teams)), names, date(2025, 6, 1), repeat=3)
+    table(f"{teams} teams", f"{fields} fields", f"{teams * (teams - 1) // 2} matches", elapsed)
+    assert elapsed < 1000
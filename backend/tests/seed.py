@@ -0,0 +1,129 @@
+"""Seed data for the database-backed tests and benchmarks."""
+
+import random
+from datetime import date, timedelta
+from sqlalchemy import select
+from app.core.scheduling import schedule_round_robin, tournament_fields
+from app.core.security import hash_password
+from app.models.user import User, RoleEnum
+from app.models.tournament import Tournament
+from app.models.team import Team
+from app.models.match import Match, MatchStatus
+from app.models.spirit_score import SpiritScore
+from app.models.participant import Participant
+from app.models.team_member import TeamMember
+from app.models.session import Session as CoachingSession
+from app.models.attendance import Attendance
+from app.models.lsas_assessment import LSASAssessment
+
+PASSWORD = "secret"
+
+
+def make_user(db, username: str = "admin", role: RoleEnum = RoleEnum.admin, **fields) -> User:
+    user = User(username=username, hashed_password=hash_password(PASSWORD), role=role, **fields)
+    db.add(user)
+    db.commit()
+    return user
+
+
+def auth_headers(client, username: str = "admin") -> dict:
+    response = client.post("/auth/login", data={"username": username, "password": PASSWORD})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def make_tournament(
+    db, teams: int = 8, completed: float = 0.7, spirit: float = 0.5, seed: int = 0, fields: int = 4, matches: bool = True,
+) -> Tournament:
+    """
+    A round-robin tournament: every pair plays once, on a conflict-free
+    schedule over `fields` fields. `completed` of the matches have random
+    scores (draws included) and `spirit` of those got one spirit score from
+    each side. The same seed always yields the same data. With matches=False
+    only the (pending) teams are created.
+    """
+    rng = random.Random(seed)
+    start = date(2025, 6, 1)
+    tournament = Tournament(
+        title=f"Open {seed}", slug=f"open-{seed}-{teams}", start_date=start, end_date=start + timedelta(days=2),
+        fields_json=[f"Field {n}" for n in range(1, fields + 1)],
+    )
+    db.add(tournament)
+    db.flush()
+
+    team_ids = [row[0] for row in db.execute(
+        Team.__table__.insert().returning(Team.id, sort_by_parameter_order=True),
+        [{"name": f"Team {n:03d}", "tournament_id": tournament.id} for n in range(teams)],
+    )]
+
+    if not matches:
+        db.commit()
+        return tournament
+
+    rows = []
+    for match in schedule_round_robin(team_ids, tournament_fields(tournament), start):
+        done = rng.random() < completed
+        rows.append({
+            **match,
+            "tournament_id": tournament.id,
+            "score_a": rng.randint(0, 15) if done else 0,
+            "score_b": rng.randint(0, 15) if done else 0,
+            "status": MatchStatus.completed if done else MatchStatus.scheduled,
+        })
+    played = []
+    for offset in range(0, len(rows), 10_000):
+        batch = rows[offset:offset + 10_000]
+        ids = db.execute(Match.__table__.insert().returning(Match.id, sort_by_parameter_order=True), batch).scalars().all()
+        played += [(match_id, row) for match_id, row in zip(ids, batch) if row["status"] == MatchStatus.completed]
+
+    scores = []
+    for match_id, row in played:
+        if rng.random() < spirit:
+            for giver, receiver in ((row["team_a_id"], row["team_b_id"]), (row["team_b_id"], row["team_a_id"])):
+                marks = [rng.randint(0, 4) for _ in range(5)]
+                scores.append({
+                    "match_id": match_id, "from_team_id": giver, "to_team_id": receiver,
+                    "rules_knowledge": marks[0], "fouls_body_contact": marks[1], "fair_mindedness": marks[2],
+                    "positive_attitude": marks[3], "communication": marks[4], "total": sum(marks),
+                })
+    if scores:
+        db.execute(SpiritScore.__table__.insert(), scores)
+    db.commit()
+    return tournament
+
+
+def make_roster(db, tournament: Tournament, players: int = 7, seed: int = 0) -> list[int]:
+    """
+    Players for every team of a tournament, each with a coaching session
+    attendance row and an LSAS assessment. Returns the participant ids.
+    """
+    rng = random.Random(seed)
+    team_ids = db.scalars(select(Team.id).where(Team.tournament_id == tournament.id).order_by(Team.id)).all()
+    participants = [
+        {"first_name": f"Player {team_id}-{n}", "last_name": rng.choice(["Rao", "Shah", None]), "dob": date(2010, 1, 1) + timedelta(days=rng.randint(0, 2000))}
+        for team_id in team_ids for n in range(players)
+    ]
+    participant_ids = db.execute(
+        Participant.__table__.insert().returning(Participant.id, sort_by_parameter_order=True), participants,
+    ).scalars().all()
+    db.execute(TeamMember.__table__.insert(), [
+        {"team_id": team_ids[n // players], "participant_id": participant_id, "jersey_number": str(n % players)}
+        for n, participant_id in enumerate(participant_ids)
+    ])
+
+    session = CoachingSession(date=tournament.start_date, location="Ground")
+    db.add(session)
+    db.flush()
+    db.execute(Attendance.__table__.insert(), [
+        {"participant_id": participant_id, "session_id": session.id, "tournament_id": tournament.id,
+         "date": tournament.start_date, "present": rng.random() < 0.8}
+        for participant_id in participant_ids
+    ])
+    db.execute(LSASAssessment.__table__.insert(), [
+        # Keys deliberately out of order: exports must sort them
+        {"participant_id": participant_id, "date": tournament.start_date,
+         "scores_json": {"teamwork": rng.randint(1, 5), "communication": rng.randint(1, 5)}, "total_score": rng.random() * 10}
+        for participant_id in participant_ids
+    ])
+    db.commit()
+    return list(participant_ids)
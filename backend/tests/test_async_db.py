@@ -0,0 +1,61 @@
+"""No synchronous database I/O on the event loop thread (SYNC_DB_ON_LOOP=raise)."""
+
+import asyncio
+import pytest
+from sqlalchemy import text, update
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.team import Team, TeamStatus
+from tests.seed import auth_headers, make_tournament, make_user
+
+
+@pytest.fixture
+def strict(monkeypatch):
+    monkeypatch.setattr(settings, "SYNC_DB_ON_LOOP", "raise")
+
+
+def _select_one() -> int:
+    with SessionLocal() as db:
+        return db.execute(text("SELECT 1")).scalar()
+
+
+def test_guard_rejects_sync_query_on_loop(engine, strict):
+    async def handler():
+        return _select_one()
+
+    with pytest.raises(RuntimeError, match="event loop thread"):
+        asyncio.run(handler())
+
+
+def test_guard_allows_threadpool(engine, strict):
+    async def handler():
+        return await asyncio.to_thread(_select_one)
+
+    assert asyncio.run(handler()) == 1
+    assert _select_one() == 1  # and plain scripts
+
+
+def test_async_handlers_stay_off_sync_engine(client, db, strict):
+    make_user(db)
+    headers = auth_headers(client)
+    tournament = make_tournament(db, teams=4, completed=0.5)
+    db.execute(update(Team).values(status=TeamStatus.approved))
+    db.commit()
+    team_a, team_b = db.query(Team.id).order_by(Team.id).limit(2).all()
+
+    created = client.post(
+        "/matches/", json={"tournament_id": tournament.id, "team_a_id": team_a.id, "team_b_id": team_b.id}, headers=headers,
+    )
+    assert created.status_code == 200, created.text
+    match_id = created.json()["id"]
+
+    scored = client.patch(f"/matches/{match_id}/score", json={"score_a": 13, "score_b": 9, "status": "completed"}, headers=headers)
+    assert scored.status_code == 200, scored.text
+    spirit = client.post("/spirit/", json={"match_id": match_id, "from_team_id": team_a.id, "to_team_id": team_b.id}, headers=headers)
+    assert spirit.status_code == 200, spirit.text
+
+    leaderboard = client.get(f"/tournaments/{tournament.id}/leaderboard")
+    assert leaderboard.status_code == 200, leaderboard.text
+    assert client.get("/analytics/overview").status_code == 200
+    assert client.get(f"/analytics/tournaments/{tournament.id}").status_code == 200
+    assert client.delete(f"/matches/{match_id}", headers=headers).status_code == 204
@@ -0,0 +1,134 @@
+"""Multi-row INSERT ... RETURNING and upserts, and the endpoints built on them."""
+
+from datetime import date
+import pytest
+from sqlalchemy import select
+from app.core.query_stats import track_queries
+from app.db import bulk
+from app.db.bulk import bulk_insert_returning, bulk_upsert_returning
+from app.models.attendance import Attendance
+from app.models.match import Match
+from app.models.participant import Participant
+from app.models.session import Session as CoachingSession
+from app.models.team import Team
+from app.models.team_member import TeamMember
+from tests.seed import auth_headers, make_tournament, make_user
+
+
+def _participants(db, count: int) -> list[int]:
+    return db.execute(
+        Participant.__table__.insert().returning(Participant.id, sort_by_parameter_order=True),
+        [{"first_name": f"P{n}"} for n in range(count)],
+    ).scalars().all()
+
+
+def test_insert_returns_rows_in_input_order(db, monkeypatch):
+    monkeypatch.setattr(bulk, "BULK_CHUNK_SIZE", 3)
+    make_tournament(db, teams=1, matches=False)
+    team_id = db.scalar(select(Team.id))
+    participant_ids = _participants(db, 10)[::-1]
+
+    with track_queries() as stats:
+        created = bulk_insert_returning(db, TeamMember, [
+            {"team_id": team_id, "participant_id": pid, "jersey_number": str(pid)} for pid in participant_ids
+        ])
+    assert stats.count == 4  # one statement per chunk, no refreshes
+    assert [m.participant_id for m in created] == participant_ids
+    assert [m.jersey_number for m in created] == [str(pid) for pid in participant_ids]
+    assert all(m.id and m.created_at and m.role == "player" for m in created)  # server and column defaults
+    assert len({m.id for m in created}) == 10
+
+
+def test_insert_marks_collections_loaded(db):
+    tournament = make_tournament(db, teams=2, matches=False)
+    team_a, team_b = db.scalars(select(Team.id).order_by(Team.id)).all()
+    created = bulk_insert_returning(
+        db, Match, [{"tournament_id": tournament.id, "team_a_id": team_a, "team_b_id": team_b}] * 3,
+        empty_collections=("spirit_scores",),
+    )
+    with track_queries() as stats:
+        assert [m.spirit_scores for m in created] == [[], [], []]
+    assert stats.count == 0
+
+
+def test_insert_nothing(db):
+    assert bulk_insert_returning(db, TeamMember, []) == []
+
+
+def test_upsert_updates_existing_rows_and_stamps_real_changes(db):
+    participant_ids = _participants(db, 3)
+    session = CoachingSession(date=date(2025, 6, 1))
+    db.add(session)
+    db.flush()
+
+    def register(present: list[bool]):
+        rows = [
+            {"participant_id": pid, "session_id": session.id, "date": session.date, "present": p}
+            for pid, p in zip(participant_ids, present)
+        ]
+        return bulk_upsert_returning(
+            db, Attendance, rows, key_columns=("session_id", "participant_id"),
+            update_columns=("date", "present"), changed_stamp="updated_at",
+        )
+
+    first = register([True, True, False])
+    db.commit()
+    stamps = {a.participant_id: a.updated_at for a in first}
+
+    second = register([True, False, False])
+    db.commit()
+    assert [a.id for a in second] == [a.id for a in first]
+    assert [a.present for a in second] == [True, False, False]
+    changed = {a.participant_id for a in second if a.updated_at != stamps[a.participant_id]}
+    assert changed == {participant_ids[1]}
+    assert db.query(Attendance).count() == 3
+
+
+def test_upsert_later_duplicates_win(db):
+    participant_ids = _participants(db, 1)
+    session = CoachingSession(date=date(2025, 6, 1))
+    db.add(session)
+    db.flush()
+    rows = [
+        {"participant_id": participant_ids[0], "session_id": session.id, "date": session.date, "present": present}
+        for present in (True, False)
+    ]
+    stored = bulk_upsert_returning(db, Attendance, rows, ("session_id", "participant_id"), ("present",))
+    assert [a.present for a in stored] == [False]
+
+
+@pytest.mark.parametrize("size", [5, 200])
+def test_roster_endpoint_query_count_does_not_grow(client, db, size):
+    make_user(db)
+    headers = auth_headers(client)
+    make_tournament(db, teams=1, matches=False)
+    team_id = db.scalar(select(Team.id))
+    participant_ids = _participants(db, size)
+    db.commit()
+
+    response = client.post(
+        f"/teams/{team_id}/roster",
+        json=[{"team_id": team_id, "participant_id": pid, "jersey_number": str(n)} for n, pid in enumerate(participant_ids)],
+        headers=headers,
+    )
+    assert response.status_code == 200, response.text
+    assert [m["participant_id"] for m in response.json()] == participant_ids
+    assert all(m["id"] and m["created_at"] for m in response.json())
+    assert int(response.headers["X-DB-Queries"]) <= 4
+
+
+def test_attendance_endpoint_is_idempotent(client, db):
+    make_user(db)
+    headers = auth_headers(client)
+    participant_ids = _participants(db, 50)
+    session = CoachingSession(date=date(2025, 6, 1))
+    db.add(session)
+    db.commit()
+
+    records = [{"participant_id": pid, "date": "2025-06-01", "present": True} for pid in participant_ids]
+    first = client.post(f"/coaching/sessions/{session.id}/attendance", json=records, headers=headers)
+    again = client.post(f"/coaching/sessions/{session.id}/attendance", json=records, headers=headers)
+    assert first.status_code == again.status_code == 200
+    assert [a["id"] for a in again.json()] == [a["id"] for a in first.json()]
+    assert int(first.headers["X-DB-Queries"]) <= 4
+    assert db.query(Attendance).count() == 50
@@ -0,0 +1,219 @@
+"""Offline coach sync: paging to completion, idempotent uploads, edit conflicts and coach scoping."""
+
+import base64
+from datetime import date, datetime, timedelta, timezone
+from types import SimpleNamespace
+import pytest
+from sqlalchemy import delete, func, select, update
+from app.core import coach_sync
+from app.models.attendance import Attendance
+from app.models.home_visit import HomeVisit
+from app.models.lsas_assessment import LSASAssessment
+from app.models.participant import Participant, ParticipantType
+from app.models.session import Session as CoachingSession
+from app.models.user import RoleEnum
+from tests.seed import auth_headers, make_user
+
+DAY = date(2025, 6, 1)
+
+
+def _coach(db, username: str, trainees: int, sessions: int) -> SimpleNamespace:
+    """A coach account with a linked profile, their trainees, and sessions every trainee attended."""
+    user = make_user(db, username, RoleEnum.coach)
+    profile = Participant(first_name=username, participant_type=ParticipantType.coach, user_id=user.id)
+    db.add(profile)
+    db.flush()
+    kids = [Participant(first_name=f"{username} trainee {n}", coach_id=profile.id) for n in range(trainees)]
+    db.add_all(kids)
+    db.flush()
+    runs = [CoachingSession(coach_id=profile.id, date=DAY + timedelta(days=n), location="Ground") for n in range(sessions)]
+    db.add_all(runs)
+    db.flush()
+    db.add_all(Attendance(session_id=s.id, participant_id=k.id, date=s.date, present=True) for s in runs for k in kids)
+    db.add_all(LSASAssessment(participant_id=k.id, date=DAY, scores_json={"teamwork": 3}, total_score=3) for k in kids)
+    db.commit()
+    return SimpleNamespace(
+        user=user, profile=profile.id, trainees=[k.id for k in kids], sessions=[s.id for s in runs], headers=None,
+    )
+
+
+@pytest.fixture
+def coaches(client, db):
+    first, second = _coach(db, "coach_a", trainees=4, sessions=5), _coach(db, "coach_b", trainees=3, sessions=2)
+    first.headers, second.headers = auth_headers(client, "coach_a"), auth_headers(client, "coach_b")
+    return first, second
+
+
+def sync(client, headers, token: str | None = None, upload: dict | None = None, **kwargs) -> dict:
+    response = client.post("/coaching/sync", json={"token": token, "upload": upload or {}}, headers=headers, **kwargs)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def pull_all(client, headers, token: str | None = None) -> tuple[dict, str, int]:
+    """Sync until has_more is false: (every changed row per dataset, final token, calls made)."""
+    received = {dataset: [] for dataset in coach_sync.SYNC_SOURCES}
+    calls = 0
+    while True:
+        page = sync(client, headers, token)
+        calls += 1
+        for dataset, rows in page["changes"].items():
+            received[dataset] += [row["id"] for row in rows]
+        token = page["token"]
+        if not page["has_more"]:
+            return received, token, calls
+
+
+def test_pulling_until_caught_up_returns_each_row_once(client, db, coaches, monkeypatch):
+    monkeypatch.setattr(coach_sync, "SYNC_PAGE_SIZE", 3)
+    mine, theirs = coaches
+    received, token, calls = pull_all(client, mine.headers)
+    assert calls == 7  # 20 attendance rows in pages of 3
+
+    expected = {
+        "sessions": mine.sessions,
+        "attendance": db.scalars(select(Attendance.id).where(Attendance.session_id.in_(mine.sessions))).all(),
+        "participants": [mine.profile, *mine.trainees],
+        "lsas_assessments": db.scalars(select(LSASAssessment.id).where(LSASAssessment.participant_id.in_(mine.trainees))).all(),
+    }
+    for dataset, ids in received.items():
+        assert len(ids) == len(set(ids)), dataset
+        assert sorted(ids) == sorted(expected[dataset]), dataset
+
+    make_user(db)
+    everything, _, _ = pull_all(client, auth_headers(client))  # admins sync every coach's rows
+    assert sorted(everything["sessions"]) == sorted(mine.sessions + theirs.sessions)
+
+
+def test_caught_up_devices_get_changes_and_deletions_only(client, db, coaches):
+    mine, _ = coaches
+    _, token, _ = pull_all(client, mine.headers)
+    db.execute(update(CoachingSession).where(CoachingSession.id == mine.sessions[0]).values(notes="moved indoors"))
+    db.execute(delete(CoachingSession).where(CoachingSession.id == mine.sessions[1]))  # its attendance goes by FK cascade
+    db.commit()
+
+    page = sync(client, mine.headers, token)
+    assert mine.sessions[0] in [s["id"] for s in page["changes"]["sessions"]]
+    assert page["deleted"]["sessions"] == [mine.sessions[1]]
+    assert len(page["deleted"]["attendance"]) == len(mine.trainees)
+    assert sync(client, mine.headers, page["token"])["deleted"]["sessions"] == []
+
+
+def _upload(coach) -> dict:
+    return {
+        "sessions": [{"client_id": "dev1-s1", "date": "2025-07-01", "location": "Park"}],
+        "attendance": [{"session_client_id": "dev1-s1", "participant_id": kid, "present": n % 2 == 0} for n, kid in enumerate(coach.trainees)],
+        "home_visits": [{"client_id": "dev1-v1", "participant_id": coach.trainees[0], "visit_date": "2025-07-02"}],
+        "lsas_assessments": [{"client_id": "dev1-l1", "participant_id": coach.trainees[1], "date": "2025-07-02", "scores_json": {"a": 2, "b": 3}}],
+    }
+
+
+def counts(db) -> tuple:
+    return tuple(db.scalar(select(func.count()).select_from(model)) for model in (CoachingSession, Attendance, HomeVisit, LSASAssessment))
+
+
+def test_a_retried_upload_does_not_duplicate_rows(client, db, coaches):
+    mine, _ = coaches
+    before = counts(db)
+    first = sync(client, mine.headers, upload=_upload(mine))
+    assert first["conflicts"] == []
+    after = counts(db)
+    assert after == (before[0] + 1, before[1] + len(mine.trainees), before[2] + 1, before[3] + 1)
+
+    retried = sync(client, mine.headers, upload=_upload(mine))  # the response to the first was lost
+    assert retried["applied"] == first["applied"]
+    assert counts(db) == after
+    session = db.get(CoachingSession, first["applied"]["sessions"]["dev1-s1"])
+    assert session.coach_id == mine.profile
+    assert db.scalar(select(LSASAssessment.total_score).where(LSASAssessment.client_id == "dev1-l1")) == 5
+
+
+def test_a_stale_edit_is_a_conflict_and_not_applied(client, db, coaches):
+    mine, _ = coaches
+    session_id = mine.sessions[0]
+    synced = next(s for s in sync(client, mine.headers)["changes"]["sessions"] if s["id"] == session_id)
+    base = synced["updated_at"] or synced["created_at"]
+    # Someone edits the session on the server after the device synced it
+    db.execute(update(CoachingSession).where(CoachingSession.id == session_id).values(
+        notes="server edit", updated_at=datetime.now(timezone.utc) + timedelta(seconds=1),
+    ))
+    db.commit()
+
+    edit = {"id": session_id, "base_updated_at": base, "date": synced["date"], "notes": "device edit"}
+    result = sync(client, mine.headers, upload={"sessions": [edit]})
+    (conflict,) = result["conflicts"]
+    assert conflict["id"] == session_id and conflict["server"]["notes"] == "server edit"
+    db.expire_all()
+    assert db.get(CoachingSession, session_id).notes == "server edit"
+
+    # Re-based on the server version, the same edit goes through
+    fresh = sync(client, mine.headers, upload={"sessions": [{**edit, "base_updated_at": conflict["server"]["updated_at"]}]})
+    assert fresh["conflicts"] == []
+    db.expire_all()
+    assert db.get(CoachingSession, session_id).notes == "device edit"
+
+
+def test_a_coach_cannot_write_another_coachs_records(client, db, coaches):
+    mine, theirs = coaches
+    before = counts(db)
+    upload = {
+        "sessions": [{"id": theirs.sessions[0], "base_updated_at": datetime.now(timezone.utc).isoformat(), "date": "2025-07-01", "notes": "mine now"}],
+        "attendance": [
+            {"session_id": theirs.sessions[0], "participant_id": theirs.trainees[0], "present": False},
+            {"session_id": mine.sessions[0], "participant_id": theirs.trainees[0], "present": False},
+        ],
+        "home_visits": [{"client_id": "dev2-v1", "participant_id": theirs.trainees[0], "visit_date": "2025-07-02"}],
+        "lsas_assessments": [{"client_id": "dev2-l1", "participant_id": theirs.trainees[0], "date": "2025-07-02"}],
+    }
+    result = sync(client, mine.headers, upload=upload)
+    assert sorted((c["kind"], c["reason"]) for c in result["conflicts"]) == [
+        ("attendance", "not one of your sessions"),
+        ("attendance", "not one of your trainees"),
+        ("home_visits", "not one of your trainees"),
+        ("lsas_assessments", "not one of your trainees"),
+        ("sessions", "not one of your sessions"),
+    ]
+    assert counts(db) == before
+    db.expire_all()
+    assert db.get(CoachingSession, theirs.sessions[0]).notes is None
+    assert db.scalar(select(func.count()).where(Attendance.present.is_(False))) == 0
+
+
+def test_a_coach_cannot_take_over_another_coachs_client_ids(client, db, coaches):
+    mine, theirs = coaches
+    assert sync(client, theirs.headers, upload=_upload(theirs))["conflicts"] == []
+    upload = _upload(mine)
+    result = sync(client, mine.headers, upload={"sessions": upload["sessions"], "home_visits": upload["home_visits"], "lsas_assessments": upload["lsas_assessments"]})
+    assert sorted(c["kind"] for c in result["conflicts"]) == ["home_visits", "lsas_assessments", "sessions"]
+    assert db.scalar(select(HomeVisit.participant_id).where(HomeVisit.client_id == "dev1-v1")) == theirs.trainees[0]
+
+
+def test_a_coach_does_not_pull_another_coachs_records(client, db, coaches):
+    mine, theirs = coaches
+    received, _, _ = pull_all(client, theirs.headers)
+    assert set(received["participants"]) == {theirs.profile, *theirs.trainees}
+    assert not set(received["sessions"]) & set(mine.sessions)
+    assert not set(received["lsas_assessments"]) & set(
+        db.scalars(select(LSASAssessment.id).where(LSASAssessment.participant_id.in_(mine.trainees)))
+    )
+
+
+def test_accounts_without_a_coach_profile_are_refused(client, db, coaches):
+    make_user(db, "unlinked", RoleEnum.coach)
+    response = client.post("/coaching/sync", json={}, headers=auth_headers(client, "unlinked"))
+    assert response.status_code == 403
+
+
+def test_bad_tokens_are_a_400(client, db, coaches):
+    mine, _ = coaches
+    for token in ("garbage", base64.urlsafe_b64encode(b'{"c": {"sessions": ["yesterday", 1]}, "d": 0}').decode()):
+        assert client.post("/coaching/sync", json={"token": token}, headers=mine.headers).status_code == 400
+
+
+def test_large_responses_are_gzipped_when_accepted(client, db, coaches):
+    mine, _ = coaches
+    zipped = client.post("/coaching/sync", json={}, headers={**mine.headers, "Accept-Encoding": "gzip"})
+    assert zipped.headers["Content-Encoding"] == "gzip" and zipped.headers["Vary"] == "Accept-Encoding"
+    plain = client.post("/coaching/sync", json={}, headers={**mine.headers, "Accept-Encoding": "identity"})
+    assert "Content-Encoding" not in plain.headers
+    assert zipped.json()["changes"] == plain.json()["changes"]
@@ -0,0 +1,107 @@
+"""Delta exports over HTTP: paging by watermark, and tombstones for every way a row gets deleted."""
+
+from datetime import datetime
+import pytest
+from sqlalchemy import delete, select
+from app.core import export_formats, rate_limiter
+from app.models.attendance import Attendance
+from app.models.lsas_assessment import LSASAssessment
+from app.models.match import Match
+from app.models.spirit_score import SpiritScore
+from app.models.team import Team
+from tests.seed import auth_headers, make_roster, make_tournament, make_user
+
+
+@pytest.fixture
+def small_pages(monkeypatch):
+    monkeypatch.setattr(export_formats, "DELTA_PAGE_SIZE", 4)
+
+
+def pull(client, headers, url: str, dataset: str, watermark: str | None = None) -> tuple[list[dict], list[dict], str]:
+    """Every page up to has_more=false: (rows, tombstones, watermark)."""
+    rows, tombstones = [], []
+    while True:
+        rate_limiter._buckets.clear()  # exports are limited to a few a minute
+        params = {"format": "json", "dataset": dataset, **({"since": watermark} if watermark else {})}
+        response = client.get(url, params=params, headers=headers)
+        assert response.status_code == 200, response.text
+        assert response.headers["content-type"] == "application/json"
+        page = response.json()
+        rows += page["rows"]
+        tombstones += page["tombstones"]
+        watermark = page["watermark"]
+        if not page["has_more"]:
+            return rows, tombstones, watermark
+
+
+def test_paging_by_watermark_then_deletes_come_back_as_tombstones(client, db, small_pages):
+    make_user(db)
+    headers = auth_headers(client)
+    tournament = make_tournament(db, teams=6, seed=1)
+    other = make_tournament(db, teams=3, seed=2)
+    url = f"/tournaments/{tournament.id}/export"
+
+    rows, tombstones, watermark = pull(client, headers, url, "matches")
+    ids = [row["id"] for row in rows]
+    assert sorted(ids) == db.scalars(select(Match.id).where(Match.tournament_id == tournament.id).order_by(Match.id)).all()
+    assert len(ids) == len(set(ids)) == 15 and tombstones == []
+
+    match_id = ids[0]
+    assert client.delete(f"/matches/{match_id}", headers=headers).status_code == 204
+    team_id = db.scalar(select(Team.id).where(Team.tournament_id == tournament.id).order_by(Team.id.desc()))
+    cascaded = set(db.scalars(select(Match.id).where((Match.team_a_id == team_id) | (Match.team_b_id == team_id))))
+    assert client.delete(f"/tournaments/teams/{team_id}", headers=headers).status_code == 204
+    client.delete(f"/matches/{db.scalar(select(Match.id).where(Match.tournament_id == other.id))}", headers=headers)
+
+    rows, tombstones, watermark = pull(client, headers, url, "matches", watermark)
+    assert {t["id"] for t in tombstones} == cascaded | {match_id}  # the other tournament's delete is not in this feed
+    assert all(datetime.fromisoformat(t["deleted_at"]).tzinfo is not None for t in tombstones)
+    assert pull(client, headers, url, "matches", watermark)[1] == []  # each tombstone is handed out once
+
+    everywhere = pull(client, headers, "/tournaments/export-all", "matches")[1]
+    assert len(everywhere) == len(cascaded) + 2
+
+
+def test_spirit_scores_removed_with_their_match_are_tombstoned(client, db):
+    make_user(db)
+    headers = auth_headers(client)
+    tournament = make_tournament(db, teams=6, completed=1.0, spirit=1.0, seed=3)
+    url = f"/tournaments/{tournament.id}/export"
+    watermark = pull(client, headers, url, "spirit_scores")[2]
+
+    team_id = db.scalar(select(Team.id).where(Team.tournament_id == tournament.id).order_by(Team.id))
+    matches = select(Match.id).where((Match.team_a_id == team_id) | (Match.team_b_id == team_id))
+    spirit_ids = set(db.scalars(select(SpiritScore.id).where(SpiritScore.match_id.in_(matches))))
+    assert spirit_ids
+    client.delete(f"/tournaments/teams/{team_id}", headers=headers)  # matches and spirit scores go by FK cascade
+
+    assert {t["id"] for t in pull(client, headers, url, "spirit_scores", watermark)[1]} == spirit_ids
+
+
+def test_cascaded_and_bulk_deletes_of_coaching_rows_are_tombstoned(client, db):
+    make_user(db)
+    headers = auth_headers(client)
+    tournament = make_tournament(db, teams=2, seed=4)
+    participant_id, *others = make_roster(db, tournament, players=3, seed=4)
+    url = f"/tournaments/{tournament.id}/export"
+    watermarks = {dataset: pull(client, headers, url, dataset)[2] for dataset in ("attendance", "lsas_assessments")}
+    attendance_id = db.scalar(select(Attendance.id).where(Attendance.participant_id == participant_id))
+    lsas_id = db.scalar(select(LSASAssessment.id).where(LSASAssessment.participant_id == participant_id))
+    bulk_id = db.scalar(select(Attendance.id).where(Attendance.participant_id == others[0]))
+
+    assert client.delete(f"/participants/{participant_id}", headers=headers).status_code == 204
+    db.execute(delete(Attendance).where(Attendance.participant_id == others[0]))  # Core, no ORM events
+    db.commit()
+
+    assert {t["id"] for t in pull(client, headers, url, "attendance", watermarks["attendance"])[1]} == {attendance_id, bulk_id}
+    lsas = pull(client, headers, "/tournaments/export-all", "lsas_assessments", watermarks["lsas_assessments"])[1]
+    assert [t["id"] for t in lsas] == [lsas_id]
+
+
+def test_a_bad_watermark_is_a_400(client, db):
+    make_user(db)
+    tournament = make_tournament(db, teams=2, seed=5)
+    response = client.get(
+        f"/tournaments/{tournament.id}/export", params={"format": "json", "since": "not-a-watermark"}, headers=auth_headers(client),
+    )
+    assert response.status_code == 400
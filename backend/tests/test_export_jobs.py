@@ -0,0 +1,113 @@
+"""Background export jobs: reuse across unchanged data, the running registry, and artifact eviction."""
+
+import os
+import time
+import pytest
+from sqlalchemy import update
+from app.core import export_jobs
+from app.core.export_jobs import artifact_path, evict_artifacts, get_job, submit_job
+from app.models.match import Match
+from tests.seed import auth_headers, make_tournament, make_user
+
+
+class InlineExecutor:
+    """Renders on submit, as a pool with an idle worker can before submit() even returns."""
+
+    def submit(self, fn, *args):
+        fn(*args)
+
+
+@pytest.fixture
+def export_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(export_jobs.settings, "EXPORT_DIR", str(tmp_path))
+    export_jobs._export_dir.cache_clear()
+    yield tmp_path
+    export_jobs._export_dir.cache_clear()
+
+
+@pytest.fixture
+def inline(monkeypatch):
+    monkeypatch.setattr(export_jobs, "_executor", InlineExecutor)
+
+
+def wait_for(job_id: str) -> dict:
+    deadline = time.monotonic() + 30
+    while (job := get_job(job_id))["status"] in ("queued", "running"):
+        assert time.monotonic() < deadline
+        time.sleep(0.02)
+    return job
+
+
+def test_unchanged_data_reuses_the_rendered_artifact(db, export_dir):
+    tournament = make_tournament(db, teams=6, seed=1)
+    first = wait_for(submit_job(db, "parquet", "matches", tournament.id)["job_id"])
+    assert first["status"] == "completed" and artifact_path(first).exists()
+
+    again = submit_job(db, "parquet", "matches", tournament.id)
+    assert again == first  # served from disk, not rendered again
+    assert submit_job(db, "arrow", "matches", tournament.id)["job_id"] != first["job_id"]
+
+    db.execute(update(Match).where(Match.tournament_id == tournament.id).values(score_a=99))
+    db.commit()
+    changed = submit_job(db, "parquet", "matches", tournament.id)
+    assert changed["job_id"] != first["job_id"]
+    wait_for(changed["job_id"])
+    assert not export_jobs._running
+
+
+def test_a_render_finishing_before_submit_returns_is_not_left_running(db, export_dir, inline):
+    tournament = make_tournament(db, teams=4, seed=2)
+    job = submit_job(db, "csv", "matches", tournament.id)
+    assert get_job(job["job_id"])["status"] == "completed"
+    assert job["job_id"] not in export_jobs._running
+
+
+def test_a_dead_workers_job_is_taken_over(db, export_dir, inline):
+    tournament = make_tournament(db, teams=4, seed=3)
+    job = submit_job(db, "arrow", "attendance", tournament.id)
+    export_jobs._write_meta(job["job_id"], {**job, "status": "running", "submitted_at": time.time() - export_jobs.EXPORT_JOB_TIMEOUT_SECONDS - 1})
+    taken_over = submit_job(db, "arrow", "attendance", tournament.id)
+    assert taken_over["submitted_at"] > job["submitted_at"]
+    assert get_job(job["job_id"])["status"] == "completed"
+
+
+def _age(job: dict, seconds: float):
+    then = time.time() - seconds
+    for path in (artifact_path(job), export_jobs._paths(job["job_id"])[0]):
+        os.utime(path, (then, then))
+
+
+def test_eviction_drops_old_then_least_recently_used_artifacts(db, export_dir, inline, monkeypatch):
+    tournaments = [make_tournament(db, teams=4, seed=seed) for seed in (4, 5, 6, 7)]
+    jobs = [submit_job(db, "parquet", "matches", t.id) for t in tournaments]
+    for n, job in enumerate(jobs):
+        _age(job, 100 - n)  # oldest first
+
+    monkeypatch.setattr(export_jobs.settings, "EXPORT_MAX_AGE_SECONDS", 99.5)
+    evict_artifacts()
+    assert get_job(jobs[0]["job_id"]) is None and not artifact_path(jobs[0]).exists()
+
+    sizes = sum(artifact_path(job).stat().st_size for job in (jobs[1], jobs[3]))
+    monkeypatch.setattr(export_jobs.settings, "EXPORT_MAX_AGE_SECONDS", 3600)
+    monkeypatch.setattr(export_jobs.settings, "EXPORT_MAX_BYTES", sizes - 1)
+    export_jobs.touch_artifact(jobs[1])  # downloaded just now
+    export_jobs._running.add(jobs[2]["job_id"])  # being re-rendered here: never evicted
+    try:
+        evict_artifacts()
+    finally:
+        export_jobs._running.discard(jobs[2]["job_id"])
+    assert [get_job(job["job_id"]) is not None for job in jobs[1:]] == [True, True, False]
+
+
+def test_download_after_eviction_asks_for_a_new_job(client, db, export_dir, inline):
+    make_user(db)
+    headers = auth_headers(client)
+    tournament = make_tournament(db, teams=4, seed=8)
+    submitted = client.post("/tournaments/export-jobs", params={"tournament_id": tournament.id, "format": "arrow"}, headers=headers)
+    job = client.get(f"/tournaments/export-jobs/{submitted.json()['job_id']}", headers=headers).json()
+    download = f"/tournaments/export-jobs/{job['job_id']}/download"
+    assert job["status"] == "completed" and job["download_url"] == download
+    assert client.get(download, headers=headers).status_code == 200
+
+    artifact_path(get_job(job["job_id"])).unlink()
+    assert client.get(download, headers=headers).status_code == 410
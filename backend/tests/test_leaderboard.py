@@ -0,0 +1,100 @@
+"""Leaderboard engine: the standings of the per-team loop it replaced, in one query."""
+
+import pytest
+from sqlalchemy import func, update
+from app.core.leaderboard import build_standing, compute_leaderboard, rank_leaderboard
+from app.core.query_stats import track_queries
+from app.db.session import AsyncSessionLocal
+from app.models.match import Match
+from app.models.spirit_score import SpiritScore
+from app.models.team import Team
+from tests.seed import make_tournament
+
+
+def reference_leaderboard(db, tournament_id: int) -> list[dict]:
+    """The original endpoint body: one match query and one spirit query per team."""
+    leaderboard = []
+    for team in db.query(Team).filter(Team.tournament_id == tournament_id).order_by(Team.id).all():
+        matches = db.query(Match).filter(
+            Match.tournament_id == tournament_id,
+            (Match.team_a_id == team.id) | (Match.team_b_id == team.id),
+        ).all()
+        wins = losses = draws = goals_for = goals_against = 0
+        completed = [m for m in matches if m.status == "completed"]
+        for match in completed:
+            gf, ga = (match.score_a, match.score_b) if match.team_a_id == team.id else (match.score_b, match.score_a)
+            goals_for += gf
+            goals_against += ga
+            if gf > ga:
+                wins += 1
+            elif gf < ga:
+                losses += 1
+            else:
+                draws += 1
+        spirit = db.query(func.avg(SpiritScore.total)).filter(SpiritScore.to_team_id == team.id).scalar() or 0.0
+        leaderboard.append({
+            "team_id": team.id, "team_name": team.name, "matches_played": len(completed),
+            "wins": wins, "losses": losses, "draws": draws, "points": wins * 3 + draws,
+            "goals_for": goals_for, "goals_against": goals_against, "goal_diff": goals_for - goals_against,
+            "spirit_avg": round(float(spirit), 2),
+        })
+    return rank_leaderboard(leaderboard)
+
+
+async def engine_leaderboard(tournament_id: int) -> tuple[list[dict], int]:
+    """The new engine's standings and how many statements it issued."""
+    async with AsyncSessionLocal() as db:
+        with track_queries() as stats:
+            leaderboard = await compute_leaderboard(db, tournament_id)
+    return leaderboard, stats.count
+
+
+def _counters(team_id, wins=0, losses=0, draws=0, gf=0, ga=0, spirit_sum=0, spirit_count=0):
+    return {
+        "team_id": team_id, "team_name": f"Team {team_id}", "matches_played": wins + losses + draws,
+        "wins": wins, "losses": losses, "draws": draws, "goals_for": gf, "goals_against": ga,
+        "spirit_sum": spirit_sum, "spirit_count": spirit_count,
+    }
+
+
+def test_build_standing_scores_and_averages():
+    standing = build_standing(_counters(1, wins=2, losses=1, draws=1, gf=40, ga=31, spirit_sum=23, spirit_count=2))
+    assert standing["points"] == 7
+    assert standing["goal_diff"] == 9
+    assert standing["spirit_avg"] == 11.5
+    assert build_standing(_counters(2))["spirit_avg"] == 0.0
+
+
+def test_rank_breaks_ties_on_goal_diff_then_spirit():
+    teams = [
+        build_standing(_counters(1, wins=1, gf=10, ga=9, spirit_sum=8, spirit_count=1)),
+        build_standing(_counters(2, wins=1, gf=12, ga=9, spirit_sum=8, spirit_count=1)),
+        build_standing(_counters(3, wins=1, gf=10, ga=9, spirit_sum=12, spirit_count=1)),
+        build_standing(_counters(4, draws=1, gf=10, ga=10)),
+    ]
+    ranked = rank_leaderboard(teams)
+    assert [(t["team_id"], t["rank"]) for t in ranked] == [(2, 1), (3, 2), (1, 3), (4, 4)]
+
+
+@pytest.mark.parametrize("teams, completed, seed", [(1, 1.0, 0), (2, 0.0, 1), (8, 0.7, 2), (17, 0.9, 3), (30, 0.5, 4)])
+def test_matches_reference_leaderboard(db, run, teams, completed, seed):
+    tournament = make_tournament(db, teams=teams, completed=completed, seed=seed)
+    make_tournament(db, teams=4, completed=1.0, seed=seed + 100)  # another event must not leak in
+
+    leaderboard, queries = run(engine_leaderboard, tournament.id)
+
+    assert leaderboard == reference_leaderboard(db, tournament.id)
+    assert queries <= 2
+
+
+def test_unknown_tournament_is_empty(db, run):
+    assert run(engine_leaderboard, 999)[0] == []
+
+
+def test_spirit_scores_without_a_total_are_left_out_of_the_average(db, run):
+    tournament = make_tournament(db, teams=4, completed=1.0, spirit=1.0, seed=5)
+    db.execute(update(SpiritScore).where(SpiritScore.id % 3 == 0).values(total=None))
+    db.commit()
+
+    leaderboard, _ = run(engine_leaderboard, tournament.id)
+    assert leaderboard == reference_leaderboard(db, tournament.id)
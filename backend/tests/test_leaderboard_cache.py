@@ -0,0 +1,162 @@
+"""Redis leaderboards: incremental writes through the routers, rebuild races and the CLI."""
+
+import os
+import random
+import subprocess
+import sys
+from sqlalchemy import select, update
+from app.core.leaderboard import compute_leaderboard
+from app.core.leaderboard_cache import (
+    LEADERBOARD_READY_KEY, LEADERBOARD_TEAM_KEY, LEADERBOARD_VERSION_KEY,
+    _read_snapshot, check_leaderboard, read_leaderboard, store_leaderboard,
+)
+from app.core.redis import redis_client
+from app.db.session import AsyncSessionLocal
+from app.models.match import Match, MatchStatus
+from app.models.spirit_score import SpiritScore
+from app.models.team import Team, TeamStatus
+from tests.seed import auth_headers, make_tournament, make_user
+
+
+async def computed(tournament_id: int) -> list[dict]:
+    async with AsyncSessionLocal() as db:
+        return await compute_leaderboard(db, tournament_id)
+
+
+async def served(tournament_id: int) -> list[dict]:
+    """What the endpoint should answer: the computed standings, without the rank its schema leaves out."""
+    return [{k: v for k, v in team.items() if k != "rank"} for team in await computed(tournament_id)]
+
+
+async def problems(tournament_id: int) -> list[str]:
+    async with AsyncSessionLocal() as db:
+        return await check_leaderboard(db, tournament_id)
+
+
+async def begin_rebuild(tournament_id: int) -> tuple:
+    """The first half of rebuild_leaderboard: the version it saw, then what it read."""
+    version = await redis_client.get(LEADERBOARD_VERSION_KEY.format(tournament_id)) or "0"
+    return (version, *await _read_snapshot(tournament_id))
+
+
+def _tournament(db, **options):
+    tournament = make_tournament(db, **options)
+    db.execute(update(Team).values(status=TeamStatus.approved))
+    db.commit()
+    return tournament
+
+
+def test_router_writes_keep_the_cached_board_exact(client, db, run, redis):
+    make_user(db)
+    headers = auth_headers(client)
+    tournament = _tournament(db, teams=6, completed=0.5, spirit=0.5, seed=7)
+    tid = tournament.id
+    assert client.get(f"/tournaments/{tid}/leaderboard").status_code == 200
+    assert redis.exists(LEADERBOARD_READY_KEY.format(tid))
+
+    rng = random.Random(3)
+    matches = db.scalars(select(Match).where(Match.tournament_id == tid).order_by(Match.id)).all()
+    rescored = rng.sample(matches, 8) + matches[:2]  # the first two twice
+    for match in rescored:
+        status = rng.choice([MatchStatus.completed, MatchStatus.completed, MatchStatus.ongoing])
+        response = client.patch(
+            f"/matches/{match.id}/score", json={"score_a": rng.randint(0, 15), "score_b": rng.randint(0, 15), "status": status.value},
+            headers=headers,
+        )
+        assert response.status_code == 200, response.text
+
+    db.expire_all()
+    scored = set(db.scalars(select(SpiritScore.match_id)))
+    for match in [m for m in matches if m.id not in scored][:4]:
+        for giver, receiver in ((match.team_a_id, match.team_b_id), (match.team_b_id, match.team_a_id)):
+            response = client.post("/spirit/", json={
+                "match_id": match.id, "from_team_id": giver, "to_team_id": receiver, "communication": rng.randint(0, 4),
+            }, headers=headers)
+            assert response.status_code == 200, response.text
+
+    team_ids = db.scalars(select(Team.id).where(Team.tournament_id == tid).order_by(Team.id)).all()
+    created = client.post("/matches/", json={
+        "tournament_id": tid, "team_a_id": team_ids[0], "team_b_id": team_ids[1], "score_a": 15, "score_b": 2, "status": "completed",
+    }, headers=headers)
+    assert created.status_code == 200, created.text
+    assert client.post(f"/tournaments/{tid}/teams/", json={"name": "Late Entry", "tournament_id": tid}, headers=headers).status_code == 200
+    with_spirit = db.scalar(select(SpiritScore.match_id).join(Match).where(Match.tournament_id == tid).limit(1))
+    assert client.delete(f"/matches/{with_spirit}", headers=headers).status_code == 204
+
+    assert redis.exists(LEADERBOARD_READY_KEY.format(tid))  # every write was applied, none dropped the board
+    assert run(read_leaderboard, tid) == run(computed, tid)
+    assert run(problems, tid) == []
+    assert client.get(f"/tournaments/{tid}/leaderboard").json() == run(served, tid)
+
+
+def test_spirit_scores_without_a_total_are_not_averaged(client, db, run, redis):
+    make_user(db)
+    tournament = _tournament(db, teams=4, completed=1.0, spirit=1.0, seed=8)
+    db.execute(update(SpiritScore).where(SpiritScore.id % 2 == 0).values(total=None))
+    db.commit()
+    client.get(f"/tournaments/{tournament.id}/leaderboard")
+    match_id = db.scalar(select(SpiritScore.match_id).where(SpiritScore.total.is_(None)).limit(1))
+
+    assert client.delete(f"/matches/{match_id}", headers=auth_headers(client)).status_code == 204
+    assert redis.exists(LEADERBOARD_READY_KEY.format(tournament.id))
+    assert run(problems, tournament.id) == []
+
+
+def test_a_rebuild_racing_a_write_is_not_stored(client, db, run, redis):
+    make_user(db)
+    tournament = _tournament(db, teams=4, completed=0.0, seed=9)
+    tid = tournament.id
+    match_id = db.scalar(select(Match.id).where(Match.tournament_id == tid).order_by(Match.id))
+
+    version, stats, matches, spirit_ids = run(begin_rebuild, tid)
+    # The score lands after the rebuild read the database and before it stores the result
+    scored = client.patch(f"/matches/{match_id}/score", json={"score_a": 15, "score_b": 0, "status": "completed"}, headers=auth_headers(client))
+    assert scored.status_code == 200
+    assert redis.get(LEADERBOARD_VERSION_KEY.format(tid)) != version
+
+    assert run(store_leaderboard, tid, stats, matches, spirit_ids, version) is False
+    assert not redis.exists(LEADERBOARD_READY_KEY.format(tid))  # stale standings were not published
+
+    board = client.get(f"/tournaments/{tid}/leaderboard").json()
+    assert board == run(served, tid) and board[0]["wins"] == 1
+    assert redis.exists(LEADERBOARD_READY_KEY.format(tid))
+
+
+def test_writes_to_an_unbuilt_board_are_ignored_until_the_next_read(client, db, run, redis):
+    make_user(db)
+    headers = auth_headers(client)
+    tournament = _tournament(db, teams=4, completed=0.0, seed=10)
+    tid = tournament.id
+    client.get(f"/tournaments/{tid}/leaderboard")
+    client.delete(f"/tournaments/teams/{db.scalar(select(Team.id).order_by(Team.id.desc()))}", headers=headers)  # drops the board
+    assert not redis.exists(LEADERBOARD_READY_KEY.format(tid))
+    assert redis.keys(LEADERBOARD_TEAM_KEY.format(tid, "*")) == []
+
+    match_id = db.scalar(select(Match.id).where(Match.tournament_id == tid).order_by(Match.id))
+    client.patch(f"/matches/{match_id}/score", json={"score_a": 3, "score_b": 15, "status": "completed"}, headers=headers)
+    assert redis.keys(LEADERBOARD_TEAM_KEY.format(tid, "*")) == []
+
+    assert client.get(f"/tournaments/{tid}/leaderboard").json() == run(served, tid)
+    assert len(redis.keys(LEADERBOARD_TEAM_KEY.format(tid, "*"))) == 3
+
+
+def _cli(*args) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, "-m", "app.core.leaderboard_cache", *args],
+        capture_output=True, text=True, env=os.environ, cwd=os.path.dirname(os.path.dirname(__file__)), timeout=60,
+    )
+
+
+def test_cli_rebuild_and_check(client, db, redis):
+    tournament = make_tournament(db, teams=5, seed=11)
+    tid = str(tournament.id)
+
+    assert _cli("check", tid).returncode == 1  # not cached yet
+    rebuilt = _cli("rebuild", tid)
+    assert rebuilt.returncode == 0 and "Rebuilt leaderboard for tournament" in rebuilt.stdout
+    assert _cli("check", tid).returncode == 0
+
+    team_id = db.scalar(select(Team.id).where(Team.tournament_id == tournament.id).order_by(Team.id))
+    redis.hincrby(LEADERBOARD_TEAM_KEY.format(tid, team_id), "wins", 1)
+    checked = _cli("check", tid)
+    assert checked.returncode == 1 and f"team {team_id} wins is" in checked.stdout
@@ -0,0 +1,114 @@
+"""Request logging middleware: headers, streaming pass-through and route classification."""
+
+import asyncio
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from loguru import logger
+from app.middleware.logging_middleware import LoggingMiddleware, _affects_cache
+
+
+def make_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(LoggingMiddleware)
+
+    @app.get("/tournaments/{tournament_id}")
+    def tournament(tournament_id: int):
+        return {"id": tournament_id}
+
+    @app.patch("/matches/{match_id}/score")
+    def score(match_id: int):
+        return {"id": match_id}
+
+    @app.get("/export")
+    def export():
+        return StreamingResponse((f"row {n}\n" for n in range(3)), media_type="text/csv")
+
+    @app.get("/broken")
+    def broken():
+        raise RuntimeError("boom")
+
+    return app
+
+
+@pytest.fixture
+def records():
+    captured = []
+    handler = logger.add(lambda m: captured.append(m.record), level="INFO", filter="app.middleware")
+    yield captured
+    logger.remove(handler)
+
+
+@pytest.mark.parametrize("method, route, expected", [
+    ("PATCH", "/matches/{match_id}/score", True),
+    ("POST", "/tournaments/{tournament_id}/teams/", True),
+    ("DELETE", "/spirit/{score_id}", True),
+    ("GET", "/tournaments/{tournament_id}", False),
+    ("POST", "/auth/login", False),
+    ("POST", "/coaching/sync", False),
+    ("POST", "unmatched", False),
+])
+def test_affects_cache(method, route, expected):
+    assert _affects_cache(method, route) is expected
+
+
+def test_headers_and_structured_log(records):
+    with TestClient(make_app()) as client:
+        response = client.get("/tournaments/7")
+    assert response.json() == {"id": 7}
+    assert response.headers["X-DB-Queries"] == "0"
+    assert response.headers["X-DB-Time-Ms"] == "0.0"
+
+    (record,) = records
+    assert record["extra"] | {"duration_ms": None} == {
+        "method": "GET", "path": "/tournaments/7", "route": "/tournaments/{tournament_id}",
+        "status": 200, "duration_ms": None, "db_queries": 0, "db_ms": 0,
+    }
+    assert "Cache" not in record["message"]
+
+
+def test_mutations_of_cached_resources_are_flagged(records):
+    with TestClient(make_app()) as client:
+        client.patch("/matches/3/score")
+    assert records[0]["message"].endswith("| Cache: likely invalidated")
+
+
+def test_failures_are_logged_as_500(records):
+    with TestClient(make_app(), raise_server_exceptions=False) as client:
+        assert client.get("/broken").status_code == 500
+    assert records[0]["extra"]["status"] == 500
+
+
+def test_streaming_responses_pass_through_unbuffered(records):
+    app = make_app()
+    sent = []
+
+    async def receive():
+        await asyncio.Event().wait()  # the client never disconnects
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": "/export", "raw_path": b"/export", "query_string": b"", "headers": [], "server": ("test", 80), "client": ("test", 1),
+    }
+    asyncio.run(app(scope, receive, send))
+
+    start, *bodies = sent
+    assert start["status"] == 200 and (b"x-db-queries", b"0") in start["headers"]
+    chunks = [m["body"] for m in bodies if m["body"]]
+    assert chunks == [b"row 0\n", b"row 1\n", b"row 2\n"]  # one message per chunk, not one buffered body
+    assert bodies[-1]["more_body"] is False
+    assert records[0]["extra"]["route"] == "/export"
+
+
+def test_other_scopes_are_untouched():
+    seen = []
+
+    async def inner(scope, receive, send):
+        seen.append(scope["type"])
+
+    asyncio.run(LoggingMiddleware(inner)({"type": "lifespan"}, None, None))
+    assert seen == ["lifespan"]
@@ -0,0 +1,116 @@
+"""Keyset pagination: walking X-Next-Cursor visits every row once, in order, and bad cursors are a 400."""
+
+import base64
+import json
+from datetime import datetime, timedelta, timezone
+import pytest
+from fastapi import HTTPException, Response
+from sqlalchemy import select
+from app.core.pagination import NEXT_CURSOR_HEADER, Page, _decode_cursor, paginate
+from app.models.notification import Notification
+from app.models.participant import Participant
+from tests.seed import auth_headers, make_user
+
+START = datetime(2025, 6, 1, 9, 30, 0, 123456, tzinfo=timezone.utc)
+SORT = (Notification.created_at, Notification.id)
+
+
+def _notifications(db, user_id: int, count: int = 23) -> None:
+    """Rows in bursts of four sharing a created_at, inserted out of order."""
+    db.add_all(
+        Notification(user_id=user_id, type="match", created_at=START + timedelta(seconds=n // 4))
+        for n in reversed(range(count))
+    )
+    db.commit()
+
+
+def walk(db, query, limit: int, descending: bool) -> tuple[list, int]:
+    """Every row paginate() hands out following its cursors, and the number of pages."""
+    rows, cursor, pages = [], None, 0
+    while True:
+        response = Response()
+        rows += paginate(db, query, SORT, Page(limit=limit, cursor=cursor), response, descending=descending)
+        pages += 1
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if cursor is None:
+            return rows, pages
+
+
+def cursor_of(values) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+@pytest.mark.parametrize("descending", [False, True])
+@pytest.mark.parametrize("limit", [1, 3, 4, 23, 100])
+def test_walking_the_cursor_visits_every_row_once_in_order(db, descending, limit):
+    user = make_user(db)
+    _notifications(db, user.id)
+    query = select(Notification).where(Notification.user_id == user.id)
+
+    rows, pages = walk(db, query, limit, descending)
+    ids = [row.id for row in rows]
+    assert len(ids) == len(set(ids)) == 23
+    assert pages == -(-23 // limit)
+    assert [(r.created_at, r.id) for r in rows] == sorted(((r.created_at, r.id) for r in rows), reverse=descending)
+
+
+def test_the_inbox_endpoint_pages_newest_first(client, db):
+    user = make_user(db)
+    headers = auth_headers(client)
+    _notifications(db, user.id)
+    seen, cursor = [], None
+    while True:
+        response = client.get("/notifications/", params={"limit": 5, **({"cursor": cursor} if cursor else {})}, headers=headers)
+        assert response.status_code == 200
+        seen += [(n["created_at"], n["id"]) for n in response.json()]
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if cursor is None:
+            break
+    assert len(set(seen)) == len(seen) == 23
+    assert [n for _, n in seen] == db.scalars(select(Notification.id).order_by(*(c.desc() for c in SORT))).all()
+
+
+def test_the_participant_list_pages_by_id(client, db):
+    make_user(db)
+    headers = auth_headers(client)
+    db.add_all(Participant(first_name=f"P{n}") for n in range(11))
+    db.commit()
+    seen, cursor = [], None
+    while True:
+        response = client.get("/participants/", params={"limit": 4, **({"cursor": cursor} if cursor else {})}, headers=headers)
+        assert response.status_code == 200
+        seen += [p["id"] for p in response.json()]
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if cursor is None:
+            break
+    assert seen == sorted(set(seen)) and len(seen) == 11
+
+
+@pytest.mark.parametrize("cursor", [
+    "not base64 at all!",
+    base64.urlsafe_b64encode(b"\xff\xfe").decode(),  # not UTF-8
+    cursor_of({"created_at": "2025-06-01"}),  # not a list
+    cursor_of([START.isoformat()]),  # too short
+    cursor_of([START.isoformat(), 1, 2]),  # too long
+    cursor_of(["yesterday", 1]),
+    cursor_of([20250601, 1]),  # a number for a timestamp
+    cursor_of([START.isoformat(), "1"]),  # a string for an integer id
+    cursor_of([START.isoformat(), 1.5]),
+    cursor_of([START.isoformat(), True]),
+    cursor_of([START.isoformat(), 2**70]),  # out of range for the column
+    cursor_of([START.isoformat(), [1]]),
+])
+def test_garbage_cursors_are_a_400(client, db, cursor):
+    with pytest.raises(HTTPException) as raised:
+        _decode_cursor(cursor, SORT)
+    assert raised.value.status_code == 400
+
+    make_user(db)
+    response = client.get("/notifications/", params={"cursor": cursor}, headers=auth_headers(client))
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+
+
+def test_a_cursor_without_padding_round_trips(db):
+    cursor = cursor_of([START.isoformat(), 7]).rstrip("=")
+    assert _decode_cursor(cursor, SORT) == [START, 7]
@@ -0,0 +1,96 @@
+"""The password hashing pool: the pending bound, its gauge, and upgrading outdated hashes at login."""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import bcrypt
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import select
+from app.core import password_pool
+from app.core.metrics import PASSWORD_HASH_PENDING
+from app.core.security import verify_password
+from app.models.user import User
+from tests.seed import PASSWORD, make_user
+
+
+@pytest.fixture
+def stalled_pool(monkeypatch):
+    """A pool whose verifications block until release is set."""
+    release = threading.Event()
+
+    def verify(password, hashed):
+        release.wait(10)
+        return True, None
+
+    executor = ThreadPoolExecutor(max_workers=4)
+    monkeypatch.setattr(password_pool, "_executor", executor)
+    monkeypatch.setattr(password_pool, "verify_and_update_password", verify)
+    monkeypatch.setattr(password_pool.settings, "PASSWORD_HASH_MAX_PENDING", 2)
+    yield release
+    release.set()
+    executor.shutdown()
+
+
+def test_a_saturated_pool_refuses_with_503_and_the_gauge_tracks_pending_calls(client, run, stalled_pool):
+    base = PASSWORD_HASH_PENDING._value.get()
+
+    async def scenario():
+        running = [asyncio.create_task(password_pool.verify_password_async("pw", "hash")) for _ in range(2)]
+        await asyncio.sleep(0)
+        assert PASSWORD_HASH_PENDING._value.get() == base + 2
+        with pytest.raises(HTTPException) as refused:
+            await password_pool.verify_password_async("pw", "hash")
+        assert refused.value.status_code == 503 and refused.value.headers == {"Retry-After": "1"}
+        assert PASSWORD_HASH_PENDING._value.get() == base + 2  # the refused call never counted
+
+        stalled_pool.set()
+        assert await asyncio.gather(*running) == [(True, None)] * 2
+        assert PASSWORD_HASH_PENDING._value.get() == base
+        assert await password_pool.verify_password_async("pw", "hash") == (True, None)  # room again
+
+    run(scenario)
+
+
+def test_logins_beyond_the_bound_get_503(client, db, monkeypatch):
+    make_user(db)
+    monkeypatch.setattr(password_pool.settings, "PASSWORD_HASH_MAX_PENDING", 0)
+    response = client.post("/auth/login", data={"username": "admin", "password": PASSWORD})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_the_gauge_is_exported(client):
+    assert "password_hash_pending" in client.get("/metrics").text
+
+
+@pytest.fixture
+def stronger_hashing(monkeypatch):
+    """Workers spawned from here on hash with one more round than the test default."""
+    rounds = int(password_pool.settings.BCRYPT_ROUNDS) + 1
+    password_pool.shutdown_pool()
+    monkeypatch.setenv("BCRYPT_ROUNDS", str(rounds))
+    yield rounds
+    password_pool.shutdown_pool()  # the next pool starts from the restored environment
+
+
+def test_an_outdated_hash_is_upgraded_by_a_successful_login(client, db, stronger_hashing):
+    legacy = bcrypt.hashpw(PASSWORD.encode(), bcrypt.gensalt(stronger_hashing - 1)).decode()
+    user = make_user(db, "veteran")
+    user.hashed_password = legacy
+    db.commit()
+
+    failed = client.post("/auth/login", data={"username": "veteran", "password": "wrong"})
+    assert failed.status_code == 401
+    db.expire_all()
+    assert db.scalar(select(User.hashed_password).where(User.username == "veteran")) == legacy
+
+    assert client.post("/auth/login", data={"username": "veteran", "password": PASSWORD}).status_code == 200
+    db.expire_all()
+    upgraded = db.scalar(select(User.hashed_password).where(User.username == "veteran"))
+    assert upgraded != legacy and upgraded.startswith(f"$2b${stronger_hashing:02d}$")
+    assert verify_password(PASSWORD, upgraded)
+
+    assert client.post("/auth/login", data={"username": "veteran", "password": PASSWORD}).status_code == 200
+    db.expire_all()
+    assert db.scalar(select(User.hashed_password).where(User.username == "veteran")) == upgraded  # only once
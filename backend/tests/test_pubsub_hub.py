@@ -0,0 +1,143 @@
+"""Pub/sub fan-out: many subscribers, slow or broken consumers, and the Redis side."""
+
+import asyncio
+import json
+import time
+from app.core import pubsub_hub
+from app.core.pubsub_hub import SUBSCRIBER_QUEUE_SIZE, PubSubHub
+from app.core.redis import redis_client
+
+
+class FakeSocket:
+    """Enough of a WebSocket for relay(): sends are recorded, stalled forever, or fail."""
+
+    def __init__(self, mode: str = "ok"):
+        self.mode = mode
+        self.sent: list[str] = []
+        self.closed = asyncio.Event()
+
+    async def send_text(self, text: str):
+        if self.mode == "stalled":
+            await asyncio.Event().wait()
+        if self.mode == "broken":
+            raise ConnectionResetError("peer went away")
+        self.sent.append(text)
+
+    async def receive(self):
+        await self.closed.wait()
+        return {"type": "websocket.disconnect"}
+
+
+def test_dispatch_reaches_every_subscriber_of_the_channel():
+    async def scenario():
+        hub = PubSubHub()
+        hub.start = lambda: None  # no Redis: messages are dispatched by hand
+        spectators = [hub.subscribe("live:match:1") for _ in range(10_000)]
+        other = hub.subscribe("live:match:2")
+        hub.dispatch("live:match:1", "goal")
+        assert all(q.get_nowait() == "goal" for q in spectators)
+        assert other.empty()
+        assert hub.connection_count == 10_001
+
+        for queue in spectators:
+            hub.unsubscribe("live:match:1", queue)
+        assert hub.connection_count == 1 and "live:match:1" not in hub._subscribers
+
+    asyncio.run(scenario())
+
+
+def test_a_full_queue_drops_its_oldest_messages_only():
+    async def scenario():
+        hub = PubSubHub()
+        hub.start = lambda: None
+        slow, fast = hub.subscribe("live:match:1"), hub.subscribe("live:match:1")
+        for n in range(SUBSCRIBER_QUEUE_SIZE + 10):
+            hub.dispatch("live:match:1", str(n))
+            assert fast.get_nowait() == str(n)
+        assert slow.qsize() == SUBSCRIBER_QUEUE_SIZE
+        assert slow.get_nowait() == "10"
+
+    asyncio.run(scenario())
+
+
+def test_a_failing_listener_does_not_stop_the_others():
+    hub = PubSubHub()
+    seen = []
+    hub.listen("auth:token-revoked", lambda data: 1 / 0)
+    hub.listen("auth:token-revoked", seen.append)
+    hub.dispatch("auth:token-revoked", "jti")
+    hub._notify("auth:token-revoked", None)
+    assert seen == ["jti", None]
+
+
+def test_stalled_and_broken_sockets_do_not_hold_up_the_rest(monkeypatch):
+    async def scenario():
+        hub = PubSubHub()
+        hub.start = lambda: None
+        monkeypatch.setattr(pubsub_hub, "hub", hub)
+        sockets = [FakeSocket() for _ in range(50)] + [FakeSocket("stalled"), FakeSocket("broken")]
+        relays = [asyncio.create_task(pubsub_hub.relay(s, "live:match:1")) for s in sockets]
+        await asyncio.sleep(0)
+        assert hub.connection_count == 52
+
+        for n in range(200):
+            hub.dispatch("live:match:1", str(n))
+            await asyncio.sleep(0)
+        await asyncio.sleep(0.01)
+
+        healthy, stalled, broken = sockets[:50], sockets[50], sockets[51]
+        assert all(s.sent == [str(n) for n in range(200)] for s in healthy)
+        assert relays[51].done() and broken.sent == []  # its relay ended and unsubscribed
+        assert hub.connection_count == 51
+        for socket in healthy + [stalled]:
+            socket.closed.set()
+        await asyncio.wait_for(asyncio.gather(*relays), 1)
+        assert hub.connection_count == 0
+
+    asyncio.run(scenario())
+
+
+async def _redis_round_trip(subscribers: int) -> tuple[list[str], list[str | None]]:
+    hub = PubSubHub(("test:*",))
+    reconnects = []
+    hub.listen("test:control", reconnects.append)
+    queues = [hub.subscribe("test:match:1") for _ in range(subscribers)]
+    try:
+        while await redis_client.publish("test:match:1", json.dumps({"ready": True})) == 0:
+            await asyncio.sleep(0.01)
+        await asyncio.wait_for(queues[-1].get(), 5)
+        for queue in queues[:-1]:
+            queue.get_nowait()
+
+        await redis_client.publish("test:match:1", json.dumps({"score_a": 3}))
+        await asyncio.wait_for(queues[-1].get(), 5)
+        received = [queue.get_nowait() for queue in queues[:-1]]
+    finally:
+        await hub.stop()
+    return received, reconnects
+
+
+def test_one_redis_subscription_serves_every_spectator(client, run, redis):
+    received, reconnects = run(_redis_round_trip, 2_000)
+    assert received == [json.dumps({"score_a": 3})] * 1_999
+    assert reconnects == [None]  # listeners are told to resync after every (re)connect
+    assert redis.pubsub_numpat() >= 1
+
+
+def _wait_for_spectators(count: int):
+    """The relay subscribes after the handshake, on the app's loop."""
+    deadline = time.monotonic() + 5
+    while len(pubsub_hub.hub._subscribers.get("live:match:7", ())) != count:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_score_updates_reach_websocket_spectators(client, redis):
+    with client.websocket_connect("/ws/matches/7") as first, client.websocket_connect("/ws/matches/7") as second:
+        _wait_for_spectators(2)
+        redis.publish("live:match:7", json.dumps({"match_id": 7, "score_a": 1}))
+        assert json.loads(first.receive_text())["score_a"] == json.loads(second.receive_text())["score_a"] == 1
+        # Let both relays see the disconnect before the test client tears their tasks down
+        first.close()
+        second.close()
+        _wait_for_spectators(0)
@@ -0,0 +1,160 @@
+"""
+Index usage of the busiest endpoints.
+
+The real handlers run against seeded data while every statement they send is
+recorded; each one is then EXPLAINed with sequential scans disabled, so a
+plan that still contains a Seq Scan has no usable index, whatever the table size.
+"""
+
+import re
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import event, select
+from app.db import session as db_session
+from app.models.match import Match, MatchStatus
+from app.models.media import Media
+from app.models.notification import Notification
+from app.models.participant import Participant, ParticipantType
+from app.models.session import Session as CoachingSession
+from app.models.team import Team
+from app.models.user import RoleEnum
+from tests.seed import auth_headers, make_roster, make_tournament, make_user
+
+_PLANNED = ("SELECT", "WITH", "UPDATE", "DELETE")
+
+
+@contextmanager
+def recorded_statements():
+    """Statements sent through either engine (sync or asyncpg) while the block runs."""
+    recorded = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(_PLANNED):
+            recorded.append((statement, parameters))
+
+    engines = (db_session.engine, db_session.async_engine.sync_engine)
+    for target in engines:
+        event.listen(target, "before_cursor_execute", record)
+    try:
+        yield recorded
+    finally:
+        for target in engines:
+            event.remove(target, "before_cursor_execute", record)
+
+
+def _for_psycopg(statement: str, parameters):
+    """asyncpg numbers its placeholders ($1); psycopg2 wants %s in order of appearance."""
+    if not isinstance(parameters, (tuple, list)):
+        return statement, parameters
+    numbers = [int(n) for n in re.findall(r"\$(\d+)", statement)]
+    return re.sub(r"\$\d+", "%s", statement.replace("%", "%%")), tuple(parameters[n - 1] for n in numbers)
+
+
+def sequential_scans(statement: str, parameters) -> list[str]:
+    statement, parameters = _for_psycopg(statement, parameters)
+    with db_session.engine.connect() as conn:
+        conn.exec_driver_sql("SET enable_seqscan = off")
+        plan = [row[0] for row in conn.exec_driver_sql(f"EXPLAIN {statement}", parameters)]
+        conn.rollback()
+    return sorted({line.split("Seq Scan on ")[1].split()[0] for line in plan if "Seq Scan on " in line})
+
+
+def _seed(db):
+    admin = make_user(db)
+    coach = make_user(db, "coach", RoleEnum.coach)
+    tournament = make_tournament(db, teams=12, seed=1)
+    make_tournament(db, teams=6, seed=2)
+    make_roster(db, tournament)
+
+    coach_profile = Participant(first_name="Coach", participant_type=ParticipantType.coach, user_id=coach.id)
+    db.add(coach_profile)
+    db.flush()
+    db.execute(Participant.__table__.insert(), [
+        {"first_name": f"Trainee {n}", "participant_type": ParticipantType.child, "coach_id": coach_profile.id} for n in range(30)
+    ])
+    db.execute(CoachingSession.__table__.insert(), [
+        {"date": tournament.start_date + timedelta(days=n), "coach_id": coach_profile.id if n % 2 else None} for n in range(40)
+    ])
+    now = datetime.now(timezone.utc)
+    db.execute(Notification.__table__.insert(), [
+        {"user_id": user_id, "type": "match_update", "payload_json": {"n": n}, "created_at": now - timedelta(minutes=n)}
+        for user_id in (admin.id, coach.id) for n in range(150)
+    ])
+    db.execute(Media.__table__.insert(), [
+        {"tournament_id": tournament.id, "filename": f"{n}.jpg", "url": f"/media/{n}.jpg", "is_public": n % 5 != 0,
+         "created_at": now - timedelta(minutes=n)}
+        for n in range(150)
+    ])
+    db.commit()
+    with db_session.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.exec_driver_sql("ANALYZE")
+    return tournament
+
+
+def _next_page(client, path, headers, **params):
+    first = client.get(path, params=params, headers=headers)
+    assert first.status_code == 200, first.text
+    return {**params, "cursor": first.headers["X-Next-Cursor"]}
+
+
+def test_hot_paths_use_indexes(client, db):
+    tournament = _seed(db)
+    tid = tournament.id
+    headers = auth_headers(client)
+    coach_headers = auth_headers(client, "coach")
+    team_id = db.scalar(select(Team.id).where(Team.tournament_id == tid).order_by(Team.id))
+    played = db.scalars(
+        select(Match).where(Match.tournament_id == tid, Match.status == MatchStatus.completed).order_by(Match.id)
+    ).all()
+    unscored = [m for m in played if not m.spirit_scores][0]
+    session_id = db.scalar(select(CoachingSession.id).order_by(CoachingSession.id))
+    players = db.scalars(select(Participant.id).where(Participant.participant_type == ParticipantType.child).limit(20)).all()
+    sync_token = client.post("/coaching/sync", json={}, headers=coach_headers).json()["token"]
+
+    calls = {
+        "leaderboard": lambda: client.get(f"/tournaments/{tid}/leaderboard"),
+        "tournament matches by status": lambda: client.get("/matches/", params={"tournament_id": tid, "status": "completed"}, headers=headers),
+        "matches of a team": lambda: client.get("/matches/", params={"team_id": team_id}, headers=headers),
+        "match list page": lambda: client.get(
+            "/matches/", params=_next_page(client, "/matches/", headers, tournament_id=tid, limit=10), headers=headers,
+        ),
+        "schedule": lambda: client.get(f"/matches/tournaments/{tid}/schedule", headers=headers),
+        "conflicts": lambda: client.get(f"/matches/tournaments/{tid}/conflicts", headers=headers),
+        "score update": lambda: client.patch(
+            f"/matches/{played[0].id}/score", json={"score_a": 15, "score_b": 3, "status": "completed"}, headers=headers,
+        ),
+        "spirit submission": lambda: client.post("/spirit/", json={
+            "match_id": unscored.id, "from_team_id": unscored.team_a_id, "to_team_id": unscored.team_b_id,
+        }, headers=headers),
+        "approved teams": lambda: client.get(f"/tournaments/{tid}/teams/", params={"status": "approved"}, headers=headers),
+        "team registration": lambda: client.post(f"/tournaments/{tid}/teams/", json={"name": "Late Entry", "tournament_id": tid}, headers=headers),
+        "team roster": lambda: client.get(f"/teams/{team_id}/roster", headers=headers),
+        "notification inbox page": lambda: client.get(
+            "/notifications/", params=_next_page(client, "/notifications/", headers), headers=headers,
+        ),
+        "sessions": lambda: client.get("/coaching/sessions/", headers=headers),
+        "session attendance": lambda: client.post(
+            f"/coaching/sessions/{session_id}/attendance",
+            json=[{"participant_id": pid, "date": "2025-06-01", "present": True} for pid in players], headers=headers,
+        ),
+        "coach sync": lambda: client.post("/coaching/sync", json={"token": sync_token}, headers=coach_headers),
+        "tournament gallery page": lambda: client.get(
+            f"/media/tournaments/{tid}/gallery", params=_next_page(client, f"/media/tournaments/{tid}/gallery", headers, limit=50),
+        ),
+        "participants by type": lambda: client.get(
+            "/participants/", params=_next_page(client, "/participants/", headers, participant_type="child", limit=10), headers=headers,
+        ),
+        "tournament analytics": lambda: client.get(f"/analytics/tournaments/{tid}", headers=headers),
+    }
+
+    problems = []
+    for name, call in calls.items():
+        with recorded_statements() as statements:
+            response = call()
+        assert response.status_code < 300, f"{name}: {response.status_code} {response.text}"
+        assert statements, name
+        for statement, parameters in statements:
+            scans = sequential_scans(statement, parameters)
+            if scans:
+                problems.append(f"{name}: sequential scan on {', '.join(scans)}\n    {' '.join(statement.split())[:300]}")
+    assert not problems, "\n".join(problems)
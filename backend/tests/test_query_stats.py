@@ -0,0 +1,147 @@
+"""Per-request statement counting, repeated-shape detection and query budgets."""
+
+from collections import Counter
+from types import SimpleNamespace
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from loguru import logger
+from sqlalchemy import select, text
+from app.core import query_stats
+from app.core.query_stats import LatencyTracker, QueryStats, query_budget, report, track_queries
+from app.db.session import SessionLocal
+from app.middleware.logging_middleware import LoggingMiddleware
+from app.models.match import Match
+from app.models.team import Team
+from tests.seed import auth_headers, make_tournament, make_user
+
+
+@pytest.fixture
+def warnings():
+    messages = []
+    handler = logger.add(lambda m: messages.append(m.record["message"]), level="WARNING")
+    yield messages
+    logger.remove(handler)
+
+
+def test_latency_average_follows_observations_and_decays_when_idle(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(query_stats, "time", SimpleNamespace(monotonic=lambda: now[0], perf_counter=lambda: now[0]))
+    tracker = LatencyTracker(alpha=0.5, half_life=5.0)
+    assert tracker.value == 0
+    tracker.observe(0.2)
+    tracker.observe(0.2)
+    assert tracker.value == pytest.approx(0.15)
+    now[0] += 5
+    assert tracker.value == pytest.approx(0.075)  # one half-life without traffic
+    now[0] += 10
+    assert tracker.value == pytest.approx(0.075 / 4)
+    tracker.observe(0.0375)
+    assert tracker.value == pytest.approx((0.075 / 4 + 0.0375) / 2)
+
+
+def test_repeated_shapes_and_budget():
+    stats = QueryStats(count=12, shapes=Counter({"SELECT a": 10, "SELECT b": 2}))
+    assert stats.repeated(10) == [("SELECT a", 10)]
+    assert stats.repeated(2) == [("SELECT a", 10), ("SELECT b", 2)]
+    assert not stats.over_budget
+    stats.budget = 12
+    assert not stats.over_budget
+    stats.budget = 11
+    assert stats.over_budget
+
+
+def test_query_budget_declares_on_the_current_request():
+    declare = query_budget(3)
+    declare()  # outside a tracked request: nothing to do
+    with track_queries() as stats:
+        declare()
+    assert stats.budget == 3
+
+
+@pytest.mark.parametrize("mode, returned, logged", [("raise", True, False), ("warn", False, True), ("off", False, False)])
+def test_report_modes(monkeypatch, warnings, mode, returned, logged):
+    monkeypatch.setattr(query_stats.settings, "QUERY_BUDGET_MODE", mode)
+    stats = QueryStats(count=4, budget=3)
+    message = report(stats, "GET /matches/")
+    assert (message == "GET /matches/ issued 4 queries, budget is 3") is returned
+    assert (message is None) is not returned
+    assert any("budget is 3" in m for m in warnings) is logged
+
+
+def test_report_flags_repeated_shapes(monkeypatch, warnings):
+    monkeypatch.setattr(query_stats.settings, "QUERY_REPEAT_THRESHOLD", 3)
+    report(QueryStats(count=4, shapes=Counter({"SELECT teams.id\n  FROM teams": 3, "SELECT 1": 1})), "GET /x")
+    assert warnings == ["Possible N+1 in GET /x: 3x SELECT teams.id FROM teams"]
+
+
+def test_lazy_loads_show_up_as_repeated_shapes(db):
+    make_tournament(db, teams=6)
+    db.expire_all()
+    with track_queries() as stats:
+        matches = db.scalars(select(Match)).all()
+        names = [(m.team_a.name, m.team_b.name) for m in matches]
+    assert len(names) == 15
+    assert stats.count > 6
+    (shape, repeated), = stats.repeated(5)
+    assert "FROM teams" in shape and repeated == stats.count - 1
+    assert stats.seconds > 0
+
+
+def test_statements_outside_a_request_are_not_attributed(db):
+    with track_queries() as stats:
+        pass
+    db.execute(text("SELECT 1"))
+    assert stats.count == 0
+
+
+@pytest.mark.parametrize("params", [
+    {},
+    {"status": "completed"},
+    {"team_id": "first"},
+    {"limit": 500},
+])
+def test_match_list_stays_within_its_budget(client, db, params):
+    make_user(db)
+    headers = auth_headers(client)
+    tournament = make_tournament(db, teams=24)
+    if params.get("team_id") == "first":
+        params = {"team_id": db.scalar(select(Team.id).order_by(Team.id))}
+    response = client.get("/matches/", params={"tournament_id": tournament.id, **params}, headers=headers)
+    assert response.status_code == 200, response.text  # QUERY_BUDGET_MODE=raise in the test settings
+    assert response.json()
+    assert int(response.headers["X-DB-Queries"]) <= 3
+    assert float(response.headers["X-DB-Time-Ms"]) > 0
+
+
+def test_schedule_stays_within_its_budget(client, db):
+    make_user(db)
+    tournament = make_tournament(db, teams=24)
+    response = client.get(f"/matches/tournaments/{tournament.id}/schedule", headers=auth_headers(client))
+    assert response.status_code == 200, response.text
+    days = response.json()["schedule"]
+    assert sum(len(field["matches"]) for day in days for field in day["fields"]) == 276
+    assert int(response.headers["X-DB-Queries"]) <= 3
+
+
+def test_going_over_budget_fails_the_request(engine, monkeypatch):
+    monkeypatch.setattr(query_stats.settings, "QUERY_BUDGET_MODE", "raise")
+    app = FastAPI()
+    app.add_middleware(LoggingMiddleware)
+
+    @app.get("/chatty", dependencies=[Depends(query_budget(1))])
+    def chatty():
+        with SessionLocal() as db:
+            return [db.scalar(text(f"SELECT {n}")) for n in range(2)]
+
+    @app.get("/quiet", dependencies=[Depends(query_budget(2))])
+    def quiet():
+        return chatty()
+
+    with TestClient(app) as client:
+        over = client.get("/chatty")
+        assert over.status_code == 500
+        assert over.json() == {"detail": "GET /chatty issued 2 queries, budget is 1"}
+        within = client.get("/quiet")
+        assert within.status_code == 200 and within.json() == [0, 1]
+        assert within.headers["X-DB-Queries"] == "2"
@@ -0,0 +1,200 @@
+"""Local token buckets, their reconciliation with Redis, and the route and adaptive limiters."""
+
+from types import SimpleNamespace
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from app.core import rate_limiter
+from app.core.metrics import RATE_LIMIT_DECISIONS, RATE_LIMIT_SYNC_ERRORS
+from app.core.rate_limiter import (
+    RATE_LIMIT_KEY, AdaptiveRateLimiter, RateLimiter, RatePolicy, TokenBucket, bucket_for, sync_buckets,
+)
+from app.core.security import create_access_token
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    perf_counter = monotonic
+
+
+class DownRedis:
+    def pipeline(self, **kwargs):
+        raise ConnectionError("Redis is down")
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limiter, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def buckets(monkeypatch):
+    """An empty bucket registry, restored afterwards."""
+    monkeypatch.setattr(rate_limiter, "_buckets", {})
+    monkeypatch.setattr(rate_limiter, "_redis_ok", True)
+    return rate_limiter._buckets
+
+
+def test_take_until_empty_then_wait_for_refill(clock):
+    bucket = TokenBucket(capacity=3, rate=0.5)
+    assert [bucket.take(1) for _ in range(3)] == [0, 0, 0]
+    assert bucket.take(1) == 2.0  # one token at 0.5/s
+    assert bucket.take(2) == 4.0
+    clock.now += 2
+    assert bucket.take(1) == 0
+    assert bucket.spent == 4
+
+
+def test_refill_is_capped_at_capacity(clock):
+    bucket = TokenBucket(capacity=5, rate=1)
+    bucket.take(5)
+    clock.now += 3600
+    assert bucket.take(5) == 0
+    assert bucket.take(1) == 1.0
+
+
+def test_idle_means_full_and_nothing_left_to_sync(clock):
+    bucket = TokenBucket(capacity=2, rate=1)
+    assert bucket.idle
+    bucket.take(1)
+    clock.now += 10
+    assert not bucket.idle  # refilled, but the spend is not in Redis yet
+    bucket.spent = 0
+    assert bucket.idle
+
+
+def test_bucket_for_reuses_buckets_until_the_limit_changes(buckets, clock):
+    bucket = bucket_for("k", 10, 1)
+    assert bucket_for("k", 10, 1) is bucket
+    assert bucket_for("other", 10, 1) is not bucket
+    assert bucket_for("k", 20, 1) is not bucket
+    assert len(buckets) == 2
+
+
+def test_route_limiter_denies_with_retry_after(buckets):
+    app = FastAPI()
+    limit = RateLimiter("test", times=3, seconds=60)
+
+    @app.get("/a", dependencies=[Depends(limit)])
+    def a():
+        return "a"
+
+    @app.get("/b/{n}", dependencies=[Depends(limit)])
+    def b(n: int):
+        return "b"
+
+    denied_before = RATE_LIMIT_DECISIONS.labels("test", "denied")._value.get()
+    with TestClient(app) as client:
+        assert [client.get("/a").status_code for _ in range(4)] == [200, 200, 200, 429]
+        assert client.get("/a").headers["Retry-After"] == "20"
+        # Budgets are per route template, not per URL
+        assert [client.get(f"/b/{n}").status_code for n in range(4)] == [200, 200, 200, 429]
+        assert client.get("/a", headers={"X-Forwarded-For": "10.0.0.9, 10.0.0.1"}).status_code == 200
+    assert RATE_LIMIT_DECISIONS.labels("test", "denied")._value.get() - denied_before == 3
+
+
+def test_sync_shares_one_budget_between_processes(client, run, redis, buckets):
+    first, second = TokenBucket(10, 10 / 3600), TokenBucket(10, 10 / 3600)
+    buckets["shared"] = first
+    for _ in range(3):
+        first.take(1)
+    run(sync_buckets)
+    assert float(redis.hget(RATE_LIMIT_KEY.format("shared"), "tokens")) == pytest.approx(7, abs=0.01)
+    assert first.tokens == pytest.approx(7, abs=0.01) and first.spent == 0
+
+    buckets["shared"] = second  # another worker, which only saw its own two requests
+    second.take(1)
+    second.take(1)
+    run(sync_buckets)
+    assert second.tokens == pytest.approx(5, abs=0.01)
+
+
+def test_sync_forgets_idle_buckets(client, run, redis, buckets):
+    buckets["idle"] = TokenBucket(5, 1)
+    run(sync_buckets)
+    assert buckets == {}
+    assert redis.keys("ratelimit:*") == []
+
+
+def test_limits_stay_local_while_redis_is_down(client, run, redis, buckets, monkeypatch):
+    bucket = buckets["key"] = TokenBucket(2, 2 / 3600)
+    bucket.take(1)
+    errors_before = RATE_LIMIT_SYNC_ERRORS._value.get()
+    with monkeypatch.context() as down:
+        down.setattr(rate_limiter, "redis_client", DownRedis())
+        run(sync_buckets)
+    assert RATE_LIMIT_SYNC_ERRORS._value.get() == errors_before + 1
+    assert rate_limiter._redis_ok is False
+    assert bucket.take(1) == 0 and bucket.take(1) > 0  # still enforced, per process
+
+    run(sync_buckets)  # Redis is back
+    assert rate_limiter._redis_ok is True
+    assert redis.exists(RATE_LIMIT_KEY.format("key"))
+
+
+def test_load_factor_shrinks_with_db_latency(monkeypatch):
+    monkeypatch.setattr(rate_limiter.settings, "RATE_LIMIT_DB_LATENCY_TARGET_MS", 25)
+    monkeypatch.setattr(rate_limiter.settings, "RATE_LIMIT_MIN_LOAD_FACTOR", 0.25)
+    for latency, expected in ((0.0, 1.0), (0.025, 1.0), (0.05, 0.5), (0.075, 1 / 3), (1.0, 0.25)):
+        monkeypatch.setattr(rate_limiter, "db_latency", SimpleNamespace(value=latency))
+        assert rate_limiter.load_factor() == pytest.approx(expected)
+
+
+def adaptive_app() -> FastAPI:
+    limit = AdaptiveRateLimiter(
+        "adaptive",
+        RatePolicy(anonymous=(3, 60), authenticated=(6, 60), roles={"scoring": (12, 60)}),
+        costs={"/spirit/": 3},
+    )
+    app = FastAPI()
+
+    @app.patch("/matches/{match_id}/score", dependencies=[Depends(limit)])
+    def score(match_id: int):
+        return match_id
+
+    @app.post("/spirit/", dependencies=[Depends(limit)])
+    def spirit():
+        return "ok"
+
+    return app
+
+
+def bearer(uid: int, role: str) -> dict:
+    return {"Authorization": f"Bearer {create_access_token({'sub': f'user{uid}', 'uid': uid, 'role': role})}"}
+
+
+def allowed(client, method: str, path: str, headers: dict | None = None, attempts: int = 20) -> int:
+    return [client.request(method, path, headers=headers).status_code for _ in range(attempts)].count(200)
+
+
+def test_budgets_follow_the_token_role(buckets):
+    with TestClient(adaptive_app()) as client:
+        assert allowed(client, "PATCH", "/matches/1/score") == 3
+        assert allowed(client, "PATCH", "/matches/1/score", bearer(1, "viewer")) == 6
+        assert allowed(client, "PATCH", "/matches/1/score", bearer(2, "scoring")) == 12
+        # A second scorer has a budget of their own; a forged token counts as anonymous, whose budget is spent
+        assert allowed(client, "PATCH", "/matches/2/score", bearer(3, "scoring")) == 12
+        assert allowed(client, "PATCH", "/matches/1/score", {"Authorization": "Bearer forged"}) == 0
+
+
+def test_routes_spend_their_weight_from_one_budget(buckets):
+    with TestClient(adaptive_app()) as client:
+        headers = bearer(1, "scoring")
+        assert allowed(client, "POST", "/spirit/", headers) == 4
+        assert allowed(client, "PATCH", "/matches/1/score", headers) == 0
+        denied = client.post("/spirit/", headers=headers)
+        assert denied.status_code == 429 and int(denied.headers["Retry-After"]) == 15
+
+
+def test_costs_grow_while_the_db_is_slow(buckets, monkeypatch):
+    monkeypatch.setattr(rate_limiter, "load_factor", lambda: 0.5)
+    with TestClient(adaptive_app()) as client:
+        assert allowed(client, "PATCH", "/matches/1/score", bearer(1, "scoring")) == 6
+        assert allowed(client, "POST", "/spirit/", bearer(2, "scoring")) == 2
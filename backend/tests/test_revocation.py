@@ -0,0 +1,99 @@
+"""Token revocation: the Bloom filter, and the Redis registry it fronts."""
+
+import asyncio
+import time
+import uuid
+import pytest
+from app.core import revocation
+from app.core.revocation import REVOKED_KEY, BloomFilter, RevocationRegistry, revocations
+from app.models.user import RoleEnum
+from tests.seed import auth_headers, make_user
+
+
+class Unreachable:
+    """Stands in for redis_client when Redis is down: every command fails."""
+
+    def __getattr__(self, name):
+        async def fail(*args, **kwargs):
+            raise ConnectionError(f"{name}: Redis is down")
+        return fail
+
+
+def test_bloom_filter_sizing():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    assert (bloom.size, bloom.hashes) == (9586, 7)
+    assert len(bloom._bits) == 1199
+
+
+@pytest.mark.parametrize("capacity, error_rate", [(1_000, 0.01), (20_000, 0.001)])
+def test_bloom_filter_has_no_false_negatives_and_few_false_positives(capacity, error_rate):
+    bloom = BloomFilter(capacity, error_rate)
+    members = [uuid.uuid4().hex for _ in range(capacity)]
+    for jti in members:
+        bloom.add(jti)
+    assert all(jti in bloom for jti in members)
+    trials = 200_000
+    false_positives = sum(uuid.uuid4().hex in bloom for _ in range(trials))
+    assert false_positives / trials < error_rate * 1.5
+
+
+def test_unrevoked_tokens_are_checked_without_redis(monkeypatch):
+    monkeypatch.setattr(revocation, "redis_client", Unreachable())
+    registry = RevocationRegistry()
+    # Redis would have answered "revoked" (fail closed) had it been asked
+    assert asyncio.run(registry.is_revoked(uuid.uuid4().hex)) is False
+
+
+def test_filter_hits_fail_closed_without_redis(monkeypatch):
+    monkeypatch.setattr(revocation, "redis_client", Unreachable())
+    registry = RevocationRegistry()
+    registry._add("stolen")
+    assert asyncio.run(registry.is_revoked("stolen")) is True
+
+
+def test_revoking_without_redis_is_a_503(monkeypatch):
+    monkeypatch.setattr(revocation, "redis_client", Unreachable())
+    with pytest.raises(revocation.HTTPException) as raised:
+        asyncio.run(RevocationRegistry().revoke({"jti": time.time() + 60}))
+    assert raised.value.status_code == 503
+
+
+def test_filter_hits_are_confirmed_against_redis(client, run, redis):
+    registry = RevocationRegistry()
+    registry._add("false-positive")
+    assert run(registry.is_revoked, "false-positive") is False
+
+    run(registry.revoke, {"revoked": time.time() + 60})
+    assert run(registry.is_revoked, "revoked") is True
+    assert redis.zscore(REVOKED_KEY, "revoked") is not None
+
+
+def test_rebuild_drops_expired_revocations(client, run, redis):
+    redis.zadd(REVOKED_KEY, {"expired": time.time() - 1, "live": time.time() + 60})
+    registry = RevocationRegistry()
+    run(registry.rebuild)
+    assert "live" in registry._filter
+    assert "expired" not in registry._filter
+    assert redis.zrange(REVOKED_KEY, 0, -1) == ["live"]
+
+
+def test_logout_revokes_only_that_token(client, db):
+    make_user(db)
+    phone, laptop = auth_headers(client), auth_headers(client)
+    assert client.post("/auth/logout", headers=phone).status_code == 204
+    assert client.get("/auth/me", headers=phone).status_code == 401
+    assert client.get("/auth/me", headers=laptop).status_code == 200
+
+
+def test_revoke_sessions_logs_a_user_out_everywhere(client, db, redis):
+    make_user(db)
+    scorer = make_user(db, "scorer", RoleEnum.scoring)
+    admin = auth_headers(client)
+    devices = [auth_headers(client, "scorer") for _ in range(3)]
+
+    response = client.post(f"/auth/users/{scorer.id}/revoke-sessions", headers=admin)
+    assert response.status_code == 200 and response.json()["revoked"] == 3
+    assert all(client.get("/auth/me", headers=h).status_code == 401 for h in devices)
+    assert client.get("/auth/me", headers=admin).status_code == 200
+    revoked = redis.zrange(REVOKED_KEY, 0, -1)
+    assert len(revoked) == 3 and all(jti in revocations._filter for jti in revoked)
@@ -0,0 +1,150 @@
+"""The cached tournament schedule: hits, invalidation by every match write, and fills racing a write."""
+
+import json
+import pytest
+from sqlalchemy import select, update
+from app.core.cache_utils import (
+    TOURNAMENT_SCHEDULE_KEY, TOURNAMENT_SCHEDULE_VERSION_KEY, cache_tournament_schedule,
+    invalidate_tournament_schedule, read_tournament_schedule,
+)
+from app.core import query_stats
+from app.db.session import AsyncSessionLocal
+from app.models.match import Match
+from app.models.team import Team, TeamStatus
+from app.routers import match as match_router
+from tests.seed import auth_headers, make_tournament, make_user
+
+
+def schedule_url(tournament_id: int) -> str:
+    return f"/matches/tournaments/{tournament_id}/schedule"
+
+
+def scores(body: dict) -> dict[int, tuple]:
+    return {m["match_id"]: (m["score_a"], m["score_b"]) for day in body["schedule"] for f in day["fields"] for m in f["matches"]}
+
+
+def _approved(db, **options):
+    tournament = make_tournament(db, **options)
+    db.execute(update(Team).values(status=TeamStatus.approved))
+    db.commit()
+    return tournament
+
+
+def test_second_read_is_served_from_redis(client, db, redis):
+    make_user(db)
+    headers = auth_headers(client)
+    tournament = make_tournament(db, teams=4)
+    first = client.get(schedule_url(tournament.id), headers=headers)
+    assert first.status_code == 200
+    assert json.loads(redis.get(TOURNAMENT_SCHEDULE_KEY.format(tournament.id))) == first.json()
+
+    second = client.get(schedule_url(tournament.id), headers=headers)
+    assert second.json() == first.json()
+    assert int(second.headers["X-DB-Queries"]) <= 1  # at most the user lookup
+
+
+def test_a_fill_built_before_an_invalidation_is_refused(client, run, redis):
+    body, version = run(read_tournament_schedule, 1)
+    assert (body, version) == (None, "0")
+    run(invalidate_tournament_schedule, 1)
+    assert run(cache_tournament_schedule, 1, version, 60, '{"stale": true}') is False
+    assert redis.get(TOURNAMENT_SCHEDULE_KEY.format(1)) is None
+
+    _, version = run(read_tournament_schedule, 1)
+    assert version == "1"
+    assert run(cache_tournament_schedule, 1, version, 60, '{"fresh": true}') is True
+    assert redis.get(TOURNAMENT_SCHEDULE_KEY.format(1)) == '{"fresh": true}'
+    assert 0 < redis.ttl(TOURNAMENT_SCHEDULE_KEY.format(1)) <= 60
+
+
+def test_a_write_between_read_and_fill_does_not_leave_a_stale_schedule(client, db, redis, monkeypatch):
+    make_user(db)
+    headers = auth_headers(client)
+    tournament = make_tournament(db, teams=4, completed=0.0)
+    match_id = db.scalar(select(Match.id).where(Match.tournament_id == tournament.id).order_by(Match.id))
+    read = match_router.read_tournament_schedule
+
+    async def read_then_score(tournament_id: int):
+        # The cache miss is read, then a score lands (and invalidates) before the body is built and stored
+        result = await read(tournament_id)
+        async with AsyncSessionLocal() as session:
+            await session.execute(update(Match).where(Match.id == match_id).values(score_a=15))
+            await session.commit()
+        await invalidate_tournament_schedule(tournament_id)
+        return result
+
+    monkeypatch.setattr(match_router, "read_tournament_schedule", read_then_score)
+    monkeypatch.setattr(query_stats.settings, "QUERY_BUDGET_MODE", "off")  # the racing write runs inside the request
+    assert client.get(schedule_url(tournament.id), headers=headers).status_code == 200
+    assert redis.get(TOURNAMENT_SCHEDULE_KEY.format(tournament.id)) is None
+    monkeypatch.undo()
+
+    assert scores(client.get(schedule_url(tournament.id), headers=headers).json())[match_id] == (15, 0)
+    assert redis.exists(TOURNAMENT_SCHEDULE_KEY.format(tournament.id))
+
+
+def _create(client, db, headers, tournament):
+    a, b = db.scalars(select(Team.id).where(Team.tournament_id == tournament.id).order_by(Team.id).limit(2))
+    return client.post("/matches/", json={"tournament_id": tournament.id, "team_a_id": a, "team_b_id": b}, headers=headers)
+
+
+def _score(client, db, headers, tournament):
+    match_id = db.scalar(select(Match.id).where(Match.tournament_id == tournament.id).order_by(Match.id))
+    return client.patch(f"/matches/{match_id}/score", json={"score_a": 15, "score_b": 1, "status": "completed"}, headers=headers)
+
+
+def _delete(client, db, headers, tournament):
+    match_id = db.scalar(select(Match.id).where(Match.tournament_id == tournament.id).order_by(Match.id))
+    return client.delete(f"/matches/{match_id}", headers=headers)
+
+
+def _reschedule(client, db, headers, tournament):
+    match_id = db.scalar(select(Match.id).where(Match.tournament_id == tournament.id).order_by(Match.start_time, Match.id))
+    return client.post(
+        f"/matches/tournaments/{tournament.id}/reschedule", json={"match_id": match_id, "delay_minutes": 30}, headers=headers,
+    )
+
+
+def _delete_team(client, db, headers, tournament):
+    team_id = db.scalar(select(Team.id).where(Team.tournament_id == tournament.id).order_by(Team.id))
+    return client.delete(f"/tournaments/teams/{team_id}", headers=headers)
+
+
+@pytest.mark.parametrize("write", [_create, _score, _delete, _reschedule, _delete_team])
+def test_match_writes_invalidate_the_schedule(client, db, redis, write):
+    make_user(db)
+    headers = auth_headers(client)
+    tournament = _approved(db, teams=4, completed=0.0)
+    before = client.get(schedule_url(tournament.id), headers=headers).json()
+    version = redis.get(TOURNAMENT_SCHEDULE_VERSION_KEY.format(tournament.id))
+
+    response = write(client, db, headers, tournament)
+    assert response.status_code in (200, 204), response.text
+    assert redis.get(TOURNAMENT_SCHEDULE_KEY.format(tournament.id)) is None
+    assert redis.get(TOURNAMENT_SCHEDULE_VERSION_KEY.format(tournament.id)) != version
+
+    after = client.get(schedule_url(tournament.id), headers=headers).json()
+    assert after != before
+    assert redis.exists(TOURNAMENT_SCHEDULE_KEY.format(tournament.id))
+
+
+def test_generating_matches_invalidates_the_schedule(client, db, redis):
+    make_user(db)
+    headers = auth_headers(client)
+    tournament = _approved(db, teams=4, matches=False)
+    assert client.get(schedule_url(tournament.id), headers=headers).status_code == 404  # nothing to cache yet
+    redis.set(TOURNAMENT_SCHEDULE_KEY.format(tournament.id), '{"schedule": []}')  # e.g. left by another worker
+
+    generated = client.post(f"/matches/tournaments/{tournament.id}/generate-matches", headers=headers)
+    assert generated.status_code == 200, generated.text
+    assert redis.get(TOURNAMENT_SCHEDULE_KEY.format(tournament.id)) is None
+    assert len(scores(client.get(schedule_url(tournament.id), headers=headers).json())) == 6
+
+
+def test_deleting_the_tournament_invalidates_the_schedule(client, db, redis):
+    make_user(db)
+    headers = auth_headers(client)
+    tournament = make_tournament(db, teams=3)
+    client.get(schedule_url(tournament.id), headers=headers)
+    assert client.delete(f"/tournaments/{tournament.id}", headers=headers).status_code in (200, 204)
+    assert client.get(schedule_url(tournament.id), headers=headers).status_code == 404
@@ -0,0 +1,134 @@
+"""Interval index: conflict queries and cascading reschedules."""
+
+import random
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+import pytest
+from sqlalchemy import select
+from app.core.schedule_index import ScheduleIndex
+from app.core.scheduling import schedule_round_robin
+from app.models.match import Match
+from tests.seed import auth_headers, make_tournament, make_user
+
+T0 = datetime(2025, 6, 1, 9)
+
+
+def row(match_id, team_a, team_b, field, start_minutes, minutes=60):
+    start = T0 + timedelta(minutes=start_minutes) if start_minutes is not None else None
+    end = start + timedelta(minutes=minutes) if start and minutes else None
+    return SimpleNamespace(id=match_id, team_a_id=team_a, team_b_id=team_b, field_id=field, start_time=start, end_time=end)
+
+
+def brute_force_conflicts(rows) -> set:
+    found = set()
+    scheduled = [r for r in rows if r.start_time]
+    for i, a in enumerate(scheduled):
+        for b in scheduled[i + 1:]:
+            a_end = a.end_time or a.start_time + timedelta(minutes=60)
+            b_end = b.end_time or b.start_time + timedelta(minutes=60)
+            if a.start_time < b_end and b.start_time < a_end:
+                shared = {("team", t) for t in (a.team_a_id, a.team_b_id)} & {("team", t) for t in (b.team_a_id, b.team_b_id)}
+                shared |= {("field", a.field_id)} if a.field_id == b.field_id else set()
+                found |= {(kind, str(resource), *sorted((a.id, b.id))) for kind, resource in shared}
+    return found
+
+
+def as_set(conflicts) -> set:
+    return {(c["kind"], c["resource"], *sorted(c["match_ids"])) for c in conflicts}
+
+
+def test_overlapping_uses_half_open_intervals():
+    index = ScheduleIndex([row(1, 1, 2, "A", 0), row(2, 3, 4, "A", 60), row(3, 5, 6, "A", 30, 240)])
+    assert [s.match_id for s in index.overlapping(("field", "A"), T0 + timedelta(minutes=60), T0 + timedelta(minutes=61))] == [3, 2]
+    assert index.overlapping(("field", "A"), T0 - timedelta(minutes=60), T0) == []
+    assert [s.match_id for s in index.overlapping(("field", "A"), T0, T0 + timedelta(minutes=30), exclude=1)] == []
+    assert index.overlapping(("field", "B"), T0, T0 + timedelta(hours=9)) == []
+
+
+def test_unscheduled_matches_and_missing_end_times():
+    index = ScheduleIndex([row(1, 1, 2, "A", None), row(2, 1, 3, "B", 0, None), row(3, 1, 4, "C", 59)])
+    assert 1 not in index.slots
+    assert index.slots[2].end == T0 + timedelta(minutes=60)
+    assert as_set(index.conflicts()) == {("team", "1", 2, 3)}
+
+
+def test_conflicts_match_brute_force():
+    rng = random.Random(11)
+    rows = [
+        row(n, rng.randint(1, 12), rng.randint(13, 24), rng.choice("ABCD"), rng.randrange(0, 600, 15), rng.choice([45, 60, 90, None]))
+        for n in range(1, 150)
+    ]
+    index = ScheduleIndex(rows)
+    assert as_set(index.conflicts()) == brute_force_conflicts(rows)
+    for r in rows[:20]:
+        assert as_set(index.conflicts_for(r.id)) == {c for c in brute_force_conflicts(rows) if r.id in c[2:]}
+
+
+def _round_robin_rows(teams=10, fields=("A", "B", "C")):
+    schedule = schedule_round_robin(list(range(1, teams + 1)), list(fields), date(2025, 6, 1), rest_minutes=0)
+    return [SimpleNamespace(id=n, **m) for n, m in enumerate(schedule, start=1)]
+
+
+def test_shift_cascades_only_through_shared_teams_and_fields():
+    rows = _round_robin_rows()
+    index = ScheduleIndex(rows)
+    assert index.conflicts() == []
+    late = rows[10]
+
+    moved = index.shift(late.id, timedelta(minutes=45), gap=timedelta(minutes=15))
+
+    assert moved[late.id][0] == late.start_time + timedelta(minutes=45)
+    assert index.conflicts() == []
+    for r in rows:
+        if r.id not in moved:
+            assert (index.slots[r.id].start, index.slots[r.id].end) == (r.start_time, r.end_time)
+        else:
+            assert moved[r.id][0] >= r.start_time
+            assert moved[r.id][1] - moved[r.id][0] == r.end_time - r.start_time
+    assert all(r.id not in moved for r in rows if r.start_time < late.start_time)
+    assert len(moved) < len(rows) - 10
+
+
+def test_shift_keeps_the_gap_before_pushed_matches():
+    index = ScheduleIndex([row(1, 1, 2, "A", 0), row(2, 1, 3, "B", 60), row(3, 4, 5, "A", 60), row(4, 6, 7, "C", 60)])
+    moved = index.shift(1, timedelta(minutes=30), gap=timedelta(minutes=10))
+    assert moved == {
+        1: (T0 + timedelta(minutes=30), T0 + timedelta(minutes=90)),
+        2: (T0 + timedelta(minutes=100), T0 + timedelta(minutes=160)),
+        3: (T0 + timedelta(minutes=100), T0 + timedelta(minutes=160)),
+    }
+
+
+def test_bringing_a_match_forward_reports_new_conflicts():
+    index = ScheduleIndex([row(1, 1, 2, "A", 0), row(2, 1, 3, "B", 120)])
+    moved = index.shift(2, timedelta(minutes=-90))
+    assert moved == {2: (T0 + timedelta(minutes=30), T0 + timedelta(minutes=90))}
+    assert as_set(index.conflicts_for(2)) == {("team", "1", 1, 2)}
+
+
+@pytest.mark.parametrize("dry_run", [True, False])
+def test_reschedule_endpoint(client, db, dry_run):
+    make_user(db)
+    headers = auth_headers(client)
+    tournament = make_tournament(db, teams=6, completed=0, fields=2)
+    before = {m.id: (m.start_time, m.end_time) for m in db.scalars(select(Match))}
+    first = min(before, key=lambda i: before[i])
+    assert client.get(f"/matches/tournaments/{tournament.id}/conflicts", headers=headers).json() == []
+
+    response = client.post(
+        f"/matches/tournaments/{tournament.id}/reschedule",
+        json={"match_id": first, "delay_minutes": 30, "dry_run": dry_run}, headers=headers,
+    )
+    assert response.status_code == 200, response.text
+    moved = {m["match_id"]: m for m in response.json()["moved"]}
+    assert first in moved and len(moved) > 1
+    assert response.json()["conflicts"] == []
+
+    db.expire_all()
+    after = {m.id: (m.start_time, m.end_time) for m in db.scalars(select(Match))}
+    if dry_run:
+        assert after == before
+    else:
+        assert {i for i in after if after[i] != before[i]} == set(moved)
+        assert after[first][0] == before[first][0] + timedelta(minutes=30)
+    assert client.get(f"/matches/tournaments/{tournament.id}/conflicts", headers=headers).json() == []
@@ -0,0 +1,139 @@
+"""Round-robin pairing and slot packing."""
+
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from itertools import combinations
+from types import SimpleNamespace
+import pytest
+from sqlalchemy import func, select, update
+from app.core.scheduling import round_robin_rounds, schedule_matches, schedule_round_robin, tournament_fields
+from app.models.match import Match
+from app.models.team import Team, TeamStatus
+from tests.seed import auth_headers, make_tournament, make_user
+
+START = date(2025, 6, 1)
+FIELDS = ["North", "South", "East", "West"]
+
+
+@pytest.mark.parametrize("fields_json, expected", [
+    (["A", "B"], ["A", "B"]),
+    ('["A", "B", "C"]', ["A", "B", "C"]),
+    ("Main pitch", ["Main pitch"]),
+    ([1, None, "B"], ["1", "B"]),
+    (None, ["Field A", "Field B"]),
+    ([], ["Field A", "Field B"]),
+])
+def test_tournament_fields(fields_json, expected):
+    assert tournament_fields(SimpleNamespace(fields_json=fields_json)) == expected
+
+
+@pytest.mark.parametrize("teams", [2, 3, 8, 9, 20])
+def test_round_robin_rounds_pair_everyone_once(teams):
+    rounds = round_robin_rounds(list(range(1, teams + 1)))
+    assert len(rounds) == teams - 1 + teams % 2
+    for pairs in rounds:
+        playing = [team for pair in pairs for team in pair]
+        assert len(playing) == len(set(playing)) == teams - teams % 2
+    pairings = sorted(tuple(sorted(pair)) for pairs in rounds for pair in pairs)
+    assert pairings == list(combinations(range(1, teams + 1), 2))
+
+
+def _check_schedule(scheduled, fields, rest, day_start=time(9), day_end=time(18)):
+    booked = set()
+    by_team = defaultdict(list)
+    for match in scheduled:
+        assert match["field_id"] in fields
+        assert (match["field_id"], match["start_time"]) not in booked
+        booked.add((match["field_id"], match["start_time"]))
+        assert day_start <= match["start_time"].time() and match["end_time"].time() <= day_end
+        assert match["end_time"].date() == match["start_time"].date()
+        for team in (match["team_a_id"], match["team_b_id"]):
+            by_team[team].append((match["start_time"], match["end_time"]))
+    for games in by_team.values():
+        games.sort()
+        for (_, ended), (started, _) in zip(games, games[1:]):
+            assert started - ended >= rest
+
+
+@pytest.mark.parametrize("teams, fields", [(2, FIELDS), (7, FIELDS[:2]), (20, FIELDS), (31, FIELDS[:3])])
+def test_round_robin_schedule_is_valid(teams, fields):
+    scheduled = schedule_round_robin(list(range(1, teams + 1)), fields, START)
+    assert sorted(tuple(sorted((m["team_a_id"], m["team_b_id"]))) for m in scheduled) == list(combinations(range(1, teams + 1), 2))
+    _check_schedule(scheduled, fields, timedelta(minutes=60))
+    assert scheduled == sorted(scheduled, key=lambda m: (m["start_time"], fields.index(m["field_id"])))
+
+
+def test_fields_play_in_parallel():
+    scheduled = schedule_round_robin(list(range(20)), FIELDS, START)
+    slots = {m["start_time"] for m in scheduled}
+    # 190 matches on 4 fields: close to the 48 slots a perfect packing needs, not 190
+    assert len(slots) <= 52
+    assert scheduled[-1]["start_time"].date() <= START + timedelta(days=5)
+
+
+def test_rest_and_match_length_options():
+    scheduled = schedule_round_robin(list(range(6)), FIELDS, START, match_minutes=90, rest_minutes=120, day_start=time(8), day_end=time(20))
+    _check_schedule(scheduled, FIELDS, timedelta(minutes=120), time(8), time(20))
+    assert all(m["end_time"] - m["start_time"] == timedelta(minutes=90) for m in scheduled)
+
+
+def test_play_rolls_over_to_the_next_day():
+    scheduled = schedule_round_robin(list(range(10)), ["Only"], START, day_start=time(9), day_end=time(12))
+    first_day = [m for m in scheduled if m["start_time"].date() == START]
+    assert [m["start_time"].hour for m in first_day] == [9, 10, 11]
+    assert scheduled[3]["start_time"] == datetime(2025, 6, 2, 9)
+
+
+def test_dependencies_wait_for_feeding_matches():
+    matches = [
+        {"team_a_id": 1, "team_b_id": 2},
+        {"team_a_id": 3, "team_b_id": 4},
+        {"team_a_id": None, "team_b_id": None, "after": [0, 1]},
+    ]
+    first, second, final = schedule_matches(matches, FIELDS, START, rest_minutes=30)
+    assert first["start_time"] == second["start_time"] == datetime(2025, 6, 1, 9)
+    assert final["start_time"] >= first["end_time"] + timedelta(minutes=30)
+    assert "after" not in final
+
+
+def test_match_longer_than_the_day_is_rejected():
+    with pytest.raises(ValueError):
+        schedule_matches([{"team_a_id": 1, "team_b_id": 2}], FIELDS, START, match_minutes=120, day_start=time(9), day_end=time(10))
+
+
+def _approve_all(db):
+    db.execute(update(Team).values(status=TeamStatus.approved))
+    db.commit()
+
+
+def test_generate_matches_stores_the_schedule(client, db):
+    make_user(db)
+    headers = auth_headers(client)
+    tournament = make_tournament(db, teams=9, matches=False)
+    _approve_all(db)
+
+    response = client.post(f"/matches/tournaments/{tournament.id}/generate-matches", params={"rest_minutes": 30}, headers=headers)
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert len(body) == 36
+    stored = db.scalars(select(Match).where(Match.tournament_id == tournament.id).order_by(Match.id)).all()
+    assert [m.id for m in stored] == [m["id"] for m in body]
+    _check_schedule(
+        [{"team_a_id": m.team_a_id, "team_b_id": m.team_b_id, "field_id": m.field_id, "start_time": m.start_time, "end_time": m.end_time} for m in stored],
+        tournament_fields(tournament), timedelta(minutes=30),
+    )
+
+    again = client.post(f"/matches/tournaments/{tournament.id}/generate-matches", headers=headers)
+    assert again.status_code == 400
+
+
+def test_generate_matches_rejects_a_match_longer_than_the_day(client, db):
+    make_user(db)
+    tournament = make_tournament(db, teams=4, matches=False)
+    _approve_all(db)
+    response = client.post(
+        f"/matches/tournaments/{tournament.id}/generate-matches",
+        params={"match_minutes": 120, "day_start": "09:00", "day_end": "10:00"}, headers=auth_headers(client),
+    )
+    assert response.status_code == 400
+    assert db.scalar(select(func.count(Match.id))) == 0
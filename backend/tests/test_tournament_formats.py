@@ -0,0 +1,217 @@
+"""Pool play, crossovers and elimination brackets."""
+
+import random
+from collections import Counter, defaultdict
+from types import SimpleNamespace
+import pytest
+from sqlalchemy import select, update
+from app.core.tournament_formats import bracket_order, build_format, pool_label, pool_standings, render_source, snake_pools
+from app.models.match import Match
+from app.models.team import Team, TeamStatus
+from tests.seed import auth_headers, make_tournament, make_user
+
+
+def play_out(specs: list[dict], seed: int = 0) -> dict:
+    """
+    Play every match in order with random winners, resolving sources the way
+    advance_bracket does. Fails if a match is reached before its teams are known.
+    A bracket reset is skipped when the winners bracket champion won the first final.
+    Returns {"losses": Counter of losses per team, "winner": winner of the last match played,
+    "played": number of matches played}.
+    """
+    rng = random.Random(seed)
+    decided: dict = {}
+    sides: dict = {}
+    pools: dict = defaultdict(dict)  # label -> {match index: result}
+    losses: Counter = Counter()
+    winner = None
+    played = 0
+    for index, spec in enumerate(specs):
+        if spec["stage"] == "final" and spec["round_number"] == 2:
+            final = spec["source_b"][1]
+            if decided[("winner", final)] == sides[final][0]:
+                continue
+        teams = []
+        for side in ("a", "b"):
+            source = spec[f"source_{side}"]
+            if source is None:
+                teams.append(spec[f"team_{side}_id"])
+            elif source[0] == "pool":
+                label, rank, pool_matches = source[1:]
+                assert all(i < index for i in pool_matches)
+                teams.append(pool_standings([pools[label][i] for i in pool_matches])[rank - 1])
+            else:
+                assert source[1] < index
+                teams.append(decided[source])
+        a, b = sides[index] = teams
+        assert a is not None and b is not None and a != b
+        played += 1
+        score_a, score_b = rng.sample(range(16), 2)
+        winner, loser = (a, b) if score_a > score_b else (b, a)
+        decided[("winner", index)], decided[("loser", index)] = winner, loser
+        losses[loser] += 1
+        if spec["stage"] == "pool":
+            pools[spec["pool"]][index] = SimpleNamespace(team_a_id=a, team_b_id=b, score_a=score_a, score_b=score_b)
+    return {"losses": losses, "winner": winner, "played": played}
+
+
+def test_pool_labels():
+    assert [pool_label(i) for i in (0, 1, 25, 26)] == ["A", "B", "Z", "P27"]
+
+
+def test_snake_pools_are_balanced():
+    assert snake_pools(list(range(1, 9)), 3) == [[1, 6, 7], [2, 5, 8], [3, 4]]
+
+
+def test_bracket_order():
+    assert bracket_order(1) == [1]
+    assert bracket_order(8) == [1, 8, 4, 5, 2, 7, 3, 6]
+    assert sorted(bracket_order(64)) == list(range(1, 65))
+
+
+@pytest.mark.parametrize("teams", [2, 3, 5, 6, 8, 13, 32])
+def test_single_elimination(teams):
+    specs = build_format(list(range(1, teams + 1)))
+    assert len(specs) == teams - 1
+    assert {spec["stage"] for spec in specs} == {"bracket"}
+    result = play_out(specs)
+    assert sum(result["losses"].values()) == teams - 1
+    assert set(result["losses"].values()) == {1}
+
+
+def test_top_seeds_get_the_byes():
+    first_round = [spec for spec in build_format([1, 2, 3, 4, 5, 6]) if spec["round_number"] == 1]
+    assert sorted((spec["team_a_id"], spec["team_b_id"]) for spec in first_round) == [(3, 6), (4, 5)]
+
+
+@pytest.mark.parametrize("teams", [2, 3, 4, 7, 8, 12, 16])
+def test_double_elimination(teams):
+    specs = build_format(list(range(1, teams + 1)), elimination="double")
+    assert len(specs) == 2 * teams - 1
+    final, reset = specs[-2:]
+    assert (final["stage"], final["round_number"], reset["stage"], reset["round_number"]) == ("final", 1, "final", 2)
+    assert (reset["source_a"], reset["source_b"]) == (("loser", len(specs) - 2), ("winner", len(specs) - 2))
+    resets = 0
+    for seed in range(10):
+        result = play_out(specs, seed)
+        # Everybody but the champion is out after exactly two losses; the champion lost at most once
+        champion = result["winner"]
+        others = [n for team, n in result["losses"].items() if team != champion]
+        assert len(others) == teams - 1
+        assert result["losses"][champion] <= 1
+        assert set(others) == {2}
+        assert result["played"] in (2 * teams - 2, 2 * teams - 1)
+        resets += result["played"] == 2 * teams - 1
+    assert 0 < resets < 10
+
+
+@pytest.mark.parametrize("crossovers, expected", [(False, 24 + 7), (True, 24 + 4 + 7)])
+def test_pools_then_bracket(crossovers, expected):
+    specs = build_format(list(range(1, 17)), pool_count=4, advance_per_pool=2, crossovers=crossovers)
+    assert len(specs) == expected
+    pool_specs = [spec for spec in specs if spec["stage"] == "pool"]
+    assert Counter(spec["pool"] for spec in pool_specs) == {"A": 6, "B": 6, "C": 6, "D": 6}
+    assert Counter(spec["stage"] for spec in specs)["crossover"] == (4 if crossovers else 0)
+    for seed in range(5):
+        play_out(specs, seed)
+
+
+def test_large_events_stay_near_linear():
+    teams = list(range(1, 129))
+    specs = build_format(teams, pool_count=16, advance_per_pool=2)
+    assert len(specs) == 16 * 28 + 31  # not the 8128 of a full round robin
+    play_out(specs)
+
+
+@pytest.mark.parametrize("options", [
+    {"team_ids": [1]},
+    {"team_ids": [1, 2, 3, 4], "elimination": "triple"},
+    {"team_ids": [1, 2, 3, 4, 5], "pool_count": 3},
+    {"team_ids": list(range(8)), "pool_count": 2, "advance_per_pool": 4, "crossovers": True},
+    {"team_ids": list(range(8)), "pool_count": 2, "advance_per_pool": 5},
+])
+def test_invalid_formats(options):
+    with pytest.raises(ValueError):
+        build_format(**options)
+
+
+def test_render_source():
+    assert render_source(None, [10, 11]) is None
+    assert render_source(("winner", 1), [10, 11]) == "winner:11"
+    assert render_source(("loser", 0), [10, 11]) == "loser:10"
+    assert render_source(("pool", "B", 2, [0, 1]), [10, 11]) == "pool:B:2"
+
+
+def test_pool_standings_rank_by_points_then_goal_difference():
+    match = lambda a, b, sa, sb: SimpleNamespace(team_a_id=a, team_b_id=b, score_a=sa, score_b=sb)  # noqa: E731
+    matches = [match(1, 2, 10, 5), match(3, 1, 10, 9), match(2, 3, 10, 8)]
+    # Everyone has one win: goal difference decides (1: +4, 2: -3, 3: -1)
+    assert pool_standings(matches) == [1, 3, 2]
+
+
+def test_bracket_advances_as_matches_complete(client, db):
+    make_user(db)
+    headers = auth_headers(client)
+    tournament = make_tournament(db, teams=4, matches=False)
+    db.execute(update(Team).values(status=TeamStatus.approved))
+    db.commit()
+
+    response = client.post(f"/matches/tournaments/{tournament.id}/generate-bracket", json={"elimination": "single"}, headers=headers)
+    assert response.status_code == 200, response.text
+    semi_one, semi_two, final = response.json()
+    assert final["team_a_id"] is None and final["source_a"] == f"winner:{semi_one['id']}"
+
+    for semi, score in ((semi_one, (15, 9)), (semi_two, (7, 15))):
+        scored = client.patch(f"/matches/{semi['id']}/score", json={"score_a": score[0], "score_b": score[1], "status": "completed"}, headers=headers)
+        assert scored.status_code == 200, scored.text
+
+    db.expire_all()
+    stored = db.scalar(select(Match).where(Match.id == final["id"]))
+    assert (stored.team_a_id, stored.team_b_id) == (semi_one["team_a_id"], semi_two["team_b_id"])
+
+
+def _double_bracket(client, db, headers) -> tuple[dict, dict]:
+    """A three team double elimination bracket, played up to its first final."""
+    tournament = make_tournament(db, teams=3, matches=False)
+    db.execute(update(Team).values(status=TeamStatus.approved))
+    db.commit()
+    response = client.post(f"/matches/tournaments/{tournament.id}/generate-bracket", json={"elimination": "double"}, headers=headers)
+    assert response.status_code == 200, response.text
+    *earlier, final, reset = response.json()
+    assert reset["source_a"] == f"loser:{final['id']}" and reset["team_a_id"] is None
+    for match in earlier:
+        score(client, headers, match["id"], 15, 10)
+    return final, reset
+
+
+def score(client, headers, match_id: int, score_a: int, score_b: int):
+    response = client.patch(f"/matches/{match_id}/score", json={"score_a": score_a, "score_b": score_b, "status": "completed"}, headers=headers)
+    assert response.status_code == 200, response.text
+
+
+def test_bracket_reset_is_played_when_the_losers_bracket_wins_the_final(client, db):
+    make_user(db)
+    headers = auth_headers(client)
+    final, reset = _double_bracket(client, db, headers)
+    score(client, headers, final["id"], 9, 15)
+
+    db.expire_all()
+    first, second = db.get(Match, final["id"]), db.get(Match, reset["id"])
+    assert (second.team_a_id, second.team_b_id) == (first.team_a_id, first.team_b_id)
+
+
+def test_bracket_reset_is_dropped_when_the_winners_bracket_wins_the_final(client, db):
+    make_user(db)
+    headers = auth_headers(client)
+    final, reset = _double_bracket(client, db, headers)
+    score(client, headers, final["id"], 15, 9)
+    db.expire_all()
+    assert db.get(Match, reset["id"]) is None
+
+    # A corrected score brings the reset back
+    score(client, headers, final["id"], 12, 15)
+    db.expire_all()
+    first = db.get(Match, final["id"])
+    again = db.scalar(select(Match).where(Match.source_a == f"loser:{final['id']}"))
+    assert (again.stage, again.round_number) == ("final", 2)
+    assert (again.team_a_id, again.team_b_id) == (first.team_a_id, first.team_b_id)
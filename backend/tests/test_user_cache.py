@@ -0,0 +1,168 @@
+"""Resolving the current user: per-request memo, the user cache, trusted claims, and invalidation across workers."""
+
+import asyncio
+import time
+from types import SimpleNamespace
+import pytest
+from sqlalchemy import select
+from app.core import deps, user_cache as user_cache_module
+from app.core.config import settings
+from app.core.deps import get_current_user
+from app.core.user_cache import USER_CHANGED_CHANNEL, CurrentUser, UserCache, user_cache
+from app.db.session import AsyncSessionLocal
+from app.models.user import RoleEnum, User
+from tests.seed import auth_headers, make_user
+
+
+def wait_until(condition, timeout: float = 5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def next_message(pubsub, timeout: float) -> str | None:
+    """The next published message, skipping subscribe confirmations."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        message = pubsub.get_message(ignore_subscribe_messages=True, timeout=0.05)
+        if message is not None:
+            return message["data"]
+    return None
+
+
+def me(client, headers):
+    return client.get("/auth/me", headers=headers)
+
+
+@pytest.fixture
+def trust_claims(monkeypatch):
+    monkeypatch.setattr(settings, "AUTH_TRUST_TOKEN_CLAIMS", True)
+
+
+async def _change(username: str, values: dict):
+    """Update a user through an AsyncSession, as request handlers do, so the commit runs on the loop."""
+    async with AsyncSessionLocal() as db:
+        user = await db.scalar(select(User).where(User.username == username))
+        for name, value in values.items():
+            setattr(user, name, value)
+        await db.commit()
+    await asyncio.gather(*user_cache_module._pending_tasks)
+
+
+def test_entries_expire_and_the_least_recently_used_is_evicted(monkeypatch):
+    cache = UserCache(max_size=2, ttl=60)
+    alice, bob, carol = (CurrentUser(id=n, username=name, role=RoleEnum.coach) for n, name in enumerate(("alice", "bob", "carol")))
+    cache.put(alice)
+    cache.put(bob)
+    assert cache.get("alice") is alice  # now the most recently used
+    cache.put(carol)
+    assert (cache.get("alice"), cache.get("bob"), cache.get("carol")) == (alice, None, carol)
+
+    now = time.monotonic()
+    monkeypatch.setattr(user_cache_module.time, "monotonic", lambda: now + 61)
+    assert cache.get("alice") is None
+
+
+def test_the_user_is_resolved_once_per_request(client, db, run, monkeypatch):
+    make_user(db)
+    token = client.post("/auth/login", data={"username": "admin", "password": "secret"}).json()["access_token"]
+    request = SimpleNamespace(state=SimpleNamespace())
+    first = run(get_current_user, request, token)
+    assert request.state.current_user is first
+
+    async def unreachable(jti):
+        raise AssertionError("the token is checked again")
+
+    monkeypatch.setattr(deps.revocations, "is_revoked", unreachable)
+    user_cache.invalidate(None)
+    assert run(get_current_user, request, "not even a token") is first
+
+
+def test_only_a_cold_cache_reads_the_users_table(client, db):
+    make_user(db)
+    headers = auth_headers(client)
+    user_cache.invalidate(None)
+    assert me(client, headers).headers["X-DB-Queries"] == "1"
+    assert me(client, headers).headers["X-DB-Queries"] == "0"
+    assert user_cache.get("admin").role == RoleEnum.admin
+
+
+def test_trusted_claims_need_no_lookup(client, db, trust_claims):
+    make_user(db, "scorer", RoleEnum.volunteer)
+    headers = auth_headers(client, "scorer")
+    user_cache.invalidate(None)
+    response = me(client, headers)
+    assert response.headers["X-DB-Queries"] == "0"
+    assert response.json()["role"] == "volunteer"
+    assert user_cache.get("scorer") is None
+
+
+def test_role_changes_and_deactivation_apply_on_the_next_request(client, db):
+    user = make_user(db)
+    headers = auth_headers(client)
+    assert me(client, headers).json()["role"] == "admin"
+
+    user.role = RoleEnum.coach
+    db.commit()
+    assert me(client, headers).json()["role"] == "coach"
+    assert client.post("/auth/users/1/revoke-sessions", headers=headers).status_code == 403
+
+    user.is_active = False
+    db.commit()
+    assert me(client, headers).status_code == 403
+
+
+def test_a_rolled_back_change_publishes_nothing(client, db, redis):
+    user = make_user(db)
+    pubsub = redis.pubsub()
+    pubsub.subscribe(USER_CHANGED_CHANNEL)
+    pubsub.get_message(timeout=1)
+    user.role = RoleEnum.coach
+    db.flush()
+    db.rollback()
+    db.commit()
+    assert "user_changes" not in db.info
+    assert next_message(pubsub, 0.3) is None
+
+
+def test_committed_changes_are_published_to_other_workers(client, db, redis, run):
+    make_user(db)
+    pubsub = redis.pubsub()
+    pubsub.subscribe(USER_CHANGED_CHANNEL)
+    pubsub.get_message(timeout=1)  # the subscription is live once confirmed
+    run(_change, "admin", {"role": RoleEnum.manager})
+    assert next_message(pubsub, 5) == "admin"
+
+
+def test_changes_published_by_another_worker_evict_the_cached_user(client, db, redis):
+    make_user(db)
+    headers = auth_headers(client)
+    assert me(client, headers).json()["role"] == "admin"
+    # Another worker demotes the user: this process only hears about it over pub/sub
+    db.execute(User.__table__.update().values(role=RoleEnum.coach))
+    db.commit()
+    assert me(client, headers).json()["role"] == "admin"  # still cached here
+
+    redis.publish(USER_CHANGED_CHANNEL, "admin")
+    wait_until(lambda: user_cache.get("admin") is None)
+    assert me(client, headers).json()["role"] == "coach"
+
+
+def test_deactivation_revokes_live_tokens(client, db, run, trust_claims):
+    make_user(db, "scorer", RoleEnum.volunteer)
+    headers = auth_headers(client, "scorer")
+    assert me(client, headers).status_code == 200
+    run(_change, "scorer", {"is_active": False})
+    response = me(client, headers)
+    assert response.status_code == 401 and response.json()["detail"] == "Token revoked"
+
+
+def test_with_trusted_claims_a_role_change_revokes_tokens_carrying_the_old_role(client, db, run, trust_claims):
+    make_user(db)
+    headers = auth_headers(client)
+    run(_change, "admin", {"role": RoleEnum.coach})
+    assert me(client, headers).status_code == 401
+
+    relogged = me(client, auth_headers(client))
+    assert relogged.status_code == 200 and relogged.json()["role"] == "coach"
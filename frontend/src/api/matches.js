@@ -1,9 +1,7 @@
 import api from "./axiosInstance";
+import { fetchAllPages } from "./pagination";
 
-export const fetchMatches = async () => {
-    const res = await api.get("/matches/");
-    return res.data;
-};
+export const fetchMatches = async () => fetchAllPages("/matches/");
 
 export const fetchMatch = async (matchId) => {
     if (!matchId) return null;
@@ -1,4 +1,5 @@
 import api from "./axiosInstance";
+import { fetchAllPages } from "./pagination";
 
 export const uploadTournamentMedia = async ({ tournamentId, file, caption, isPublic = true }) => {
     const formData = new FormData();
@@ -14,8 +15,7 @@ export const uploadTournamentMedia = async ({ tournamentId, file, caption, isPub
 
 export const fetchTournamentGallery = async (tournamentId) => {
     if (!tournamentId) return [];
-    const res = await api.get(`/media/tournaments/${tournamentId}/gallery`);
-    return res.data;
+    return fetchAllPages(`/media/tournaments/${tournamentId}/gallery`);
 };
 
 export const deleteMedia = async (mediaId) => {
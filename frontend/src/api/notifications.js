@@ -1,9 +1,7 @@
 import api from "./axiosInstance";
+import { fetchAllPages } from "./pagination";
 
-export const fetchNotifications = async () => {
-    const res = await api.get("/notifications/");
-    return res.data;
-};
+export const fetchNotifications = async () => fetchAllPages("/notifications/");
 
 export const markNotificationRead = async (notificationId) => {
     const res = await api.patch(`/notifications/${notificationId}/read`);
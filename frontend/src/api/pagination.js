@@ -0,0 +1,14 @@
+import api from "./axiosInstance";
+
+// List endpoints return one page at a time; the next page's cursor comes back
+// in the X-Next-Cursor header and is absent on the last page.
+export const fetchAllPages = async (url, params = {}) => {
+    const items = [];
+    let cursor = null;
+    do {
+        const res = await api.get(url, { params: cursor ? { ...params, cursor } : params });
+        items.push(...res.data);
+        cursor = res.headers["x-next-cursor"];
+    } while (cursor);
+    return items;
+};
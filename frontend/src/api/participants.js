@@ -1,11 +1,7 @@
 import api from "./axiosInstance";
+import { fetchAllPages } from "./pagination";
 
-export const fetchParticipants = async (params = {}) => {
-    const query = new URLSearchParams(params).toString();
-    const suffix = query ? `?${query}` : "";
-    const res = await api.get(`/participants/${suffix}`);
-    return res.data;
-};
+export const fetchParticipants = async (params = {}) => fetchAllPages("/participants/", params);
 
 export const fetchParticipant = async (participantId) => {
     if (!participantId) return null;
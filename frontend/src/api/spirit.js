@@ -1,8 +1,5 @@
-import api from "./axiosInstance";
+import { fetchAllPages } from "./pagination";
 
 export const fetchSpiritScores = async (tournamentId) => {
-    const res = await api.get("/matches/");
-    const matches = res.data || [];
-    if (!tournamentId) return matches;
-    return matches.filter((match) => match.tournament_id === tournamentId);
+    return fetchAllPages("/matches/", tournamentId ? { tournament_id: tournamentId } : {});
 };